@@ -5,10 +5,13 @@ from pathlib import Path
 from dotenv import load_dotenv
 import sys
 import asyncio
+import threading
+import time
 import io
 import csv
-from geopy.geocoders import Nominatim
-from geopy.exc import GeocoderTimedOut, GeocoderServiceError
+import json
+import functools
+from contextlib import asynccontextmanager
 from datetime import datetime,timedelta
 
 # Setup Paths
@@ -17,17 +20,40 @@ sys.path.insert(0, str(BACKEND_DIR))
 env_path = BACKEND_DIR.parent / '.env'
 load_dotenv(dotenv_path=env_path)
 
-from fastapi import FastAPI, HTTPException, Header, Depends
+from fastapi import FastAPI, HTTPException, Header, Depends, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, StreamingResponse, Response
 from pydantic import BaseModel
+from sqlalchemy import func, or_, and_
 from sqlalchemy.orm import Session
-import google.generativeai as genai
 
-from orchestrator import VeeTools 
-from database import engine, Base, get_db
+from orchestrator import VeeTools, backfill_geo_cells, bind_language, ensure_kenya_locations
+from database import engine, Base, SessionLocal, get_db, sync_schema
 from models import IncidentReport
 from crypto_utils import decrypt_text
+from search_index import search_report_ids
+import idempotency
+import incident_events
+import timing
+import metrics
+import map_feed
+import map_payload
+from response_cache import response_cache
+from llm_client import LLM_BACKEND
+from model_registry import model_registry
+from model_router import OK, TIMEOUT, classify_error
+from session_store import session_store
+import history_manager
+from intent_router import intent_router, EMERGENCY, SELF_HARM
+from resource_registry import resource_directory
+from llm_pool import llm_pool, PoolBusy, RETRY_AFTER_SECONDS
+from chat_stream import stream_turn, TurnTimer, ttft_stats
+from map_clusters import cluster_index
+from hotspots import hotspot_engine
+from heatmap import heatmap_store, RESOLUTIONS, WINDOWS, FORMATS, ALL_TYPES, INCIDENT_TYPES
+from geo_utils import parse_bbox, geohash_ranges, KENYA_BBOX
+from readiness import readiness
+from profiler import profiler, ProfilerBusy, MAX_SECONDS as PROFILE_MAX_SECONDS, MAX_HZ as PROFILE_MAX_HZ
 
 # Logging Config
 logging.basicConfig(
@@ -40,14 +66,17 @@ logger = logging.getLogger("VeeBrain")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 ADMIN_TOKEN = os.getenv("VEE_ADMIN_TOKEN", "change_me")
 
-if not GEMINI_API_KEY:
-    logger.error("❌ CRITICAL: GEMINI_API_KEY not found in .env file.")
-    raise ValueError("GEMINI_API_KEY is missing. Please check your .env file.")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Serve /live at once; database, models and indexes warm in the background (see readiness.py)"""
+    readiness.start()
+    yield
+    await readiness.stop()
+    llm_pool.shutdown()
+    model_registry.stop_background_checks()
+    resource_directory.stop_watching()
 
-Base.metadata.create_all(bind=engine)
-logger.info("✅ Database Connected")
-
-app = FastAPI(title="Vee AI - Trauma-Informed GBV Mapping")
+app = FastAPI(title="Vee AI - Trauma-Informed GBV Mapping", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -56,6 +85,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+if metrics.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
 
 def verify_admin_token(x_admin_token: str = Header(None)):
     """Verify admin token from header"""
@@ -63,10 +94,17 @@ def verify_admin_token(x_admin_token: str = Header(None)):
         raise HTTPException(status_code=401, detail="Unauthorized")
     return True
 
-# Geocoder
-geolocator = Nominatim(user_agent="vee_gbv_mapper")
+# Geocoder (geopy is imported on first use, not at startup)
+_geolocator = None
 location_cache: Dict[str, tuple] = {}
 
+def get_geolocator():
+    global _geolocator
+    if _geolocator is None:
+        from geopy.geocoders import Nominatim
+        _geolocator = Nominatim(user_agent="vee_gbv_mapper")
+    return _geolocator
+
 def geocode_location(location_string: str) -> tuple:
     """
     Convert location string to coordinates with caching.
@@ -82,8 +120,9 @@ def geocode_location(location_string: str) -> tuple:
         return location_cache[location_string]
     
     # Try live geocoding
+    from geopy.exc import GeocoderTimedOut, GeocoderServiceError
     try:
-        location = geolocator.geocode(f"{location_string}, Kenya", timeout=10)
+        location = get_geolocator().geocode(f"{location_string}, Kenya", timeout=10)
         if location:
             coords = (location.latitude, location.longitude)
             location_cache[location_string] = coords
@@ -116,6 +155,7 @@ def geocode_location(location_string: str) -> tuple:
     return default_coords
 
 
+@timing.timed_tool
 def geocode_location_tool(location_string: str) -> dict:
     """
     Wrapper for Gemini to call. Converts location to coordinates.
@@ -126,7 +166,8 @@ def geocode_location_tool(location_string: str) -> dict:
     Returns:
         dict with 'latitude', 'longitude', and 'location' keys
     """
-    coords = geocode_location(location_string)
+    with timing.stage("geocode"):
+        coords = geocode_location(location_string)
     return {
         "latitude": coords[0],
         "longitude": coords[1],
@@ -177,6 +218,7 @@ class ChatRequest(BaseModel):
     message: str
     session_id: str = "default"
     language: str = "en"
+    message_id: Optional[str] = None    # client id of this message; resend it only when retrying the same message
 
 class ChatResponse(BaseModel):
     sender: str
@@ -191,119 +233,60 @@ class VerifyRequest(BaseModel):
 # ============================================================
 
 class GeminiModelManager:
-    """Manages multiple Gemini models with automatic fallback"""
+    """Per-session handle on the shared model registry - picks a model, never probes it"""
     
-    def __init__(self, api_key: str, language: str = "en"):
-        self.api_key = api_key
+    def __init__(self, language: str = "en"):
         self.language = language
-        genai.configure(api_key=api_key)
-        
-        # Model priority list (based on your test results)
-        self.model_priorities = [
-            "gemini-2.5-flash",           # ✅ Confirmed working
-            "gemini-flash-latest",        # Stable fallback
-            "gemini-2.0-flash",           # Alternative
-            "gemini-2.0-flash-exp",       # Experimental but capable
-            "gemini-flash-lite-latest",   # Lightweight fallback
-        ]
-        
-        # Select system prompt based on language
-        self.system_prompt = system_prompt_sw if language == "sw" else system_prompt_en
-        
-        self.tools_list = [VeeTools.save_incident_report, VeeTools.find_resources, geocode_location_tool]
-        self.active_model = None
-        self.current_model_name = None
-        
-        # Initialize with best available model
-        self._initialize_best_model()
+        self.model_priorities = model_registry.priorities
+        self.current_model_name = model_registry.best_model()
     
-    def _initialize_best_model(self):
-        """Try models in priority order until one works"""
-        for model_name in self.model_priorities:
-            try:
-                logger.info(f"🔄 Attempting to initialize: {model_name}")
-                
-                test_model = genai.GenerativeModel(
-                    model_name=model_name,
-                    tools=self.tools_list,
-                    system_instruction=self.system_prompt
-                )
-                
-                # Quick test to verify model works
-                test_chat = test_model.start_chat(enable_automatic_function_calling=True)
-                test_response = test_chat.send_message("Hi")
-                
-                if test_response.text:
-                    self.active_model = test_model
-                    self.current_model_name = model_name
-                    logger.info(f"✅ Successfully initialized: {model_name}")
-                    return
-                    
-            except Exception as e:
-                logger.warning(f"⚠️ Failed to initialize {model_name}: {str(e)[:100]}")
-                continue
-        
-        # If all models fail, raise error
-        raise RuntimeError("❌ ALL MODELS FAILED - Cannot start service")
-    
-    def create_chat_session(self) -> Any:
-        """Create a new chat session with the active model"""
-        if not self.active_model:
+    def create_chat_session(self, history: Optional[list] = None) -> Any:
+        """Create a new chat session with the active model, optionally carrying history over"""
+        if not self.current_model_name:
             raise RuntimeError("No active model available")
         
-        return self.active_model.start_chat(enable_automatic_function_calling=True)
+        return model_registry.start_chat(self.language, self.current_model_name, history)
+
+# ============================================================
+# STARTUP WARMUP (runs in the background after the server is up)
+# ============================================================
+
+async def warm_models():
+    """Configure the shared registry (no network calls), build the default models, start health checks"""
+    if not GEMINI_API_KEY and LLM_BACKEND != "fake":
+        raise ValueError("GEMINI_API_KEY is missing. Please check your .env file.")
     
-    def fallback_to_next_model(self):
-        """Switch to the next available model in the priority list"""
-        if not self.current_model_name:
-            return False
-        
-        try:
-            current_index = self.model_priorities.index(self.current_model_name)
-            remaining_models = self.model_priorities[current_index + 1:]
-            
-            for model_name in remaining_models:
-                try:
-                    logger.info(f"🔄 Falling back to: {model_name}")
-                    
-                    new_model = genai.GenerativeModel(
-                        model_name=model_name,
-                        tools=self.tools_list,
-                        system_instruction=self.system_prompt
-                    )
-                    
-                    # Test new model
-                    test_chat = new_model.start_chat(enable_automatic_function_calling=True)
-                    test_response = test_chat.send_message("Test")
-                    
-                    if test_response.text:
-                        self.active_model = new_model
-                        self.current_model_name = model_name
-                        logger.info(f"✅ Fallback successful: {model_name}")
-                        return True
-                        
-                except Exception as e:
-                    logger.warning(f"⚠️ Fallback failed for {model_name}: {str(e)[:100]}")
-                    continue
-            
-            logger.error("❌ All fallback models exhausted")
-            return False
-            
-        except Exception as e:
-            logger.error(f"❌ Fallback error: {e}")
-            return False
-
-# Initialize Model Manager (default to English)
-try:
-    model_manager = GeminiModelManager(GEMINI_API_KEY)
-    logger.info(f"🚀 Vee AI initialized with: {model_manager.current_model_name}")
-except Exception as e:
-    logger.error(f"❌ CRITICAL: Cannot initialize any model: {e}")
-    raise e
-
-# Chat Sessions Storage
-chat_sessions: Dict[str, Any] = {}
-session_model_managers: Dict[str, GeminiModelManager] = {}
+    def configure():
+        model_registry.configure(
+            GEMINI_API_KEY,
+            tools=[VeeTools.save_incident_report, VeeTools.find_resources, geocode_location_tool],
+            system_prompts={"en": system_prompt_en, "sw": system_prompt_sw}
+        )
+        for language in ("en", "sw"):
+            model_registry.get_model(language, model_registry.best_model() or model_registry.priorities[0])
+    
+    await asyncio.to_thread(configure)
+    model_registry.start_background_checks()
+    logger.info(f"🚀 Vee AI initialized with: {model_registry.best_model()}")
+
+def warm_database():
+    Base.metadata.create_all(bind=engine)
+    sync_schema()
+    backfill_geo_cells()
+    logger.info("✅ Database Connected")
+
+def warm_map_indexes():
+    map_feed.catch_up(force=True)    # take the change cursor before loading
+    cluster_index.ensure_loaded()
+    hotspot_engine.ensure_loaded()
+    heatmap_store.ensure_current()
+
+readiness.register("database", warm_database)
+readiness.register("models", warm_models)
+readiness.register("resources", resource_directory.warm, required=False)
+readiness.register("geonames", ensure_kenya_locations, required=False)
+readiness.register("intent_model", intent_router.warm, required=False)
+readiness.register("map_indexes", warm_map_indexes, required=False, after=("database",))
 
 # ============================================================
 # ENDPOINTS WITH FALLBACK LOGIC
@@ -314,10 +297,185 @@ async def root():
     return {
         "status": "ok", 
         "service": "Vee GBV Mapping", 
-        "ai_model": model_manager.current_model_name,
-        "fallback_available": len(model_manager.model_priorities) > 1
+        "ai_model": model_registry.best_model(),
+        "fallback_available": len(model_registry.priorities) > 1
     }
 
+CHAT_TIMEOUT_SECONDS = 20.0
+HEDGE_MAX_DELAY_SECONDS = CHAT_TIMEOUT_SECONDS * 0.75
+CHAT_HEDGING_ENABLED = os.getenv("VEE_CHAT_HEDGING", "true").lower() == "true"
+model_router = model_registry.router
+
+def _busy_text(error: PoolBusy, language: str) -> str:
+    if error.reason == "session_busy":
+        return "Bado najibu ujumbe wako uliopita. Tafadhali subiri kidogo." if language == "sw" else "I'm still answering your previous message. Please wait a moment."
+    return "Vee inasaidia watu wengi sasa hivi. Tafadhali subiri sekunde chache kisha ujaribu tena. Kama uko hatarini, piga 999 au 1195." if language == "sw" else "Vee is helping many people right now. Please wait a few seconds and try again. If you are in danger, call 999 or 1195."
+
+def _busy_error(error: PoolBusy, language: str) -> HTTPException:
+    logger.warning(f"🚦 Chat turn shed: {error.reason}")
+    return HTTPException(
+        status_code=503, detail=_busy_text(error, language), headers={"Retry-After": str(RETRY_AFTER_SECONDS)}
+    )
+
+def _require_ready(language: str):
+    """503 for LLM turns while the startup warmup is still running (fast-path replies never wait)"""
+    if readiness.is_ready():
+        return
+    logger.warning(f"🚦 Chat turn before ready, waiting on {', '.join(readiness.missing())}")
+    detail = "Vee inaanza sasa hivi. Tafadhali jaribu tena baada ya sekunde chache. Kama uko hatarini, piga 999 au 1195." if language == "sw" else "Vee is starting up. Please try again in a few seconds. If you are in danger, call 999 or 1195."
+    raise HTTPException(status_code=503, detail=detail, headers={"Retry-After": str(RETRY_AFTER_SECONDS)})
+
+def _get_or_create_session(session_key: str, language: str):
+    """Existing chat session for the key, or a new one on the best healthy model (None on failure)"""
+    session = session_store.get(session_key)
+    if session is not None:
+        return session
+    try:
+        logger.info(f"🆕 Creating new chat session in {language}...")
+        # Create new model manager with correct language
+        model_manager_for_session = GeminiModelManager(language=language)
+        session = session_store.create(
+            session_key, language, model_manager_for_session.create_chat_session(), model_manager_for_session
+        )
+        logger.info(f"✅ New session started: {session_key} with {model_manager_for_session.current_model_name}")
+        return session
+    except Exception as e:
+        logger.error(f"❌ Failed to start chat session: {e}")
+        return None
+
+def _route_session(session, exclude: List[str]) -> Optional[str]:
+    """Pick the model for this attempt; moves the session's history onto it if it changed"""
+    model_name = model_router.choose(exclude)
+    if model_name and model_name != session.manager.current_model_name:
+        logger.info(f"🔄 Routing {session.key}: {session.manager.current_model_name} -> {model_name}")
+        session.manager.current_model_name = model_name
+        session_store.replace_chat(session, session.manager.create_chat_session(session.chat.history))
+    return model_name
+
+# Prepended to a turn whose danger phrase the intent router overruled (negated, reported speech, or
+# another confident intent): the model still answers it, but leads with the emergency numbers
+SAFETY_NOTES = {
+    EMERGENCY: ("[Safety flag: this message mentions danger to the user's life. Before anything else, "
+                "check whether they are safe right now and give the emergency numbers 999 and 1195.]"),
+    SELF_HARM: ("[Safety flag: this message mentions self-harm. Before anything else, check how they are "
+                "feeling right now and give Befrienders Kenya 0722-178177 and 1195.]"),
+}
+
+def _fast_path(session_key: str, language: str, message: str):
+    """
+    Local reply for emergency, greeting and resource turns; the exchange joins the history on the next LLM turn.
+    A flagged reply (not .local) is an LLM turn that must carry a safety note (_llm_message).
+    """
+    reply = intent_router.route(message, language)
+    if reply is None or not reply.local:
+        return reply
+    session = _get_or_create_session(session_key, language) if readiness.is_ready() else None
+    if session is not None:
+        session.pending.append((message, reply.text))
+    return reply
+
+def _llm_message(message: str, fast) -> str:
+    if fast is None or not fast.flag:
+        return message
+    return f"{SAFETY_NOTES[fast.flag]}\n\n{message}"
+
+def _fast_metadata(reply, session_id: str, language: str) -> dict:
+    metadata = {"session_id": session_id, "language": language, "intent": reply.intent, "fast_path": True}
+    if reply.county:
+        metadata["county"] = reply.county
+    return metadata
+
+def _finish_turn(session) -> int:
+    """Window the history after a completed turn; returns the estimated context tokens of the next turn"""
+    if history_manager.compact(session):
+        session_store.recount(session)
+    else:
+        session_store.account(session)
+    return history_manager.context_tokens(session.chat.history)
+
+async def _send_on_model(model_name: str, chat: Any, message: str, timeout: float):
+    """
+    send_message on an LLM worker, recording latency/outcome with the router (not on cancellation).
+    The SDK call itself gives up after `timeout`, so a call we stop waiting for frees its worker.
+    """
+    started = time.perf_counter()
+    send = functools.partial(chat.send_message, message, request_options={"timeout": max(1.0, timeout)})
+    try:
+        with timing.stage("llm"):
+            response = await llm_pool.run(send)
+    except Exception as e:
+        model_router.record(model_name, (time.perf_counter() - started) * 1000, classify_error(e), e)
+        raise
+    model_router.record(model_name, (time.perf_counter() - started) * 1000, OK)
+    return chat, response
+
+async def _send_hedged(session, message: str, tried: List[str]):
+    """
+    One /chat attempt: the routed model, plus a backup model on a copy of the
+    history once the primary runs past its rolling p95 - only if the pool has
+    a spare worker for it. First success wins; the slower call is left to
+    finish in the background so its latency still reaches the router (tool
+    side effects are deduplicated by the turn's idempotency keys), but every
+    call carries the attempt's remaining deadline as its request timeout and
+    keeps its pool slot until it returns. Raises asyncio.TimeoutError after
+    CHAT_TIMEOUT_SECONDS.
+    """
+    primary = _route_session(session, tried)
+    if primary is None:
+        raise RuntimeError("All fallback models exhausted")
+    tried.append(primary)
+    
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    deadline = started + CHAT_TIMEOUT_SECONDS
+    hedge_at = started + model_router.hedge_delay(primary, HEDGE_MAX_DELAY_SECONDS) if CHAT_HEDGING_ENABLED else None
+    base_history = list(session.chat.history)
+    calls = {asyncio.ensure_future(_send_on_model(primary, session.chat, message, CHAT_TIMEOUT_SECONDS)): primary}
+    last_error: Optional[Exception] = None
+    
+    while calls:
+        wake_at = deadline if hedge_at is None else min(hedge_at, deadline)
+        done, _ = await asyncio.wait(
+            calls, timeout=max(0.0, wake_at - loop.time()), return_when=asyncio.FIRST_COMPLETED
+        )
+        
+        for task in done:
+            model_name = calls.pop(task)
+            try:
+                chat, response = task.result()
+            except Exception as e:
+                logger.error(f"⚠️ {model_name} failed: {str(e)[:200]}")
+                last_error = e
+                continue
+            
+            for other in calls:
+                other.add_done_callback(lambda f: f.cancelled() or f.exception())
+            if chat is not session.chat:
+                logger.info(f"🪁 Hedge won: {model_name} answered before {primary}")
+                session.manager.current_model_name = model_name
+                session_store.replace_chat(session, chat)
+            return model_name, response
+        
+        now = loop.time()
+        if hedge_at is not None and now >= hedge_at:
+            hedge_at = None
+            backup = model_router.choose(tried) if calls else None
+            if backup and not await llm_pool.reserve_extra():
+                logger.info(f"🪁 {primary} past {now - started:.1f}s, no spare worker to hedge with {backup}")
+                backup = None
+            if backup:
+                logger.info(f"🪁 {primary} past {now - started:.1f}s, hedging with {backup}")
+                tried.append(backup)
+                backup_chat = model_registry.start_chat(session.language, backup, base_history)
+                calls[asyncio.ensure_future(_send_on_model(backup, backup_chat, message, deadline - now))] = backup
+        elif calls and now >= deadline:
+            for task, model_name in calls.items():
+                model_router.record(model_name, (now - started) * 1000, TIMEOUT, TimeoutError("chat call timed out"))
+                task.cancel()
+            raise asyncio.TimeoutError()
+    
+    raise last_error
+
 @app.post("/chat", response_model=ChatResponse)
 async def chat_endpoint(request: ChatRequest):
     session_id = request.session_id
@@ -333,137 +491,472 @@ async def chat_endpoint(request: ChatRequest):
     # Check if we need to create new session or switch language
     session_key = f"{session_id}_{language}"
     
-    # Check if we need new session (new session or language change)
-    needs_new_session = (
-        session_key not in chat_sessions or 
-        session_key not in session_model_managers or
-        session_model_managers.get(session_key).language != language
-    )
+    # Emergencies, greetings and resource lookups are answered locally, ahead of admission
+    fast = _fast_path(session_key, language, user_msg)
+    if fast is not None and fast.local:
+        return ChatResponse(sender="bot", text=fast.text, metadata=_fast_metadata(fast, session_id, language))
+    _require_ready(language)
+    llm_msg = _llm_message(user_msg, fast)
     
-    if needs_new_session:
-        try:
-            logger.info(f"🆕 Creating new chat session in {language}...")
-            # Create new model manager with correct language
-            model_manager_for_session = GeminiModelManager(GEMINI_API_KEY, language=language)
-            session_model_managers[session_key] = model_manager_for_session
-            chat_sessions[session_key] = model_manager_for_session.create_chat_session()
-            logger.info(f"✅ New session started: {session_key} with {model_manager_for_session.current_model_name}")
-        except Exception as e:
-            logger.error(f"❌ Failed to start chat session: {e}")
-            fallback_msg = "Samahani, nina shida ya kuanza mazungumzo. Tafadhali jaribu tena." if language == "sw" else "Sorry, I'm having trouble starting the conversation. Please try again."
-            return ChatResponse(sender="bot", text=fallback_msg, metadata={"error": "session_failed"})
+    with timing.stage("session"):
+        session = _get_or_create_session(session_key, language)
+    if session is None:
+        fallback_msg = "Samahani, nina shida ya kuanza mazungumzo. Tafadhali jaribu tena." if language == "sw" else "Sorry, I'm having trouble starting the conversation. Please try again."
+        return ChatResponse(sender="bot", text=fallback_msg, metadata={"error": "session_failed"})
     
-    # Get the session and its model manager
-    current_chat_session = chat_sessions[session_key]
-    current_model_manager = session_model_managers[session_key]
-    
-    # Try sending message with automatic fallback
-    max_retries = len(current_model_manager.model_priorities)
-    
-    for attempt in range(max_retries):
-        try:
-            response = await asyncio.wait_for(
-                asyncio.to_thread(current_chat_session.send_message, user_msg),
-                timeout=20.0
-            )
+    try:
+        # Turns of one session run in arrival order; overload is shed before any model call
+        async with llm_pool.turn(session_key):
+            # One idempotency turn per user message, shared by every retry/fallback/hedge below
+            idempotency.begin_turn(session_key, request.message_id)
+            history_manager.flush_pending(session)
+            bind_language(language)
             
-            bot_text = response.text
+            # Each attempt routes to the best model not yet tried this turn
+            tried: List[str] = []
+            last_error: Optional[Exception] = None
+            attempt = 0
+            
+            while len(tried) < len(session.manager.model_priorities):
+                attempt += 1
+                try:
+                    model_name, response = await _send_hedged(session, llm_msg, tried)
+                    bot_text = response.text
+                    context_tokens = _finish_turn(session)
+                    metadata = {
+                        "session_id": session_id,
+                        "language": language,
+                        "model": model_name,
+                        "attempt": attempt,
+                        "context_tokens": context_tokens
+                    }
+                    if fast is not None:
+                        metadata["safety_flag"] = fast.flag
+                    return ChatResponse(sender="bot", text=bot_text, metadata=metadata)
+                
+                except asyncio.TimeoutError as e:
+                    logger.error(f"⏱️ Timeout on attempt {attempt}")
+                    last_error = e
+                except Exception as e:
+                    logger.error(f"⚠️ Error on attempt {attempt}: {str(e)[:200]}")
+                    last_error = e
+                
+                if len(tried) < len(session.manager.model_priorities):
+                    logger.info("🔄 Attempting model fallback...")
+            
+            if isinstance(last_error, asyncio.TimeoutError):
+                timeout_msg = "Samahani, nimechelewa kupata jibu. Tafadhali jaribu tena." if language == "sw" else "Sorry, I'm taking too long to respond. Please try again."
+                return ChatResponse(sender="bot", text=timeout_msg)
+            
+            fallback_text = "Nina shida kuungana na akili yangu sasa hivi, lakini nasikiliza. Tafadhali piga 1195 ikiwa hii ni dharura." if language == "sw" else "I am having trouble connecting to my brain right now, but I am listening. Please call 1195 if this is an emergency."
             return ChatResponse(
                 sender="bot", 
-                text=bot_text, 
+                text=fallback_text, 
                 metadata={
-                    "session_id": session_id,
-                    "language": language,
-                    "model": current_model_manager.current_model_name,
-                    "attempt": attempt + 1
+                    "error": str(last_error)[:100], 
+                    "all_models_failed": True,
+                    "language": language
                 }
             )
+    except PoolBusy as e:
+        raise _busy_error(e, language)
 
-        except asyncio.TimeoutError:
-            logger.error(f"⏱️ Timeout on attempt {attempt + 1}")
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest):
+    """
+    Same conversation as /chat, streamed as server-sent events.
+    
+    Events: token {text}, tool {name}, done {text, metadata}, error {text, metadata}.
+    A model that stays silent for CHAT_TIMEOUT_SECONDS, or fails before its
+    first token, falls back to the next routed model like /chat. Streams are
+    not hedged: only one model's tokens may reach the client.
+    """
+    session_id = request.session_id
+    user_msg = request.message.strip()
+    language = request.language
+    
+    logger.info(f"📨 Received streaming message in {language} from session: {session_id}")
+    
+    session_key = f"{session_id}_{language}"
+    fast = _fast_path(session_key, language, user_msg) if user_msg else None
+    local = fast is not None and fast.local
+    llm_msg = _llm_message(user_msg, fast)
+    
+    # Shed before the 200 is sent; the turn itself is admitted inside the stream
+    if user_msg and not local:
+        _require_ready(language)
+        try:
+            llm_pool.check(session_key)
+        except PoolBusy as e:
+            raise _busy_error(e, language)
+    
+    async def event_stream():
+        if not user_msg:
+            greeting = "Niko hapa kusikiliza." if language == "sw" else "I'm here to listen."
+            yield _sse("done", {"text": greeting, "metadata": {"session_id": session_id}})
+            return
+        if local:
+            yield _sse("done", {"text": fast.text, "metadata": _fast_metadata(fast, session_id, language)})
+            return
+        
+        with timing.stage("session"):
+            session = _get_or_create_session(session_key, language)
+        if session is None:
+            fallback_msg = "Samahani, nina shida ya kuanza mazungumzo. Tafadhali jaribu tena." if language == "sw" else "Sorry, I'm having trouble starting the conversation. Please try again."
+            yield _sse("error", {"text": fallback_msg, "metadata": {"error": "session_failed"}})
+            return
+        
+        try:
+            async with llm_pool.turn(session_key):
+                # One idempotency turn per user message, shared by every retry/fallback below
+                idempotency.begin_turn(session_key, request.message_id)
+                history_manager.flush_pending(session)
+                bind_language(language)
+                
+                loop = asyncio.get_running_loop()
+                max_retries = len(session.manager.model_priorities)
+                tried: List[str] = []
+                
+                for attempt in range(max_retries):
+                    model_name = _route_session(session, tried)
+                    tried.append(model_name)
+                    queue: asyncio.Queue = asyncio.Queue()
+                    cancelled = threading.Event()
+                    timer = TurnTimer()
+                    emitted_text = False
+                    
+                    def on_text(text: str, queue=queue):
+                        loop.call_soon_threadsafe(queue.put_nowait, ("token", text))
+                    
+                    def on_tool(name: str, queue=queue):
+                        loop.call_soon_threadsafe(queue.put_nowait, ("tool", name))
+                    
+                    worker = asyncio.ensure_future(llm_pool.run(
+                        stream_turn, session.chat, llm_msg, on_text, on_tool, cancelled, CHAT_TIMEOUT_SECONDS
+                    ))
+                    error: Optional[Exception] = None
+                    
+                    try:
+                        while True:
+                            next_event = asyncio.ensure_future(queue.get())
+                            done, _ = await asyncio.wait(
+                                {next_event, worker}, timeout=CHAT_TIMEOUT_SECONDS, return_when=asyncio.FIRST_COMPLETED
+                            )
+                            if next_event in done:
+                                kind, value = next_event.result()
+                            else:
+                                next_event.cancel()
+                                if worker not in done:
+                                    raise asyncio.TimeoutError()
+                                if queue.empty():
+                                    break
+                                kind, value = queue.get_nowait()
+                            
+                            if kind == "token":
+                                timer.mark_token()
+                                emitted_text = True
+                                yield _sse("token", {"text": value})
+                            else:
+                                yield _sse("tool", {"name": value})
+                        
+                        bot_text = worker.result()
+                        model_router.record(model_name, timer.total_ms, OK)
+                        context_tokens = _finish_turn(session)
+                        logger.info(f"⚡ Streamed reply | TTFT {timer.ttft_ms} ms | total {timer.total_ms} ms")
+                        metadata = {
+                            "session_id": session_id,
+                            "language": language,
+                            "model": model_name,
+                            "attempt": attempt + 1,
+                            "ttft_ms": timer.ttft_ms,
+                            "total_ms": timer.total_ms,
+                            "context_tokens": context_tokens
+                        }
+                        if fast is not None:
+                            metadata["safety_flag"] = fast.flag
+                        yield _sse("done", {"text": bot_text, "metadata": metadata})
+                        return
+                    
+                    except asyncio.TimeoutError as e:
+                        cancelled.set()
+                        logger.error(f"⏱️ Stream timeout on attempt {attempt + 1}")
+                        error = e
+                    except Exception as e:
+                        cancelled.set()
+                        logger.error(f"⚠️ Stream error on attempt {attempt + 1}: {str(e)[:200]}")
+                        error = e
+                    finally:
+                        # Client disconnects land here too: stop the worker at its next chunk
+                        cancelled.set()
+                        worker.add_done_callback(lambda f: f.cancelled() or f.exception())
+                    
+                    is_timeout = isinstance(error, asyncio.TimeoutError)
+                    if is_timeout:
+                        model_router.record(model_name, timer.total_ms, TIMEOUT, TimeoutError("chat stream went silent"))
+                    else:
+                        model_router.record(model_name, timer.total_ms, classify_error(error), error)
+                    
+                    # Text already reached the survivor: don't replay the turn on another model
+                    if not emitted_text and attempt < max_retries - 1:
+                        logger.info("🔄 Attempting model fallback...")
+                        continue
+                    
+                    if is_timeout and not emitted_text:
+                        text = "Samahani, nimechelewa kupata jibu. Tafadhali jaribu tena." if language == "sw" else "Sorry, I'm taking too long to respond. Please try again."
+                    else:
+                        text = "Nina shida kuungana na akili yangu sasa hivi, lakini nasikiliza. Tafadhali piga 1195 ikiwa hii ni dharura." if language == "sw" else "I am having trouble connecting to my brain right now, but I am listening. Please call 1195 if this is an emergency."
+                    yield _sse("error", {
+                        "text": text,
+                        "metadata": {"error": str(error)[:100], "language": language, "partial": emitted_text}
+                    })
+                    return
             
-            if attempt < max_retries - 1:
-                # Try fallback
-                logger.info("🔄 Attempting model fallback...")
-                if current_model_manager.fallback_to_next_model():
-                    # Recreate session with new model
-                    chat_sessions[session_key] = current_model_manager.create_chat_session()
-                    current_chat_session = chat_sessions[session_key]
-                    continue
+        except PoolBusy as e:
+            yield _sse("error", {"text": _busy_text(e, language), "metadata": {"busy": e.reason, "language": language}})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/api/incidents")
+async def get_incidents(
+    request: Request,
+    bbox: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    incident_type: Optional[str] = Query(None, alias="type"),
+    county: Optional[str] = None,
+    format: str = "rows",
+    db: Session = Depends(get_db)
+):
+    """
+    Get verified incidents for mapping.
+    
+    Optional filters: bbox ("west,south,east,north"), since/until (ISO datetime),
+    type and county. bbox + time window are answered by range scans on the
+    (status, geo_cell, timestamp) index.
+    
+    format=columnar returns parallel arrays with dictionary-encoded strings.
+    Responses carry an ETag; If-None-Match gets a 304 while nothing changed.
+    """
+    bounds = parse_bbox(bbox)
+    if format not in map_payload.FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(map_payload.FORMATS)}")
+    try:
+        # Read the cursor first: a change racing this query is re-sent, never lost
+        cursor = map_feed.latest_cursor(db)
+        etag = map_payload.etag_for(cursor, format, bounds, since, until, incident_type, county)
+        cached = map_payload.not_modified(request, etag)
+        if cached:
+            return cached
+        
+        def build_payload():
+            query = db.query(
+                IncidentReport.id,
+                IncidentReport.latitude,
+                IncidentReport.longitude,
+                IncidentReport.incident_type,
+                IncidentReport.county,
+                IncidentReport.specific_area,
+                IncidentReport.timeframe
+            ).filter(
+                IncidentReport.latitude.isnot(None),
+                IncidentReport.longitude.isnot(None),
+                IncidentReport.mapping_consent == True
+            )
             
-            timeout_msg = "Samahani, nimechelewa kupata jibu. Tafadhali jaribu tena." if language == "sw" else "Sorry, I'm taking too long to respond. Please try again."
-            return ChatResponse(sender="bot", text=timeout_msg)
+            if bounds:
+                # One (status, geo_cell range) branch per covering prefix range so each
+                # branch is an index range scan; lat/lng trims the cell edges
+                west, south, east, north = bounds
+                query = query.filter(
+                    or_(*[
+                        and_(IncidentReport.status == "verified", IncidentReport.geo_cell.between(low, high))
+                        for low, high in geohash_ranges(bounds)
+                    ]),
+                    IncidentReport.latitude.between(south, north),
+                    IncidentReport.longitude.between(west, east)
+                )
+            else:
+                query = query.filter(IncidentReport.status == "verified")
+            if since:
+                query = query.filter(IncidentReport.timestamp >= since)
+            if until:
+                query = query.filter(IncidentReport.timestamp <= until)
+            if incident_type and incident_type != "all":
+                query = query.filter(IncidentReport.incident_type == incident_type.lower())
+            if county and county != "all":
+                query = query.filter(func.lower(IncidentReport.county) == county.strip().lower())
             
-        except Exception as e:
-            logger.error(f"⚠️ Error on attempt {attempt + 1}: {str(e)[:200]}")
+            points = [
+                (incident_events.public_point_id(pid), float(lat), float(lng), itype, p_county, area, timeframe)
+                for pid, lat, lng, itype, p_county, area, timeframe in query.all()
+            ]
             
-            # Check if it's a quota error (429)
-            if "429" in str(e) or "quota" in str(e).lower():
-                logger.warning("💰 Quota exceeded, trying fallback model...")
-                
-                if attempt < max_retries - 1:
-                    if current_model_manager.fallback_to_next_model():
-                        chat_sessions[session_key] = current_model_manager.create_chat_session()
-                        current_chat_session = chat_sessions[session_key]
-                        continue
+            data = {"total": len(points), "cursor": cursor, "format": format}
+            if format == "columnar":
+                data.update(map_payload.columnar_payload(points))
+            else:
+                data["incidents"] = map_payload.rows_payload(points)
+            return map_payload.EncodedPayload({"success": True, "data": data})
+        
+        payload = await response_cache.get_or_compute("incidents", {
+            "cursor": cursor, "format": format, "bbox": bounds, "since": since,
+            "until": until, "type": incident_type, "county": county
+        }, build_payload)
+        return map_payload.json_response(request, payload, etag)
+    except Exception as e:
+        logger.error(f"Error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/incidents/changes")
+async def get_incident_changes(since: int = 0, limit: int = map_feed.MAX_CHANGES_PER_PAGE, db: Session = Depends(get_db)):
+    """
+    Map changes after cursor `since` (from /api/incidents or a previous call).
+
+    "visible" changes carry the point, "hidden" changes only its id. Follow
+    has_more with the returned cursor; reset means reload /api/incidents.
+    """
+    try:
+        return {"success": True, "data": map_feed.changes_since(db, since, limit)}
+    except Exception as e:
+        logger.error(f"Error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/incidents/stream")
+async def stream_incident_changes(
+    request: Request,
+    since: Optional[int] = None,
+    bbox: Optional[str] = None,
+    after: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    incident_type: Optional[str] = Query(None, alias="type"),
+    county: Optional[str] = None
+):
+    """
+    Server-sent events with the same changes as /api/incidents/changes.
+
+    `since` is the change cursor. bbox, after/until (report time), type and
+    county are the /api/incidents filters (its since is `after` here): only
+    "visible" points inside them are sent. Resumes from Last-Event-ID (set
+    automatically by EventSource on reconnect).
+    """
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id and last_event_id.isdigit():
+        since = int(last_event_id)
+    keep = map_feed.point_filter(parse_bbox(bbox), after, until, incident_type, county)
+    
+    async def event_stream():
+        cursor = since
+        while not await request.is_disconnected():
+            seen_version = map_feed.current_version()
+            db = SessionLocal()
+            try:
+                if cursor is None:
+                    cursor = map_feed.latest_cursor(db)
+                    feed = {"cursor": cursor, "changes": [], "has_more": False, "reset": False}
+                else:
+                    feed = map_feed.changes_since(db, cursor, keep=keep)
+            finally:
+                db.close()
             
-            # If last attempt, return safe fallback
-            if attempt == max_retries - 1:
-                fallback_text = "Nina shida kuungana na akili yangu sasa hivi, lakini nasikiliza. Tafadhali piga 1195 ikiwa hii ni dharura." if language == "sw" else "I am having trouble connecting to my brain right now, but I am listening. Please call 1195 if this is an emergency."
-                return ChatResponse(
-                    sender="bot", 
-                    text=fallback_text, 
-                    metadata={
-                        "error": str(e)[:100], 
-                        "all_models_failed": True,
-                        "language": language
-                    }
-                )
+            if feed["reset"]:
+                yield f"id: {feed['cursor']}\nevent: reset\ndata: {json.dumps({'cursor': feed['cursor']})}\n\n"
+            for change in feed["changes"]:
+                yield f"id: {change['seq']}\nevent: {change['event']}\ndata: {json.dumps(change)}\n\n"
+            cursor = feed["cursor"]
+            
+            if feed["has_more"]:
+                continue
+            if not await map_feed.wait_for_change(seen_version, map_feed.STREAM_HEARTBEAT_SECONDS):
+                yield ": keepalive\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
-@app.get("/api/incidents")
-async def get_incidents(db: Session = Depends(get_db)):
-    """Get verified incidents for mapping"""
+@app.get("/api/incidents/clusters")
+async def get_incident_clusters(bbox: Optional[str] = None, zoom: int = 6):
+    """Pre-aggregated map clusters for the visible bbox ("west,south,east,north") and zoom"""
+    bounds = parse_bbox(bbox) or KENYA_BBOX
     try:
-        points = db.query(IncidentReport).filter(
-            IncidentReport.latitude.isnot(None),
-            IncidentReport.longitude.isnot(None),
-            IncidentReport.status == "verified",
-            IncidentReport.mapping_consent == True
-        ).all()
-        
-        incidents = [
-            {
-                "lat": float(p.latitude),
-                "lng": float(p.longitude),
-                "type": p.incident_type,
-                "county": p.county,
-                "area": p.specific_area,
-                "timeframe": p.timeframe,
-            }
-            for p in points
-        ]
-        
-        return {"success": True, "data": {"incidents": incidents, "total": len(incidents)}}
+        map_feed.catch_up()
+        return {"success": True, "data": cluster_index.query(bounds, zoom)}
+    except Exception as e:
+        logger.error(f"Error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/heatmap/meta")
+async def get_heatmap_meta():
+    """Grid bounds, shapes and available layers for the heatmap tiles"""
+    return {"success": True, "data": heatmap_store.metadata()}
+
+@app.get("/api/heatmap")
+async def get_heatmap(
+    resolution: str = "medium",
+    incident_type: str = Query(ALL_TYPES, alias="type"),
+    window: str = "all",
+    format: str = "png"
+):
+    """Precomputed density layer (log-scaled, 255 = busiest cell) for the public map"""
+    if resolution not in RESOLUTIONS or window not in WINDOWS or format not in FORMATS:
+        raise HTTPException(status_code=400, detail="Invalid resolution, window or format")
+    if incident_type != ALL_TYPES and incident_type not in INCIDENT_TYPES:
+        raise HTTPException(status_code=400, detail="Invalid incident type")
+    
+    try:
+        map_feed.catch_up()
+        body, max_count = heatmap_store.tile(resolution, incident_type, window, format)
+        return Response(
+            content=body,
+            media_type="image/png" if format == "png" else "application/octet-stream",
+            headers={"X-Heatmap-Max-Count": str(max_count), "Cache-Control": "public, max-age=60"}
+        )
     except Exception as e:
         logger.error(f"Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/live")
+async def liveness():
+    """The process is up and the event loop is serving"""
+    return {"status": "alive"}
+
+@app.get("/ready")
+async def readiness_check():
+    """200 once the database and models are warm, 503 (with per-component status) until then"""
+    status = readiness.stats()
+    if not status["ready"]:
+        return JSONResponse(status_code=503, content=status, headers={"Retry-After": str(RETRY_AFTER_SECONDS)})
+    return status
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus text format: request, stage, tool and TTFT histograms (see metrics.py)"""
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
 @app.get("/health")
 async def health_check():
-    """Health check endpoint with model status"""
-    active_sessions_info = {}
-    for session_key, model_mgr in session_model_managers.items():
-        active_sessions_info[session_key] = {
-            "language": model_mgr.language,
-            "model": model_mgr.current_model_name
-        }
-    
+    """Health check endpoint with model status (O(1) in the number of sessions)"""
     return {
         "status": "healthy",
-        "default_model": model_manager.current_model_name,
-        "fallback_models": model_manager.model_priorities,
-        "sessions_active": len(chat_sessions),
-        "active_sessions": active_sessions_info
+        "llm_backend": model_registry.client.name if model_registry.client else LLM_BACKEND,
+        "default_model": model_registry.best_model(),
+        "fallback_models": model_registry.priorities,
+        "models": model_registry.status(),
+        "sessions_active": len(session_store),
+        "sessions": session_store.stats(),
+        "chat_ttft_ms": ttft_stats(),
+        "llm_pool": llm_pool.stats(),
+        "intent_router": intent_router.stats(),
+        "resources": resource_directory.stats(),
+        "startup": readiness.stats()
     }
 
 # ... rest of your admin endpoints remain the same ...
@@ -684,71 +1177,100 @@ async def get_all_reports(
         logger.error(f"Error fetching all reports: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/admin/analytics/geographic")
-async def get_geographic_analytics(
+@app.get("/admin/reports/search")
+async def search_reports(
+    q: str,
+    page: int = 1,
+    limit: int = 20,
     db: Session = Depends(get_db),
     authenticated: bool = Depends(verify_admin_token)
 ):
-    """Get geographic distribution of reports"""
+    """Keyword search over encrypted narratives via the blind token index"""
     try:
-        # Reports by county with coordinates
-        from sqlalchemy import func
-        
-        county_data = db.query(
-            IncidentReport.county,
-            func.count(IncidentReport.id).label('count'),
-            func.avg(IncidentReport.latitude).label('avg_lat'),
-            func.avg(IncidentReport.longitude).label('avg_lng')
-        ).filter(
-            IncidentReport.latitude.isnot(None),
-            IncidentReport.longitude.isnot(None),
-            IncidentReport.status == "verified"
-        ).group_by(IncidentReport.county).all()
-        
-        # Hotspot analysis - areas with most reports
-        hotspot_areas = db.query(
-            IncidentReport.specific_area,
-            IncidentReport.county,
-            func.count(IncidentReport.id).label('count'),
-            func.avg(IncidentReport.latitude).label('avg_lat'),
-            func.avg(IncidentReport.longitude).label('avg_lng')
-        ).filter(
-            IncidentReport.latitude.isnot(None),
-            IncidentReport.longitude.isnot(None),
-            IncidentReport.specific_area.isnot(None),
-            IncidentReport.status == "verified"
-        ).group_by(IncidentReport.specific_area, IncidentReport.county).order_by(
-            func.count(IncidentReport.id).desc()
-        ).limit(10).all()
-        
-        geographic_data = []
-        for county, count, avg_lat, avg_lng in county_data:
-            if avg_lat and avg_lng:
-                geographic_data.append({
-                    "county": county,
-                    "count": count,
-                    "latitude": float(avg_lat),
-                    "longitude": float(avg_lng)
-                })
-        
-        hotspot_data = []
-        for area, county, count, avg_lat, avg_lng in hotspot_areas:
-            if avg_lat and avg_lng:
-                hotspot_data.append({
-                    "area": area,
-                    "county": county,
-                    "count": count,
-                    "latitude": float(avg_lat),
-                    "longitude": float(avg_lng)
+        report_ids = search_report_ids(db, q, limit=limit, offset=(page - 1) * limit)
+
+        reports = []
+        if report_ids:
+            reports = db.query(IncidentReport).filter(
+                IncidentReport.id.in_(report_ids)
+            ).order_by(IncidentReport.id.desc()).all()
+
+        # Only the matching page is decrypted
+        formatted_reports = []
+        for report in reports:
+            try:
+                decrypted_description = decrypt_text(report.incident_description_encrypted)
+
+                formatted_reports.append({
+                    "id": report.id,
+                    "county": report.county,
+                    "specific_area": report.specific_area,
+                    "type": report.incident_type,
+                    "story": decrypted_description,
+                    "timestamp": report.timestamp.isoformat(),
+                    "status": report.status
                 })
-        
+            except Exception as e:
+                logger.error(f"Error processing report {report.id}: {e}")
+                continue
+
         return {
             "success": True,
             "data": {
-                "county_distribution": geographic_data,
-                "hotspots": hotspot_data
+                "reports": formatted_reports,
+                "pagination": {"page": page, "limit": limit}
             }
         }
+
+    except Exception as e:
+        logger.error(f"Error searching reports: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/admin/analytics/geographic")
+async def get_geographic_analytics(
+    db: Session = Depends(get_db),
+    authenticated: bool = Depends(verify_admin_token)
+):
+    """Get geographic distribution of reports"""
+    try:
+        def compute():
+            # Reports by county with coordinates
+            from sqlalchemy import func
+            
+            county_data = db.query(
+                IncidentReport.county,
+                func.count(IncidentReport.id).label('count'),
+                func.avg(IncidentReport.latitude).label('avg_lat'),
+                func.avg(IncidentReport.longitude).label('avg_lng')
+            ).filter(
+                IncidentReport.latitude.isnot(None),
+                IncidentReport.longitude.isnot(None),
+                IncidentReport.status == "verified"
+            ).group_by(IncidentReport.county).all()
+            
+            # Hotspot analysis - density clusters over verified coordinates
+            hotspot_data = hotspot_engine.hotspots()[:10]
+            
+            geographic_data = []
+            for county, count, avg_lat, avg_lng in county_data:
+                if avg_lat and avg_lng:
+                    geographic_data.append({
+                        "county": county,
+                        "count": count,
+                        "latitude": float(avg_lat),
+                        "longitude": float(avg_lng)
+                    })
+            
+            return {
+                "success": True,
+                "data": {
+                    "county_distribution": geographic_data,
+                    "hotspots": hotspot_data
+                }
+            }
+        
+        map_feed.catch_up()
+        return await response_cache.get_or_compute("analytics_geographic", {}, compute)
         
     except Exception as e:
         logger.error(f"Error fetching geographic analytics: {e}")
@@ -761,49 +1283,53 @@ async def get_temporal_analytics(
 ):
     """Get temporal analysis of reports"""
     try:
-        from sqlalchemy import func, extract
-        
-        # Daily pattern (hour of day)
-        hourly_pattern = db.query(
-            extract('hour', IncidentReport.timestamp).label('hour'),
-            func.count(IncidentReport.id).label('count')
-        ).group_by('hour').order_by('hour').all()
-        
-        # Weekly pattern (day of week)
-        daily_pattern = db.query(
-            extract('dow', IncidentReport.timestamp).label('day_of_week'),
-            func.count(IncidentReport.id).label('count')
-        ).group_by('day_of_week').order_by('day_of_week').all()
-        
-        # Monthly trend (last 12 months)
-        one_year_ago = datetime.utcnow() - timedelta(days=365)
-        monthly_trend = db.query(
-            func.date_trunc('month', IncidentReport.timestamp).label('month'),
-            func.count(IncidentReport.id).label('count')
-        ).filter(
-            IncidentReport.timestamp >= one_year_ago
-        ).group_by('month').order_by('month').all()
-        
-        # Timeframe analysis
-        timeframe_analysis = db.query(
-            IncidentReport.timeframe,
-            func.count(IncidentReport.id).label('count')
-        ).filter(
-            IncidentReport.timeframe.isnot(None)
-        ).group_by(IncidentReport.timeframe).all()
-        
-        return {
-            "success": True,
-            "data": {
-                "hourly_pattern": [{"hour": int(item[0]), "count": item[1]} for item in hourly_pattern],
-                "daily_pattern": [{"day_of_week": int(item[0]), "count": item[1]} for item in daily_pattern],
-                "monthly_trend": [
-                    {"month": item[0].strftime("%Y-%m"), "count": item[1]} 
-                    for item in monthly_trend
-                ],
-                "timeframe_analysis": {item[0]: item[1] for item in timeframe_analysis}
+        def compute():
+            from sqlalchemy import func, extract
+            
+            # Daily pattern (hour of day)
+            hourly_pattern = db.query(
+                extract('hour', IncidentReport.timestamp).label('hour'),
+                func.count(IncidentReport.id).label('count')
+            ).group_by('hour').order_by('hour').all()
+            
+            # Weekly pattern (day of week)
+            daily_pattern = db.query(
+                extract('dow', IncidentReport.timestamp).label('day_of_week'),
+                func.count(IncidentReport.id).label('count')
+            ).group_by('day_of_week').order_by('day_of_week').all()
+            
+            # Monthly trend (last 12 months)
+            one_year_ago = datetime.utcnow() - timedelta(days=365)
+            monthly_trend = db.query(
+                func.date_trunc('month', IncidentReport.timestamp).label('month'),
+                func.count(IncidentReport.id).label('count')
+            ).filter(
+                IncidentReport.timestamp >= one_year_ago
+            ).group_by('month').order_by('month').all()
+            
+            # Timeframe analysis
+            timeframe_analysis = db.query(
+                IncidentReport.timeframe,
+                func.count(IncidentReport.id).label('count')
+            ).filter(
+                IncidentReport.timeframe.isnot(None)
+            ).group_by(IncidentReport.timeframe).all()
+            
+            return {
+                "success": True,
+                "data": {
+                    "hourly_pattern": [{"hour": int(item[0]), "count": item[1]} for item in hourly_pattern],
+                    "daily_pattern": [{"day_of_week": int(item[0]), "count": item[1]} for item in daily_pattern],
+                    "monthly_trend": [
+                        {"month": item[0].strftime("%Y-%m"), "count": item[1]} 
+                        for item in monthly_trend
+                    ],
+                    "timeframe_analysis": {item[0]: item[1] for item in timeframe_analysis}
+                }
             }
-        }
+        
+        map_feed.catch_up()
+        return await response_cache.get_or_compute("analytics_temporal", {}, compute)
         
     except Exception as e:
         logger.error(f"Error fetching temporal analytics: {e}")
@@ -937,11 +1463,16 @@ async def verify_report(
             raise HTTPException(status_code=404, detail="Report not found")
         
         # Update status
+        was_mappable = incident_events.is_mappable(report)
         new_status = "verified" if request.action == "approve" else "rejected"
         report.status = new_status
+        map_feed.record_change(db, was_mappable, report)
         
         db.commit()
         
+        incident_events.publish_transition(was_mappable, report)
+        response_cache.bump()
+        
         logger.info(f"✅ Report {report_id} {new_status} by admin")
         
         return {
@@ -963,40 +1494,86 @@ async def get_admin_stats(
 ):
     """Get statistics for admin dashboard"""
     try:
-        total_reports = db.query(IncidentReport).count()
-        unverified = db.query(IncidentReport).filter(IncidentReport.status == "unverified").count()
-        verified = db.query(IncidentReport).filter(IncidentReport.status == "verified").count()
-        rejected = db.query(IncidentReport).filter(IncidentReport.status == "rejected").count()
-        
-        # Get reports by type
-        from sqlalchemy import func
-        by_type = db.query(
-            IncidentReport.incident_type,
-            func.count(IncidentReport.id).label('count')
-        ).group_by(IncidentReport.incident_type).all()
-        
-        # Get reports by county
-        by_county = db.query(
-            IncidentReport.county,
-            func.count(IncidentReport.id).label('count')
-        ).group_by(IncidentReport.county).all()
-        
-        return {
-            "success": True,
-            "data": {
-                "total": total_reports,
-                "unverified": unverified,
-                "verified": verified,
-                "rejected": rejected,
-                "by_type": {item[0]: item[1] for item in by_type},
-                "by_county": {item[0]: item[1] for item in by_county}
+        def compute():
+            total_reports = db.query(IncidentReport).count()
+            unverified = db.query(IncidentReport).filter(IncidentReport.status == "unverified").count()
+            verified = db.query(IncidentReport).filter(IncidentReport.status == "verified").count()
+            rejected = db.query(IncidentReport).filter(IncidentReport.status == "rejected").count()
+            
+            # Get reports by type
+            from sqlalchemy import func
+            by_type = db.query(
+                IncidentReport.incident_type,
+                func.count(IncidentReport.id).label('count')
+            ).group_by(IncidentReport.incident_type).all()
+            
+            # Get reports by county
+            by_county = db.query(
+                IncidentReport.county,
+                func.count(IncidentReport.id).label('count')
+            ).group_by(IncidentReport.county).all()
+            
+            return {
+                "success": True,
+                "data": {
+                    "total": total_reports,
+                    "unverified": unverified,
+                    "verified": verified,
+                    "rejected": rejected,
+                    "by_type": {item[0]: item[1] for item in by_type},
+                    "by_county": {item[0]: item[1] for item in by_county}
+                }
             }
-        }
+        
+        map_feed.catch_up()
+        return await response_cache.get_or_compute("admin_stats", {}, compute)
         
     except Exception as e:
         logger.error(f"Error fetching admin stats: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/admin/cache/stats")
+async def get_cache_stats(authenticated: bool = Depends(verify_admin_token)):
+    """Response cache hit rates per endpoint"""
+    return {"success": True, "data": response_cache.stats()}
+
+@app.post("/admin/resources/reload")
+async def reload_resources(authenticated: bool = Depends(verify_admin_token)):
+    """Re-read the resource directory now instead of waiting for the watcher"""
+    reloaded = await asyncio.to_thread(resource_directory.reload, True)
+    stats = resource_directory.stats()
+    if not reloaded:
+        raise HTTPException(status_code=422, detail=f"Resource file rejected: {stats['last_error']}")
+    return {"success": True, "data": stats}
+
+@app.post("/admin/profile")
+async def profile_worker(
+    seconds: float = 10,
+    hz: int = 100,
+    include_idle: bool = False,
+    authenticated: bool = Depends(verify_admin_token)
+):
+    """Sample this worker's Python stacks for a few seconds; collapsed stacks for a flamegraph (code names only)"""
+    if not 0 < seconds <= PROFILE_MAX_SECONDS or not 0 < hz <= PROFILE_MAX_HZ:
+        raise HTTPException(status_code=400, detail=f"seconds must be in (0, {PROFILE_MAX_SECONDS}], hz in (0, {PROFILE_MAX_HZ}]")
+    
+    try:
+        collapsed, stats = await asyncio.to_thread(profiler.profile, seconds, hz, include_idle)
+    except ProfilerBusy:
+        raise HTTPException(status_code=409, detail="A profile is already running on this worker")
+    
+    filename = f"vee-{os.getpid()}-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.collapsed"
+    return Response(
+        content=collapsed,
+        media_type="text/plain",
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}",
+            "X-Profile-Samples": str(stats["samples"]),
+            "X-Profile-Hz": str(stats["effective_hz"]),
+            "X-Profile-Overhead": str(stats["overhead"])
+        }
+    )
+
 @app.get("/admin/reports/export")
 async def export_reports_csv(
     db: Session = Depends(get_db),
@@ -1061,5 +1638,5 @@ async def export_reports_csv(
 
 if __name__ == "__main__":
     import uvicorn
-    logger.info(f"🚀 Starting Vee with {model_manager.current_model_name}")
+    logger.info(f"🚀 Starting Vee with {model_registry.best_model()}")
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark: grid DBSCAN hotspot engine
+
+Usage:
+    python backend/benchmarks/bench_hotspots.py [num_points]
+
+Uses synthetic points only, never the real database.
+"""
+
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+# Add backend to path
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+import incident_events
+from incident_events import MapPoint
+from hotspots import HotspotEngine
+
+DASHBOARD_BUDGET_MS = 250
+
+# (lat, lng, spread in degrees) for a few urban centres
+CENTRES = [
+    (-1.286, 36.817, 0.05),   # Nairobi
+    (-4.043, 39.668, 0.03),   # Mombasa
+    (-0.091, 34.768, 0.02),   # Kisumu
+    (-0.303, 36.080, 0.02),   # Nakuru
+    (0.514, 35.270, 0.02),    # Eldoret
+]
+
+
+def make_points(num_points: int, rng: np.random.Generator):
+    clustered = int(num_points * 0.8)
+    per_centre = clustered // len(CENTRES)
+    lats, lngs = [], []
+    for lat, lng, spread in CENTRES:
+        lats.append(rng.normal(lat, spread, per_centre))
+        lngs.append(rng.normal(lng, spread, per_centre))
+    noise = num_points - per_centre * len(CENTRES)
+    lats.append(rng.uniform(-4.5, 4.5, noise))
+    lngs.append(rng.uniform(34.0, 41.5, noise))
+    return np.concatenate(lats), np.concatenate(lngs)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    num_points = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = np.random.default_rng(42)
+    lats, lngs = make_points(num_points, rng)
+
+    engine = HotspotEngine()
+    engine._loaded = True   # skip the database load; points are fed directly
+
+    print(f"📦 Loading {num_points} points...")
+    _, load_ms = timed(lambda: engine.load_points(list(range(num_points)), lats, lngs))
+    print(f"   ✓ Bulk load: {load_ms:.0f} ms")
+
+    hotspots, cold_ms = timed(engine.hotspots)
+    _, cached_ms = timed(engine.hotspots)
+
+    point = MapPoint(num_points, -1.29, 36.82, "other", "Nairobi", None, None, datetime.utcnow())
+    _, event_ms = timed(lambda: engine.on_event(incident_events.VISIBLE, point))
+    _, refresh_ms = timed(engine.hotspots)
+
+    print("\n🔥 Hotspot latency (ms)")
+    print(f"{'cold compute':<24}{cold_ms:>10.2f}")
+    print(f"{'cached':<24}{cached_ms:>10.3f}")
+    print(f"{'single event update':<24}{event_ms:>10.3f}")
+    print(f"{'recompute after event':<24}{refresh_ms:>10.2f}")
+
+    print(f"\n📍 Top hotspots ({len(hotspots)} found)")
+    for spot in hotspots[:5]:
+        print(f"   {spot['latitude']:>9.4f}, {spot['longitude']:>8.4f}  "
+              f"r={spot['radius_km']:>6.2f} km  count={spot['count']}")
+
+    worst = max(cold_ms, refresh_ms)
+    status = "✅" if worst <= DASHBOARD_BUDGET_MS else "❌"
+    print(f"\n{status} Worst case {worst:.0f} ms (budget {DASHBOARD_BUDGET_MS} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark: /api/incidents payload formats
+
+Usage:
+    python backend/benchmarks/bench_map_payload.py [num_points]
+
+Compares the previous response (row dicts through FastAPI's default encoder)
+with orjson rows and the columnar format, raw and gzip-compressed.
+Uses synthetic points only, never the real database.
+"""
+
+import gzip
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+from fastapi.encoders import jsonable_encoder
+
+# Add backend to path
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+import orjson
+
+from map_payload import rows_payload, columnar_payload, GZIP_LEVEL
+
+TYPES = ["harassment", "assault", "femicide", "public_violence", "domestic_violence",
+         "workplace_harassment", "online_harassment", "other"]
+COUNTIES = ["Nairobi", "Mombasa", "Kisumu", "Nakuru", "Uasin Gishu", "Kiambu", "Machakos", "Kakamega"]
+AREAS = ["CBD", "Westlands", "Kibera", "Eastleigh", "Kilimani", "Nyali", "Kondele", "Langas", None]
+TIMEFRAMES = ["today", "yesterday", "this week", "last month", None]
+
+
+def make_points(num_points: int, rng: random.Random):
+    return [
+        (
+            f"{rng.getrandbits(64):016x}",
+            rng.uniform(-4.5, 4.5),
+            rng.uniform(34.0, 41.5),
+            rng.choice(TYPES),
+            rng.choice(COUNTIES),
+            rng.choice(AREAS),
+            rng.choice(TIMEFRAMES),
+        )
+        for _ in range(num_points)
+    ]
+
+
+def best_of(fn, runs: int = 5):
+    best = float("inf")
+    body = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        body = fn()
+        best = min(best, time.perf_counter() - start)
+    return body, best * 1000
+
+
+def main():
+    num_points = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    points = make_points(num_points, random.Random(42))
+
+    def legacy():
+        data = {"incidents": rows_payload(points), "total": len(points)}
+        return json.dumps(jsonable_encoder({"success": True, "data": data})).encode()
+
+    def orjson_rows():
+        return orjson.dumps({"success": True, "data": {"incidents": rows_payload(points), "total": len(points)}})
+
+    def orjson_columnar():
+        return orjson.dumps({"success": True, "data": {**columnar_payload(points), "total": len(points)}})
+
+    print(f"📦 {num_points} points\n")
+    print(f"{'format':<22}{'encode ms':>11}{'raw KB':>10}{'gzip KB':>10}{'gzip ms':>10}")
+    for name, fn in [("rows + default JSON", legacy), ("rows + orjson", orjson_rows), ("columnar + orjson", orjson_columnar)]:
+        body, encode_ms = best_of(fn)
+        compressed, gzip_ms = best_of(lambda: gzip.compress(body, compresslevel=GZIP_LEVEL), runs=3)
+        print(f"{name:<22}{encode_ms:>11.1f}{len(body) / 1024:>10.1f}{len(compressed) / 1024:>10.1f}{gzip_ms:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Benchmark: resource directory hot reload
+
+Usage:
+    python backend/benchmarks/bench_resource_reload.py [num_resources] [--readers 1] [--swaps 20]
+
+Writes a synthetic directory (num_resources services around a few towns) to a
+temp file and measures:
+  - reload time: JSON load + validation + index build + answer rendering
+  - lookup latency (nearest + county search + rendered answer) with no reload running, and
+    while the file is rewritten and swapped in back to back
+  - consistency: every service in a snapshot carries that snapshot's
+    version in its name, so a lookup that mixed two snapshots is counted
+
+One reader thread stands in for a worker's event loop. The reload thread
+shares the GIL with it, so the lookup tail during swaps is bounded by the
+interpreter's switch interval rather than by the reload time; the run fails
+if it exceeds two switch intervals or if any lookup saw a mixed snapshot.
+
+Uses synthetic data only, never the real resources.json.
+"""
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add backend to path
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from geo_utils import KENYA_BBOX, KENYA_COUNTY_CENTERS
+from resources_data import SERVICE_TYPES, FALLBACK_HOTLINES
+from resource_registry import ResourceDirectory
+
+TAIL_BUDGET_US = 2 * sys.getswitchinterval() * 1e6
+
+
+def write_directory(path: Path, num_resources: int, version: int, rng: random.Random):
+    counties = list(KENYA_COUNTY_CENTERS.items())
+    west, south, east, north = KENYA_BBOX
+    resources = []
+    for i in range(num_resources):
+        county, (lat, lng) = counties[i % len(counties)]
+        resources.append({
+            "name": f"v{version} service {i}", "phone": f"07{rng.randint(10000000, 99999999)}", "county": county,
+            "service": SERVICE_TYPES[i % len(SERVICE_TYPES)], "lat": round(min(north, max(south, lat + rng.gauss(0, 0.2))), 5),
+            "lng": round(min(east, max(west, lng + rng.gauss(0, 0.2))), 5), "languages": ["en", "sw"],
+        })
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"version": f"v{version}", "resources": resources,
+                               "national_hotlines": FALLBACK_HOTLINES}))
+    tmp.replace(path)
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+def lookup_loop(directory: ResourceDirectory, stop: threading.Event, samples: list, mixed: list, seed: int):
+    rng = random.Random(seed)
+    counties = list(KENYA_COUNTY_CENTERS)
+    while not stop.is_set():
+        lat, lng = rng.uniform(-4.5, 4.5), rng.uniform(34.0, 41.5)
+        started = time.perf_counter()
+        snapshot = directory.current()
+        hits = snapshot.nearest(lat, lng, k=5)
+        county = rng.choice(counties)
+        groups = snapshot.search(county)
+        snapshot.answer(county, None, "sw")
+        samples.append((time.perf_counter() - started) * 1e6)
+        names = [r.name for r, _ in hits] + [r["name"] for g in groups[:-1] for r in g["resources"]]
+        if any(not name.startswith(snapshot.version + " ") for name in names):
+            mixed.append(snapshot.version)
+
+
+def run_readers(directory, readers: int, seconds: float = None, during=None):
+    stop = threading.Event()
+    samples, mixed = [], []
+    threads = [threading.Thread(target=lookup_loop, args=(directory, stop, samples, mixed, i)) for i in range(readers)]
+    for thread in threads:
+        thread.start()
+    try:
+        if during is not None:
+            during()
+        else:
+            time.sleep(seconds)
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+    return samples, mixed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("num_resources", nargs="?", type=int, default=5000)
+    parser.add_argument("--readers", type=int, default=1)
+    parser.add_argument("--swaps", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    path = Path(tempfile.mkdtemp(prefix="vee-resources-")) / "resources.json"
+    write_directory(path, args.num_resources, 0, rng)
+    directory = ResourceDirectory(path, poll_seconds=3600)
+    assert directory.reload(force=True)
+    print(f"📚 {args.num_resources} services, {args.readers} reader threads, {args.swaps} swaps\n")
+
+    idle, mixed_idle = run_readers(directory, args.readers, seconds=2.0)
+
+    build_ms = []
+
+    def swap_repeatedly():
+        for version in range(1, args.swaps + 1):
+            write_directory(path, args.num_resources, version, rng)
+            started = time.perf_counter()
+            assert directory.reload(force=True)
+            build_ms.append((time.perf_counter() - started) * 1000)
+
+    swapping, mixed_swap = run_readers(directory, args.readers, during=swap_repeatedly)
+
+    print(f"🔄 Reload (load + validate + index + render): p50 {percentile(build_ms, 0.5):.1f} ms, "
+          f"max {max(build_ms):.1f} ms")
+    print(f"\n⏱️  Lookup latency (nearest k=5 + county search + answer, µs)")
+    print(f"{'phase':<16}{'p50':>10}{'p99':>10}{'max':>12}{'lookups':>10}")
+    for phase, samples in (("idle", idle), ("during swaps", swapping)):
+        print(f"{phase:<16}{percentile(samples, 0.5):>10.1f}{percentile(samples, 0.99):>10.1f}"
+              f"{max(samples):>12.1f}{len(samples):>10}")
+
+    mixed = len(mixed_idle) + len(mixed_swap)
+    print(f"\n{'✅' if not mixed else '❌'} {mixed} lookups saw a mixed snapshot; "
+          f"final version {directory.current().version}")
+    p99 = percentile(swapping, 0.99)
+    print(f"{'✅' if p99 <= TAIL_BUDGET_US else '❌'} p99 during swaps {p99:.0f} µs (budget {TAIL_BUDGET_US:.0f} µs)")
+    sys.exit(1 if mixed or p99 > TAIL_BUDGET_US else 0)
+
+
+if __name__ == "__main__":
+    main()
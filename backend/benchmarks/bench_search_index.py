@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark: blind-index keyword search vs decrypt-and-scan
+
+Usage:
+    python backend/benchmarks/bench_search_index.py [num_reports]
+
+Runs against a throwaway in-memory SQLite database, never the real one.
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add backend to path
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import Base
+from models import IncidentReport
+from crypto_utils import encrypt_text, decrypt_text
+from search_index import index_report, search_report_ids, normalize_tokens
+
+VOCAB = (
+    "he hit me with a panga near the school on my way home the boda rider "
+    "followed me my husband beat me last night at the market neighbour shouted "
+    "alinipiga nyumbani mume wangu shuleni sokoni usiku jana police refused help "
+    "church matatu stage farm river office phone threatened money children"
+).split()
+
+QUERIES = ["panga", "school", "boda", "panga school", "mume wangu", "matatu threatened"]
+
+
+def make_narrative(rng: random.Random) -> str:
+    return " ".join(rng.choice(VOCAB) for _ in range(rng.randint(15, 60)))
+
+
+def main():
+    num_reports = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    rng = random.Random(42)
+
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    print(f"📦 Seeding {num_reports} encrypted reports...")
+    start = time.perf_counter()
+    for i in range(num_reports):
+        narrative = make_narrative(rng)
+        report = IncidentReport(
+            report_id_hash=f"bench-{i}",
+            incident_description_encrypted=encrypt_text(narrative),
+            county="Nairobi",
+            incident_type="physical_violence",
+        )
+        db.add(report)
+        db.flush()
+        index_report(db, report.id, narrative)
+    db.commit()
+    print(f"   ✓ Seeded in {time.perf_counter() - start:.2f}s")
+
+    print("\n🔍 Query latency (ms)")
+    print(f"{'query':<22}{'blind index':>14}{'decrypt+scan':>16}{'matches':>10}")
+    for query in QUERIES:
+        # Blind index lookup
+        start = time.perf_counter()
+        ids = search_report_ids(db, query, limit=num_reports)
+        indexed_ms = (time.perf_counter() - start) * 1000
+
+        # Baseline: decrypt the whole corpus and scan
+        terms = set(normalize_tokens(query))
+        start = time.perf_counter()
+        scan_matches = 0
+        for (encrypted,) in db.query(IncidentReport.incident_description_encrypted).all():
+            if terms.issubset(normalize_tokens(decrypt_text(encrypted))):
+                scan_matches += 1
+        scan_ms = (time.perf_counter() - start) * 1000
+
+        assert scan_matches == len(ids), f"mismatch for {query!r}: {scan_matches} vs {len(ids)}"
+        print(f"{query:<22}{indexed_ms:>14.2f}{scan_ms:>16.2f}{len(ids):>10}")
+
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cold start
+
+Usage:
+    python backend/benchmarks/bench_startup.py [--runs 3] [--budget-ms 1200] [--own-budget-ms 200] [--ready-budget-ms 4000]
+
+Imports app.py in fresh interpreters under `python -X importtime` (fake LLM
+backend, empty temp working directory so a new SQLite file is created) and
+reports:
+  - total import time of app, and its slowest top-level imports
+  - the self time of the backend's own modules: work done at import rather
+    than in the startup warmup (readiness.py)
+  - time from process start to /ready on a real uvicorn server (skip with
+    --no-server)
+
+Each figure is the best of --runs, which filters out a noisy machine. Exits
+1 if any budget is exceeded, so a change that sneaks file parsing, network
+calls or a heavy dependency back into import time fails the check.
+"""
+
+import argparse
+import os
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+OWN_MODULES = {path.stem for path in BACKEND_DIR.glob("*.py")}
+LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)$")
+
+
+def fake_env() -> dict:
+    return dict(os.environ, VEE_LLM_BACKEND="fake", ENVIRONMENT="development", PYTHONPATH=str(BACKEND_DIR))
+
+
+def import_profile(workdir: str):
+    """{module: (self_us, cumulative_us, depth)} for one `import app` in a fresh interpreter"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=workdir, env=fake_env(), capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import app failed:\n{result.stderr[-2000:]}")
+    modules = {}
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.setdefault(name, (int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return modules
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def time_to_ready(workdir: str, timeout: float = 60.0):
+    """(ms to /live, ms to /ready) for a uvicorn worker started from scratch"""
+    port = free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--app-dir", str(BACKEND_DIR),
+         "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=fake_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    live_ms = None
+    try:
+        while time.perf_counter() - started < timeout:
+            if process.poll() is not None:
+                raise RuntimeError("server exited during startup")
+            try:
+                if live_ms is None and httpx.get(f"http://127.0.0.1:{port}/live", timeout=1).status_code == 200:
+                    live_ms = (time.perf_counter() - started) * 1000
+                if live_ms is not None and httpx.get(f"http://127.0.0.1:{port}/ready", timeout=1).status_code == 200:
+                    return live_ms, (time.perf_counter() - started) * 1000
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.02)
+        raise RuntimeError(f"server not ready within {timeout:.0f}s")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=12)
+    parser.add_argument("--budget-ms", type=float, default=1200, help="import app, cumulative")
+    parser.add_argument("--own-budget-ms", type=float, default=200, help="self time of backend modules")
+    parser.add_argument("--ready-budget-ms", type=float, default=4000, help="process start to /ready")
+    parser.add_argument("--no-server", action="store_true")
+    args = parser.parse_args()
+
+    best = defaultdict(lambda: (float("inf"), float("inf"), 0))
+    totals, own_totals, live, ready = [], [], [], []
+    for _ in range(args.runs):
+        with tempfile.TemporaryDirectory(prefix="vee-startup-") as workdir:
+            modules = import_profile(workdir)
+            for name, (self_us, cumulative_us, depth) in modules.items():
+                previous = best[name]
+                best[name] = (min(previous[0], self_us), min(previous[1], cumulative_us), depth)
+            totals.append(modules["app"][1] / 1000)
+            own_totals.append(sum(s for name, (s, _, _) in modules.items() if name in OWN_MODULES) / 1000)
+        if not args.no_server:
+            with tempfile.TemporaryDirectory(prefix="vee-startup-") as workdir:
+                live_ms, ready_ms = time_to_ready(workdir)
+                live.append(live_ms)
+                ready.append(ready_ms)
+
+    total, own = min(totals), min(own_totals)
+    print(f"🧊 import app: {total:.0f} ms (best of {args.runs}, -X importtime)\n")
+    print(f"{'slowest imports from app':<36}{'cumulative ms':>14}")
+    top_level = sorted(((cum, name) for name, (_, cum, depth) in best.items() if depth == 1), reverse=True)
+    for cumulative_us, name in top_level[:args.top]:
+        print(f"   {name:<33}{cumulative_us / 1000:>14.1f}")
+
+    print(f"\n{'backend modules (self time)':<36}{'self ms':>14}")
+    own_modules = sorted(((s, name) for name, (s, _, _) in best.items() if name in OWN_MODULES), reverse=True)
+    for self_us, name in own_modules[:args.top]:
+        print(f"   {name:<33}{self_us / 1000:>14.1f}")
+
+    checks = [("import app", total, args.budget_ms), ("backend self time", own, args.own_budget_ms)]
+    if ready:
+        print(f"\n🚦 uvicorn: /live after {min(live):.0f} ms, /ready after {min(ready):.0f} ms")
+        checks.append(("process start to /ready", min(ready), args.ready_budget_ms))
+
+    print()
+    for label, value, budget in checks:
+        print(f"{'✅' if value <= budget else '❌'} {label}: {value:.0f} ms (budget {budget:.0f} ms)")
+    sys.exit(0 if all(value <= budget for _, value, budget in checks) else 1)
+
+
+if __name__ == "__main__":
+    main()
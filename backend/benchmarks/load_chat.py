@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Load test: concurrent chat sessions against /chat or /chat/stream
+
+Usage:
+    python backend/benchmarks/load_chat.py --spawn [--sessions 50] [--turns 4] [--stream]
+    python backend/benchmarks/load_chat.py --url http://localhost:8000 [...]
+
+--spawn starts the API on a free port with the fake LLM backend
+(VEE_LLM_BACKEND=fake) and a throwaway SQLite database in a temp directory,
+so no Gemini quota is spent and the real database is never touched. Tune the
+fake with VEE_FAKE_LLM, e.g.
+    VEE_FAKE_LLM='{"latency_ms": 1200, "rate_429": 0.05, "rate_timeout": 0.01}'
+
+Each virtual session sends its turns one after another (with think time),
+all sessions run concurrently. Messages mix small talk with ones that make
+the fake model call save_incident_report, find_resources and
+geocode_location_tool. Reports throughput, latency percentiles, TTFT when
+streaming, and outcomes: ok, fallback reply, shed (503), HTTP/transport error.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+MESSAGES = [
+    "Hi, I don't know where to start.",
+    "I want to report that my husband beat me last night in Kisumu, you can put it on the map.",
+    "Someone keeps harassing me at work in Nairobi. I want to report it.",
+    "I need help, is there a shelter or hospital in Mombasa?",
+    "Where is the nearest police station near Nakuru?",
+    "Thank you for listening.",
+    "I'm scared to go home.",
+    "Nilipigwa na mume wangu jana Kiambu, nataka kuripoti.",
+]
+
+# Replies the API sends when every model failed or timed out
+FALLBACK_MARKERS = ("trouble connecting to my brain", "taking too long to respond",
+                    "shida kuungana", "nimechelewa kupata jibu")
+
+
+def percentile(samples, p):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+class Results:
+    def __init__(self):
+        self.latencies = []
+        self.ttfts = []
+        self.outcomes = Counter()
+
+    def add(self, outcome: str, latency_ms: float, ttft_ms: float = None):
+        self.outcomes[outcome] += 1
+        if outcome == "ok":
+            self.latencies.append(latency_ms)
+            if ttft_ms is not None:
+                self.ttfts.append(ttft_ms)
+
+
+def classify_reply(text: str) -> str:
+    lowered = (text or "").lower()
+    return "fallback" if any(marker in lowered for marker in FALLBACK_MARKERS) else "ok"
+
+
+async def send_chat(client: httpx.AsyncClient, payload: dict):
+    response = await client.post("/chat", json=payload)
+    if response.status_code == 503:
+        return "shed", None
+    if response.status_code != 200:
+        return f"http_{response.status_code}", None
+    return classify_reply(response.json().get("text")), None
+
+
+async def send_stream(client: httpx.AsyncClient, payload: dict):
+    started = time.perf_counter()
+    ttft_ms = None
+    final_event, final_text = None, ""
+    async with client.stream("POST", "/chat/stream", json=payload) as response:
+        if response.status_code == 503:
+            return "shed", None
+        if response.status_code != 200:
+            return f"http_{response.status_code}", None
+        event = None
+        async for line in response.aiter_lines():
+            if line.startswith("event: "):
+                event = line[7:]
+            elif line.startswith("data: "):
+                if event == "token" and ttft_ms is None:
+                    ttft_ms = (time.perf_counter() - started) * 1000
+                if event in ("done", "error"):
+                    final_event, final_text = event, json.loads(line[6:]).get("text", "")
+    if final_event == "done":
+        return classify_reply(final_text), ttft_ms
+    return ("fallback" if final_event == "error" else "http_incomplete"), ttft_ms
+
+
+async def run_session(client, results: Results, turns: int, stream: bool, think: float, rng: random.Random):
+    session_id = f"load-{uuid.uuid4().hex[:12]}"
+    language = "sw" if rng.random() < 0.2 else "en"
+    for _ in range(turns):
+        payload = {"message": rng.choice(MESSAGES), "session_id": session_id, "language": language}
+        started = time.perf_counter()
+        try:
+            outcome, ttft_ms = await (send_stream if stream else send_chat)(client, payload)
+        except httpx.HTTPError as e:
+            outcome, ttft_ms = f"transport_{type(e).__name__}", None
+        results.add(outcome, (time.perf_counter() - started) * 1000, ttft_ms)
+        if think:
+            await asyncio.sleep(rng.uniform(0, 2 * think))
+
+
+async def run_load(url: str, sessions: int, turns: int, concurrency: int, stream: bool, think: float, seed: int):
+    results = Results()
+    rng = random.Random(seed)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    gate = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(base_url=url, timeout=120, limits=limits) as client:
+        async def one(i):
+            async with gate:
+                await run_session(client, results, turns, stream, think, random.Random(rng.random()))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(sessions)))
+        elapsed = time.perf_counter() - started
+        health = (await client.get("/health")).json()
+    return results, elapsed, health
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def spawn_server(port: int, workdir: str) -> subprocess.Popen:
+    env = dict(os.environ, VEE_LLM_BACKEND="fake", ENVIRONMENT="development")
+    env.setdefault("VEE_FAKE_LLM", json.dumps({"latency_ms": 800, "latency_sigma": 0.5}))
+    log = open(Path(workdir) / "server.log", "w")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--app-dir", str(BACKEND_DIR),
+         "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited early, see {workdir}/server.log")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/ready", timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.3)
+    process.terminate()
+    raise RuntimeError("Server did not become ready within 60s")
+
+
+def report(results: Results, elapsed: float, health: dict, stream: bool):
+    total = sum(results.outcomes.values())
+    print(f"\n📊 {total} turns in {elapsed:.1f} s -> {total / elapsed:.1f} turns/s "
+          f"({len(results.latencies) / elapsed:.1f} ok/s)")
+
+    print("\n⏱️  Latency of successful turns (ms)")
+    for label, samples in (("end-to-end", results.latencies), ("TTFT", results.ttfts if stream else [])):
+        if samples:
+            print(f"   {label:<12} p50 {percentile(samples, 0.5):>8.0f}   p90 {percentile(samples, 0.9):>8.0f}"
+                  f"   p99 {percentile(samples, 0.99):>8.0f}   max {max(samples):>8.0f}")
+
+    print("\n🧾 Outcomes")
+    for outcome, count in results.outcomes.most_common():
+        print(f"   {outcome:<24}{count:>7}  {100 * count / total:>6.1f}%")
+
+    pool = health.get("llm_pool", {})
+    print(f"\n🧵 Server: backend={health.get('llm_backend')} shed={pool.get('shed')} "
+          f"queue_wait_ms={pool.get('queue_wait_ms')}")
+    for name, model in health.get("models", {}).items():
+        print(f"   {name:<26}{model.get('state', '?'):<10} calls={model.get('calls')} "
+              f"p95={model.get('p95_ms')} err={model.get('error_rate')} 429={model.get('quota_rate')}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--url", help="Base URL of a running API")
+    target.add_argument("--spawn", action="store_true", help="Start a local API with the fake LLM backend")
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=4, help="Turns per session")
+    parser.add_argument("--concurrency", type=int, default=50, help="Sessions active at once")
+    parser.add_argument("--think", type=float, default=0.5, help="Mean seconds between a session's turns")
+    parser.add_argument("--stream", action="store_true", help="Use /chat/stream instead of /chat")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    process = None
+    workdir = None
+    url = args.url
+    if args.spawn:
+        workdir = tempfile.mkdtemp(prefix="vee-load-")
+        port = free_port()
+        print(f"🚀 Starting API with fake LLM on :{port} (workdir {workdir})")
+        process = spawn_server(port, workdir)
+        url = f"http://127.0.0.1:{port}"
+
+    print(f"🔥 {args.sessions} sessions x {args.turns} turns, concurrency {args.concurrency}, "
+          f"{'/chat/stream' if args.stream else '/chat'} -> {url}")
+    try:
+        results, elapsed, health = asyncio.run(run_load(
+            url, args.sessions, args.turns, args.concurrency, args.stream, args.think, args.seed
+        ))
+        report(results, elapsed, health, args.stream)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Benchmark: replay scripted conversations through the chat pipeline
+
+Usage:
+    python backend/benchmarks/replay_stories.py [--repeat 5] [--update-baseline]
+
+Feeds every story in tests/test_stories.yml turn by turn through /chat
+(in-process) against the deterministic fake model (fixed latency, no
+injected faults), in a throwaway SQLite database. Each turn is timed by
+stage - session, llm, tool, geocode, encrypt, db_commit - using timing.py.
+
+A story's `action` steps that name a tool (save_incident_report,
+find_resources, geocode_location_tool) are checked against the tools the
+turn actually ran. Other actions (utter_*) are plain replies. A resource
+lookup answered by the intent router's fast path counts as find_resources.
+
+Per-stage medians are compared with benchmarks/baselines/replay_stories.json;
+a stage slower than baseline * (1 + tolerance) + slack fails the run (exit 1).
+--update-baseline rewrites the baseline from this run.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+import yaml
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+REPO_DIR = BACKEND_DIR.parent
+DEFAULT_STORIES = REPO_DIR / "tests" / "test_stories.yml"
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baselines" / "replay_stories.json"
+
+TOOL_NAMES = {"save_incident_report", "find_resources", "geocode_location_tool"}
+FAKE_MODEL = {"latency_ms": 20, "latency_sigma": 0, "seed": 1}
+
+
+def load_stories(path: Path):
+    """[(name, [(user_text, expected_tools), ...])] from a stories YAML file"""
+    stories = []
+    for story in yaml.safe_load(path.read_text(encoding="utf-8")).get("stories", []):
+        turns = []
+        for step in story.get("steps", []):
+            if "user" in step:
+                turns.append((step["user"].strip(), set()))
+            elif "action" in step and turns and step["action"] in TOOL_NAMES:
+                turns[-1][1].add(step["action"])
+        if turns:
+            stories.append((story["story"], turns))
+    return stories
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+async def replay(stories, repeat: int):
+    import app as appmod
+    import timing
+
+    samples = defaultdict(list)
+    mismatches = []
+    fast_turns = 0
+
+    async def run_turn(session_id: str, text: str):
+        timings = timing.bind_turn()
+        started = time.perf_counter()
+        response = await appmod.chat_endpoint(appmod.ChatRequest(message=text, session_id=session_id, language="en"))
+        return timings, (time.perf_counter() - started) * 1000, response
+
+    # Run inside the app's lifespan with every component warm, as a server past /ready would be
+    async with appmod.lifespan(appmod.app):
+        await appmod.readiness.wait_ready(timeout=60, optional=True)
+        for round_no in range(repeat):
+            for name, turns in stories:
+                session_id = f"replay-{uuid.uuid4().hex[:8]}"
+                for text, expected_tools in turns:
+                    # A task per turn keeps each turn's timing binding separate
+                    timings, total_ms, response = await asyncio.create_task(run_turn(session_id, text))
+                    stages = timings.as_dict()
+                    for stage_name, ms in stages.items():
+                        samples[stage_name].append(ms)
+                    samples["total"].append(total_ms)
+                    samples["other"].append(max(0.0, total_ms - sum(stages.values())))
+
+                    called = set(timings.tools)
+                    if response.metadata.get("fast_path"):
+                        fast_turns += 1
+                        if response.metadata.get("intent") == "resources":
+                            called.add("find_resources")
+                    if round_no == 0 and called != expected_tools:
+                        mismatches.append((name, text, sorted(expected_tools), sorted(called)))
+                    if response.metadata.get("all_models_failed"):
+                        mismatches.append((name, text, ["reply"], ["all models failed"]))
+    return samples, mismatches, fast_turns
+
+
+def summarize(samples):
+    return {
+        stage: {
+            "p50_ms": round(percentile(values, 0.5), 3),
+            "p95_ms": round(percentile(values, 0.95), 3),
+            "count": len(values),
+        }
+        for stage, values in sorted(samples.items())
+    }
+
+
+def compare(summary, baseline, tolerance: float, slack_ms: float):
+    regressions = []
+    for stage, base in baseline.get("stages", {}).items():
+        current = summary.get(stage)
+        if current is None:
+            continue
+        limit = base["p50_ms"] * (1 + tolerance) + slack_ms
+        if current["p50_ms"] > limit:
+            regressions.append((stage, base["p50_ms"], current["p50_ms"], limit))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stories", type=Path, default=DEFAULT_STORIES)
+    parser.add_argument("--repeat", type=int, default=5, help="Replays of the whole story set")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed relative p50 regression")
+    parser.add_argument("--slack-ms", type=float, default=2.0, help="Allowed absolute p50 regression")
+    args = parser.parse_args()
+
+    stories = load_stories(args.stories.resolve())
+    baseline_path = args.baseline.resolve()
+
+    # Deterministic fake model, throwaway database (SQLite path is relative to cwd)
+    os.environ["VEE_LLM_BACKEND"] = "fake"
+    os.environ["VEE_FAKE_LLM"] = json.dumps(FAKE_MODEL)
+    os.environ.setdefault("ENVIRONMENT", "development")
+    os.chdir(tempfile.mkdtemp(prefix="vee-replay-"))
+    sys.path.insert(0, str(BACKEND_DIR))
+
+    turn_count = sum(len(turns) for _, turns in stories)
+    print(f"🎬 Replaying {len(stories)} stories ({turn_count} turns) x {args.repeat}")
+    samples, mismatches, fast_turns = asyncio.run(replay(stories, args.repeat))
+    summary = summarize(samples)
+    print(f"\n⚡ {fast_turns}/{len(samples['total'])} turns answered without the LLM")
+
+    print(f"\n⏱️  Per-turn stage time (ms, exclusive)")
+    print(f"{'stage':<12}{'p50':>10}{'p95':>10}{'turns':>8}")
+    for stage, row in summary.items():
+        print(f"{stage:<12}{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}{row['count']:>8}")
+
+    failed = False
+    if mismatches:
+        failed = True
+        print(f"\n❌ {len(mismatches)} turns did not run the expected tools")
+        for name, text, expected, called in mismatches:
+            print(f"   [{name}] '{text[:50]}' expected {expected} got {called}")
+
+    if args.update_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps({
+            "created": datetime.utcnow().strftime("%Y-%m-%d"),
+            "fake_model": FAKE_MODEL,
+            "repeat": args.repeat,
+            "stages": summary,
+        }, indent=2) + "\n")
+        print(f"\n💾 Baseline written to {baseline_path}")
+    elif baseline_path.exists():
+        regressions = compare(summary, json.loads(baseline_path.read_text()), args.tolerance, args.slack_ms)
+        if regressions:
+            failed = True
+            print("\n❌ Stage regressions (p50)")
+            for stage, base, current, limit in regressions:
+                print(f"   {stage:<12} baseline {base:.2f} ms -> {current:.2f} ms (limit {limit:.2f} ms)")
+        else:
+            print(f"\n✅ All stages within baseline (+{args.tolerance:.0%} / +{args.slack_ms} ms)")
+    else:
+        print(f"\n⚠️ No baseline at {baseline_path}; run with --update-baseline to create one")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
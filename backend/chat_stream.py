@@ -0,0 +1,130 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Optional
+
+import metrics
+import timing
+
+logger = logging.getLogger("chat_stream")
+
+# ============================================================
+# STREAMING CHAT TURNS
+# ============================================================
+# The SDK refuses stream=True together with automatic function calling, so a
+# streamed turn drives the tool loop itself: stream the model's reply, relay
+# text parts as they arrive, and if the reply asks for tools, run them (the
+# same callables automatic function calling would run) and stream the
+# follow-up. The chat history is only updated once the turn completes, so an
+# abandoned attempt (timeout -> fallback model) leaves the session untouched.
+
+MAX_TOOL_ROUNDS = 5
+TTFT_WINDOW = 500
+
+_ttft_lock = threading.Lock()
+_ttft_samples: deque = deque(maxlen=TTFT_WINDOW)
+
+
+class TurnCancelled(Exception):
+    """The caller gave up on this attempt (timeout or disconnect)"""
+
+
+def stream_turn(chat: Any, message: str, on_text: Callable[[str], None],
+                on_tool: Optional[Callable[[str], None]] = None,
+                cancelled: Optional[threading.Event] = None, timeout: Optional[float] = None) -> str:
+    """
+    Run one user turn on a ChatSession with streaming output (blocking; run in a thread).
+
+    timeout is each model call's request deadline, so an abandoned attempt
+    stops holding its worker thread. Returns the full reply text and appends
+    the turn to chat.history.
+    """
+    from google.generativeai import protos
+
+    model = chat.model
+    tools_lib = model._tools
+    history = list(chat.history)
+    history.append(protos.Content(role="user", parts=[protos.Part(text=message)]))
+    reply_parts = []
+    request_options = {"timeout": timeout} if timeout else None
+
+    for _ in range(MAX_TOOL_ROUNDS + 1):
+        with timing.stage("llm"):
+            response = model.generate_content(history, stream=True, request_options=request_options)
+            for chunk in response:
+                if cancelled is not None and cancelled.is_set():
+                    raise TurnCancelled()
+                for part in chunk.parts:
+                    if part.text:
+                        reply_parts.append(part.text)
+                        on_text(part.text)
+            response.resolve()
+
+        content = response.candidates[0].content
+        history.append(content)
+
+        function_calls = [part.function_call for part in content.parts if "function_call" in part]
+        if not function_calls or tools_lib is None:
+            break
+        if not all(callable(tools_lib[fc]) for fc in function_calls):
+            break
+
+        if cancelled is not None and cancelled.is_set():
+            raise TurnCancelled()
+
+        function_responses = []
+        for fc in function_calls:
+            if on_tool:
+                on_tool(fc.name)
+            function_responses.append(tools_lib(fc))
+        history.append(protos.Content(role="user", parts=function_responses))
+
+    if cancelled is not None and cancelled.is_set():
+        raise TurnCancelled()
+
+    chat.history = history
+    return "".join(reply_parts)
+
+
+# ---------------- time-to-first-token ----------------
+
+def record_ttft(ms: float):
+    with _ttft_lock:
+        _ttft_samples.append(ms)
+    metrics.chat_ttft.observe(ms / 1000)
+
+
+def ttft_stats() -> dict:
+    with _ttft_lock:
+        samples = sorted(_ttft_samples)
+    if not samples:
+        return {"count": 0}
+
+    def percentile(p: float) -> float:
+        return round(samples[min(len(samples) - 1, int(p * len(samples)))], 1)
+
+    return {"count": len(samples), "p50": percentile(0.5), "p95": percentile(0.95), "max": round(samples[-1], 1)}
+
+
+class TurnTimer:
+    """Wall-clock marks for one streamed turn"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.first_token: Optional[float] = None
+
+    def mark_token(self):
+        if self.first_token is None:
+            self.first_token = time.perf_counter()
+            record_ttft(self.ttft_ms)
+
+    @property
+    def ttft_ms(self) -> Optional[float]:
+        if self.first_token is None:
+            return None
+        return round((self.first_token - self.started) * 1000, 1)
+
+    @property
+    def total_ms(self) -> float:
+        return round((time.perf_counter() - self.started) * 1000, 1)
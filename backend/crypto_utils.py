@@ -2,6 +2,9 @@ import os
 import base64
 from cryptography.fernet import Fernet
 import hashlib
+import hmac
+
+import timing
 
 # Get or generate encryption key
 ENCRYPTION_KEY = os.getenv("ENCRYPTION_KEY")
@@ -13,6 +16,18 @@ if not ENCRYPTION_KEY:
 # Initialize Fernet
 cipher = Fernet(ENCRYPTION_KEY.encode() if isinstance(ENCRYPTION_KEY, str) else ENCRYPTION_KEY)
 
+# Blind index key (keyed search tokens). Derived from the encryption key unless set
+# explicitly, so tokens stay stable for as long as the stored ciphertext is readable.
+BLIND_INDEX_KEY = os.getenv("BLIND_INDEX_KEY")
+if BLIND_INDEX_KEY:
+    _blind_index_key = BLIND_INDEX_KEY.encode()
+else:
+    _blind_index_key = hmac.new(ENCRYPTION_KEY.encode(), b"vee-blind-index", hashlib.sha256).digest()
+
+# Separate sub-key for duplicate detection fingerprints
+_dedup_key = hmac.new(_blind_index_key, b"vee-dedup", hashlib.sha256).digest()
+
+@timing.timed("encrypt")
 def encrypt_text(plaintext: str) -> str:
     """Encrypt text and return base64 string"""
     try:
@@ -22,6 +37,7 @@ def encrypt_text(plaintext: str) -> str:
         print(f"Encryption error: {e}")
         return base64.b64encode(plaintext.encode()).decode()  # Fallback to simple encoding
 
+@timing.timed("decrypt")
 def decrypt_text(encrypted_text: str) -> str:
     """Decrypt base64 encrypted text"""
     try:
@@ -35,6 +51,10 @@ def decrypt_text(encrypted_text: str) -> str:
         except:
             return "[Decryption Failed]"
 
+def blind_index_token(token: str) -> str:
+    """Keyed HMAC of a normalized search token (never reversible without the key)"""
+    return hmac.new(_blind_index_key, token.encode(), hashlib.sha256).hexdigest()
+
 def generate_anonymous_id() -> str:
     """Generate random anonymous ID"""
     import uuid
@@ -43,7 +63,13 @@ def generate_anonymous_id() -> str:
 class EncryptionManager:
     @staticmethod
     def hash_for_deduplication(text: str) -> str:
-        """Create hash for deduplication without storing original"""
-        return hashlib.sha256(text.encode()).hexdigest()
+        """Create keyed hash for deduplication without storing original"""
+        return hmac.new(_dedup_key, text.encode(), hashlib.sha256).hexdigest()
+
+    @staticmethod
+    def shingle_hash(shingle: str) -> int:
+        """Keyed 64-bit hash of a text shingle (input to MinHash signatures)"""
+        digest = hashlib.blake2b(shingle.encode(), key=_dedup_key, digest_size=8).digest()
+        return int.from_bytes(digest, "big")
 
 encryption_manager = EncryptionManager()
\ No newline at end of file
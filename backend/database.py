@@ -1,12 +1,15 @@
 import os
 import sys
+import time
 from pathlib import Path
-from sqlalchemy import create_engine, text, inspect
+from sqlalchemy import create_engine, event, text, inspect
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
 import logging
 
+import timing
+
 # Load environment variables
 env_path = Path(__file__).resolve().parent.parent / '.env'
 load_dotenv(dotenv_path=env_path)
@@ -48,6 +51,17 @@ else:
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Every commit (flush included) is a "db_commit" span of the request it runs in
+@event.listens_for(SessionLocal, "before_commit")
+def _commit_started(session):
+    session.info["commit_started"] = time.perf_counter()
+
+@event.listens_for(SessionLocal, "after_commit")
+def _commit_finished(session):
+    started = session.info.pop("commit_started", None)
+    if started is not None:
+        timing.record("db_commit", (time.perf_counter() - started) * 1000)
+
 def get_db():
     """Dependency for FastAPI endpoints"""
     db = SessionLocal()
@@ -66,6 +80,35 @@ def init_db():
         # Don't raise error - allow app to start without database
         logger.info("🔄 Continuing with limited functionality...")
 
+def sync_schema():
+    """
+    Add columns and indexes that exist in the models but not yet in the database.
+
+    create_all() only creates missing tables; this covers new nullable columns on
+    existing tables so a deploy doesn't require fresh_start().
+    """
+    try:
+        inspector = inspect(engine)
+        existing_tables = set(inspector.get_table_names())
+
+        with engine.begin() as conn:
+            for table in Base.metadata.sorted_tables:
+                if table.name not in existing_tables:
+                    continue
+
+                existing_columns = {col['name'] for col in inspector.get_columns(table.name)}
+                for column in table.columns:
+                    if column.name in existing_columns:
+                        continue
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+                    logger.info(f"🔧 Added column {table.name}.{column.name}")
+
+                for index in table.indexes:
+                    index.create(bind=conn, checkfirst=True)
+    except Exception as e:
+        logger.error(f"❌ Schema sync failed: {e}")
+
 def test_connection():
     """Test database connection"""
     try:
@@ -0,0 +1,179 @@
+import logging
+import random
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from models import IncidentReport, ReportFingerprint, ReportLSHBucket, ReportDuplicateLink
+from crypto_utils import encryption_manager
+
+logger = logging.getLogger("dedup")
+
+# ============================================================
+# NEAR-DUPLICATE DETECTION (KEYED MINHASH + LSH)
+# ============================================================
+# Retries after an LLM timeout and survivors reporting through several channels
+# produce the same narrative more than once. Before a report is encrypted we build
+# a keyed MinHash signature of its word shingles and look it up in LSH buckets.
+# Each insert costs a fixed number of indexed bucket lookups plus at most
+# MAX_CANDIDATES signature comparisons, independent of table size.
+# A short narrative ("my husband beat me") is not distinctive: two survivors in
+# one county can write the same words. It only counts as a duplicate of a
+# report from the same chat session.
+
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 8                                     # 8 bands x 8 rows ~ 0.77 Jaccard threshold
+LSH_ROWS = NUM_PERMUTATIONS // LSH_BANDS
+SIMILARITY_THRESHOLD = 0.8
+MIN_SHINGLES_FOR_FUZZY = 6                        # shorter texts only match exactly, and only within a session
+MAX_CANDIDATES = 20
+DEDUP_WINDOW_DAYS = 14
+
+SHINGLE_SIZE = 2
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 64) - 1
+
+# Fixed permutation coefficients (the shingle hashes themselves are keyed)
+_rng = random.Random(1195)
+_PERMUTATIONS = [
+    (_rng.randint(1, _MERSENNE_PRIME - 1), _rng.randint(0, _MERSENNE_PRIME - 1))
+    for _ in range(NUM_PERMUTATIONS)
+]
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+@dataclass
+class Fingerprint:
+    content_hash: str
+    signature: List[int]
+    buckets: List[str]
+    shingle_count: int
+
+
+def _shingles(text: str) -> set:
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < SHINGLE_SIZE:
+        return set(words)
+    return {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def compute_fingerprint(text: str, county: str) -> Fingerprint:
+    """
+    Build the keyed fingerprint of a narrative. Call on plaintext, before encryption.
+
+    The county is folded into the exact hash and every LSH bucket, so only
+    reports from the same county can ever be candidates for each other.
+    """
+    county_key = (county or "").strip().lower()
+    normalized = " ".join(_WORD_RE.findall(text.lower()))
+    content_hash = encryption_manager.hash_for_deduplication(f"{county_key}|{normalized}")
+
+    shingle_hashes = [encryption_manager.shingle_hash(s) for s in _shingles(text)]
+    if shingle_hashes:
+        signature = [
+            min((a * h + b) % _MERSENNE_PRIME for h in shingle_hashes)
+            for a, b in _PERMUTATIONS
+        ]
+    else:
+        signature = [_MAX_HASH] * NUM_PERMUTATIONS
+
+    buckets = []
+    for band in range(LSH_BANDS):
+        rows = signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]
+        band_hash = encryption_manager.hash_for_deduplication(
+            f"{county_key}|{band}|" + ",".join(map(str, rows))
+        )
+        buckets.append(f"{band}:{band_hash[:32]}")
+
+    return Fingerprint(content_hash, signature, buckets, len(shingle_hashes))
+
+
+def estimate_similarity(sig_a: List[int], sig_b: List[int]) -> float:
+    """Estimated Jaccard similarity of two MinHash signatures"""
+    matches = sum(1 for a, b in zip(sig_a, sig_b) if a == b)
+    return matches / NUM_PERMUTATIONS
+
+
+def _decode_signature(raw: str) -> List[int]:
+    return [int(value, 16) for value in raw.split(",")]
+
+
+def find_duplicate(db: Session, fingerprint: Fingerprint,
+                   session_id: Optional[str] = None) -> Optional[Tuple[int, float]]:
+    """
+    Look for an earlier report with the same or nearly the same narrative.
+
+    Returns:
+        (report_id, similarity) of the best match, or None
+    """
+    window_start = datetime.utcnow() - timedelta(days=DEDUP_WINDOW_DAYS)
+    distinctive = fingerprint.shingle_count >= MIN_SHINGLES_FOR_FUZZY
+    # The shared fallback session id says nothing about who wrote a report
+    same_session = session_id if session_id and session_id != "default" else None
+    if not distinctive and same_session is None:
+        return None
+
+    # 1. Exact content match
+    exact = db.query(ReportFingerprint.report_id).join(
+        IncidentReport, IncidentReport.id == ReportFingerprint.report_id
+    ).filter(
+        ReportFingerprint.content_hash == fingerprint.content_hash,
+        IncidentReport.timestamp >= window_start
+    )
+    if not distinctive:
+        exact = exact.filter(IncidentReport.session_id == same_session)
+    exact = exact.order_by(ReportFingerprint.report_id).first()
+
+    if exact:
+        return exact[0], 1.0
+
+    if not distinctive:
+        return None
+
+    # 2. LSH candidates (bounded, most recent first, inside the window before the limit)
+    candidate_ids = [
+        row[0] for row in db.query(ReportLSHBucket.report_id).join(
+            IncidentReport, IncidentReport.id == ReportLSHBucket.report_id
+        ).filter(
+            ReportLSHBucket.bucket.in_(fingerprint.buckets),
+            IncidentReport.timestamp >= window_start
+        ).distinct().order_by(ReportLSHBucket.report_id.desc()).limit(MAX_CANDIDATES).all()
+    ]
+    if not candidate_ids:
+        return None
+
+    candidates = db.query(ReportFingerprint.report_id, ReportFingerprint.signature).filter(
+        ReportFingerprint.report_id.in_(candidate_ids)
+    ).all()
+
+    best = None
+    for report_id, raw_signature in candidates:
+        similarity = estimate_similarity(fingerprint.signature, _decode_signature(raw_signature))
+        if similarity >= SIMILARITY_THRESHOLD and (best is None or similarity > best[1]):
+            best = (report_id, similarity)
+
+    return best
+
+
+def record_fingerprint(db: Session, report_id: int, fingerprint: Fingerprint):
+    """Store an original report's fingerprint and LSH buckets (caller commits)"""
+    db.add(ReportFingerprint(
+        report_id=report_id,
+        content_hash=fingerprint.content_hash,
+        signature=",".join(format(value, "x") for value in fingerprint.signature)
+    ))
+    db.add_all(ReportLSHBucket(bucket=bucket, report_id=report_id) for bucket in fingerprint.buckets)
+
+
+def record_duplicate(db: Session, report_id: int, duplicate_of_id: int, similarity: float):
+    """Link a flagged duplicate to the report it repeats (caller commits)"""
+    db.add(ReportDuplicateLink(
+        report_id=report_id,
+        duplicate_of_id=duplicate_of_id,
+        similarity=round(similarity, 3)
+    ))
+    logger.info(f"🔁 Report {report_id} flagged as duplicate of {duplicate_of_id} (similarity {similarity:.2f})")
@@ -0,0 +1,251 @@
+import json
+import logging
+import math
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import google.generativeai as genai
+from google.api_core import exceptions as api_exceptions
+from google.generativeai import protos
+
+from llm_client import LLMClient
+
+logger = logging.getLogger("fake_llm")
+
+# ============================================================
+# FAKE GEMINI BACKEND (load tests, offline demos)
+# ============================================================
+# FakeGenerativeService stands in for the SDK's transport client under a real
+# GenerativeModel, so everything above it - ChatSession, automatic function
+# calling, stream chunk merging - is the production code path. Each generate
+# call sleeps for a lognormal latency, may fail with an injected 429, timeout
+# or 500, and otherwise answers from a small script keyed on the last user
+# message:
+#   report words    -> function call save_incident_report(...)
+#   help words      -> function call find_resources(county)
+#   location words  -> function call geocode_location_tool(location)
+#   anything else   -> an empathetic canned reply
+# After a function response the model answers in text, ending the turn.
+#
+# Configure with VEE_FAKE_LLM: a JSON object of FakeLLMConfig fields, or
+# "@path/to/config.json". Per-model overrides go under "models", e.g.
+#   {"latency_ms": 600, "models": {"gemini-2.5-flash": {"rate_429": 0.3}}}
+
+COUNTIES = ("Nairobi", "Mombasa", "Kisumu", "Nakuru", "Kiambu", "Machakos", "Kakamega", "Eldoret", "Thika")
+REPORT_WORDS = ("report", "attack", "beat", "hit me", "harass", "assault", "rape", "touched me",
+                "nilipigwa", "alinipiga", "ripoti")
+HELP_WORDS = ("help", "shelter", "hospital", "lawyer", "counsel", "police", "msaada", "hospitali")
+LOCATION_WORDS = ("where", "near", "location", "wapi", "karibu")
+INCIDENT_TYPE_WORDS = (
+    (("rape", "sexual", "touched me"), "sexual_violence"),
+    (("beat", "hit me", "attack", "nilipigwa", "alinipiga"), "physical_violence"),
+    (("harass",), "harassment"),
+    (("follow", "stalk"), "stalking"),
+    (("online", "whatsapp", "facebook"), "online_gbv"),
+)
+FILLER_WORDS = ("I", "hear", "you", "and", "I", "believe", "you.", "What", "happened", "is", "not", "your",
+                "fault.", "You", "are", "safe", "talking", "to", "me", "here.", "Take", "your", "time;")
+
+
+@dataclass
+class FakeLLMConfig:
+    latency_ms: float = 800.0          # median latency of one generate call
+    latency_sigma: float = 0.5         # lognormal spread; 0 = fixed latency
+    ttft_fraction: float = 0.3         # share of the latency before the first streamed chunk
+    rate_429: float = 0.0
+    rate_timeout: float = 0.0          # call hangs for hang_seconds, then DeadlineExceeded
+    rate_error: float = 0.0            # 500 InternalServerError
+    hang_seconds: float = 60.0
+    tool_calls: bool = True
+    reply_words: int = 40
+    down_models: Tuple[str, ...] = ()  # fail the health check and every call
+    models: Dict[str, dict] = field(default_factory=dict)
+    seed: Optional[int] = None
+
+    @classmethod
+    def from_env(cls) -> "FakeLLMConfig":
+        raw = os.getenv("VEE_FAKE_LLM", "").strip()
+        if not raw:
+            return cls()
+        if raw.startswith("@"):
+            with open(raw[1:], "r") as f:
+                raw = f.read()
+        data = json.loads(raw)
+        if "down_models" in data:
+            data["down_models"] = tuple(data["down_models"])
+        return cls(**data)
+
+    def for_model(self, model_name: str) -> "FakeLLMConfig":
+        overrides = self.models.get(model_name)
+        return replace(self, **overrides) if overrides else self
+
+
+def _last_user_text(contents: List[Any]) -> str:
+    for content in reversed(contents):
+        if content.role == "user":
+            texts = [part.text for part in content.parts if part.text]
+            if texts:
+                return " ".join(texts)
+    return ""
+
+
+def _find(text: str, words) -> bool:
+    return any(word in text for word in words)
+
+
+class FakeGenerativeService:
+    """Transport-level stand-in for the Gemini generative service (one per model)"""
+
+    def __init__(self, model_name: str, config: FakeLLMConfig):
+        self.model_name = model_name
+        self.config = config.for_model(model_name)
+        seed = None if config.seed is None else config.seed + sum(map(ord, model_name))
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+    # ---------------- timing and faults ----------------
+
+    def _draw(self) -> Tuple[float, Optional[str]]:
+        cfg = self.config
+        with self._rng_lock:
+            latency = cfg.latency_ms * math.exp(self._rng.gauss(0, cfg.latency_sigma)) if cfg.latency_sigma else cfg.latency_ms
+            roll = self._rng.random()
+        if self.model_name in cfg.down_models:
+            return latency, "down"
+        for fault, rate in (("429", cfg.rate_429), ("timeout", cfg.rate_timeout), ("error", cfg.rate_error)):
+            if roll < rate:
+                return latency, fault
+            roll -= rate
+        return latency, None
+
+    def _wait(self, seconds: float, timeout: Optional[float]):
+        """Sleep like a call taking `seconds`, giving up at the caller's request timeout as the SDK does"""
+        if timeout is not None and seconds > timeout:
+            time.sleep(max(0.0, timeout))
+            raise api_exceptions.DeadlineExceeded(f"Deadline exceeded after {timeout:.1f}s (fake {self.model_name})")
+        time.sleep(seconds)
+
+    def _raise_fault(self, fault: str, latency_ms: float, timeout: Optional[float] = None):
+        if fault == "timeout":
+            self._wait(self.config.hang_seconds, timeout)
+            raise api_exceptions.DeadlineExceeded(f"Deadline exceeded (fake {self.model_name})")
+        time.sleep(min(latency_ms, 200) / 1000)
+        if fault == "429":
+            raise api_exceptions.ResourceExhausted(f"Quota exceeded for {self.model_name} (fake)")
+        if fault == "down":
+            raise api_exceptions.NotFound(f"models/{self.model_name} is not available (fake)")
+        raise api_exceptions.InternalServerError(f"Internal error (fake {self.model_name})")
+
+    # ---------------- scripted replies ----------------
+
+    def _script(self, request: Any) -> protos.Content:
+        contents = list(request.contents)
+        last = contents[-1] if contents else None
+        if last is not None and any("function_response" in part for part in last.parts):
+            names = [part.function_response.name for part in last.parts if "function_response" in part]
+            return self._text(self._after_tool(names[0]))
+
+        text = _last_user_text(contents)
+        lowered = text.lower()
+        county = next((c for c in COUNTIES if c.lower() in lowered), "Nairobi")
+        if self.config.tool_calls and request.tools:
+            if _find(lowered, REPORT_WORDS):
+                incident_type = next((t for words, t in INCIDENT_TYPE_WORDS if _find(lowered, words)), "other")
+                return self._call("save_incident_report", {
+                    "county": county,
+                    "incident_type": incident_type,
+                    "incident_description": text[:300],
+                    "timeframe": "Unknown",
+                    "mapping_consent": "map" in lowered,
+                })
+            if _find(lowered, HELP_WORDS):
+                return self._call("find_resources", {"county": county, "support_needs": "all"})
+            if _find(lowered, LOCATION_WORDS):
+                return self._call("geocode_location_tool", {"location_string": county})
+        return self._text(self._filler())
+
+    def _after_tool(self, name: str) -> str:
+        if name == "save_incident_report":
+            return "Thank you for trusting me with this. Your report has been saved safely. " + self._filler()
+        if name == "find_resources":
+            return "Here are some places near you that can help. " + self._filler()
+        return "Thank you, I have noted the location. " + self._filler()
+
+    def _filler(self) -> str:
+        words = [FILLER_WORDS[i % len(FILLER_WORDS)] for i in range(self.config.reply_words)]
+        return " ".join(words)
+
+    @staticmethod
+    def _text(text: str) -> protos.Content:
+        return protos.Content(role="model", parts=[protos.Part(text=text)])
+
+    @staticmethod
+    def _call(name: str, args: dict) -> protos.Content:
+        return protos.Content(role="model", parts=[protos.Part(function_call=protos.FunctionCall(name=name, args=args))])
+
+    @staticmethod
+    def _response(content: protos.Content) -> protos.GenerateContentResponse:
+        return protos.GenerateContentResponse(candidates=[
+            protos.Candidate(index=0, content=content, finish_reason=protos.Candidate.FinishReason.STOP)
+        ])
+
+    # ---------------- service API ----------------
+
+    def generate_content(self, request: Any, **kwargs) -> protos.GenerateContentResponse:
+        latency_ms, fault = self._draw()
+        if fault:
+            self._raise_fault(fault, latency_ms, kwargs.get("timeout"))
+        self._wait(latency_ms / 1000, kwargs.get("timeout"))
+        return self._response(self._script(request))
+
+    def stream_generate_content(self, request: Any, **kwargs) -> Iterator[protos.GenerateContentResponse]:
+        latency_ms, fault = self._draw()
+        timeout = kwargs.get("timeout")
+        if fault:
+            self._raise_fault(fault, latency_ms, timeout)
+        content = self._script(request)
+        return self._stream(content, latency_ms, timeout)
+
+    def _stream(self, content: protos.Content, latency_ms: float,
+                timeout: Optional[float] = None) -> Iterator[protos.GenerateContentResponse]:
+        # The timeout bounds the whole stream, as a gRPC deadline does
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        def wait(seconds: float):
+            self._wait(seconds, None if deadline is None else deadline - time.monotonic())
+
+        wait(latency_ms * self.config.ttft_fraction / 1000)
+        if not content.parts[0].text:
+            yield self._response(content)
+            return
+        words = content.parts[0].text.split(" ")
+        chunks = [" ".join(words[i:i + 8]) + (" " if i + 8 < len(words) else "") for i in range(0, len(words), 8)]
+        pause = latency_ms * (1 - self.config.ttft_fraction) / 1000 / max(1, len(chunks) - 1)
+        for i, chunk in enumerate(chunks):
+            if i:
+                wait(pause)
+            yield self._response(self._text(chunk))
+
+
+class FakeClient(LLMClient):
+    name = "fake"
+    requires_api_key = False
+
+    def __init__(self, config: Optional[FakeLLMConfig] = None):
+        self.config = config or FakeLLMConfig.from_env()
+
+    def configure(self, api_key: str):
+        pass
+
+    def create_model(self, model_name: str, tools: List[Callable], system_instruction: str) -> Any:
+        model = genai.GenerativeModel(model_name=model_name, tools=tools, system_instruction=system_instruction)
+        model._client = FakeGenerativeService(model_name, self.config)
+        return model
+
+    def check_model(self, model_name: str):
+        if model_name in self.config.down_models:
+            raise api_exceptions.NotFound(f"models/{model_name} is not available (fake)")
@@ -0,0 +1,166 @@
+import math
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
+
+# Kenya bounding box (west, south, east, north) with a small margin
+KENYA_BBOX = (33.5, -5.0, 42.5, 5.5)
+
+KENYA_COUNTIES = (
+    "Mombasa", "Kwale", "Kilifi", "Tana River", "Lamu", "Taita Taveta", "Garissa", "Wajir", "Mandera",
+    "Marsabit", "Isiolo", "Meru", "Tharaka Nithi", "Embu", "Kitui", "Machakos", "Makueni", "Nyandarua",
+    "Nyeri", "Kirinyaga", "Murang'a", "Kiambu", "Turkana", "West Pokot", "Samburu", "Trans Nzoia",
+    "Uasin Gishu", "Elgeyo Marakwet", "Nandi", "Baringo", "Laikipia", "Nakuru", "Narok", "Kajiado",
+    "Kericho", "Bomet", "Kakamega", "Vihiga", "Bungoma", "Busia", "Siaya", "Kisumu", "Homa Bay",
+    "Migori", "Kisii", "Nyamira", "Nairobi",
+)
+
+# County headquarters (lat, lng) - the point used when only the county is known
+KENYA_COUNTY_CENTERS = {
+    "Mombasa": (-4.0435, 39.6682), "Kwale": (-4.1737, 39.4521), "Kilifi": (-3.6305, 39.8499),
+    "Tana River": (-1.4980, 40.0300), "Lamu": (-2.2717, 40.9020), "Taita Taveta": (-3.3961, 38.5561),
+    "Garissa": (-0.4532, 39.6461), "Wajir": (1.7471, 40.0573), "Mandera": (3.9366, 41.8670),
+    "Marsabit": (2.3284, 37.9899), "Isiolo": (0.3546, 37.5822), "Meru": (0.0469, 37.6502),
+    "Tharaka Nithi": (-0.3333, 37.6500), "Embu": (-0.5310, 37.4500), "Kitui": (-1.3670, 38.0106),
+    "Machakos": (-1.5177, 37.2634), "Makueni": (-1.7833, 37.6333), "Nyandarua": (-0.2710, 36.3780),
+    "Nyeri": (-0.4201, 36.9476), "Kirinyaga": (-0.4989, 37.2803), "Murang'a": (-0.7210, 37.1526),
+    "Kiambu": (-1.1714, 36.8356), "Turkana": (3.1191, 35.5973), "West Pokot": (1.2389, 35.1119),
+    "Samburu": (1.0968, 36.6980), "Trans Nzoia": (1.0157, 35.0062), "Uasin Gishu": (0.5143, 35.2698),
+    "Elgeyo Marakwet": (0.6703, 35.5081), "Nandi": (0.2039, 35.1050), "Baringo": (0.4919, 35.7430),
+    "Laikipia": (0.0167, 37.0722), "Nakuru": (-0.3031, 36.0800), "Narok": (-1.0875, 35.8711),
+    "Kajiado": (-1.8524, 36.7820), "Kericho": (-0.3689, 35.2863), "Bomet": (-0.7813, 35.3416),
+    "Kakamega": (0.2827, 34.7519), "Vihiga": (0.0833, 34.7167), "Bungoma": (0.5635, 34.5606),
+    "Busia": (0.4608, 34.1115), "Siaya": (0.0612, 34.2881), "Kisumu": (-0.0917, 34.7680),
+    "Homa Bay": (-0.5273, 34.4571), "Migori": (-1.0634, 34.4731), "Kisii": (-0.6817, 34.7667),
+    "Nyamira": (-0.5633, 34.9358), "Nairobi": (-1.2864, 36.8172),
+}
+
+TILE_SIZE = 256
+MAX_MERCATOR_LAT = 85.05112878
+
+
+def parse_bbox(bbox: Optional[str]) -> Optional[Tuple[float, float, float, float]]:
+    """
+    Parse a "west,south,east,north" query parameter.
+
+    Raises:
+        HTTPException 400 if the value is malformed
+    """
+    if not bbox:
+        return None
+    try:
+        west, south, east, north = (float(value) for value in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bbox must be 'west,south,east,north'")
+
+    if not (-180 <= west <= 180 and -180 <= east <= 180 and -90 <= south <= north <= 90):
+        raise HTTPException(status_code=400, detail="bbox is out of range")
+    if west > east:
+        raise HTTPException(status_code=400, detail="bbox crossing the antimeridian is not supported")
+
+    return west, south, east, north
+
+
+def lnglat_to_world_px(lng: float, lat: float, zoom: int) -> Tuple[float, float]:
+    """Web Mercator world pixel coordinates at a zoom level (same grid as Leaflet)"""
+    lat = max(-MAX_MERCATOR_LAT, min(MAX_MERCATOR_LAT, lat))
+    scale = TILE_SIZE * (2 ** zoom)
+    x = (lng + 180.0) / 360.0 * scale
+    sin_lat = math.sin(math.radians(lat))
+    y = (0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)) * scale
+    return x, y
+
+
+# ============================================================
+# GEOHASH CELLS
+# ============================================================
+# Every mappable report stores the geohash of its point. Geohashes sharing a
+# prefix share a rectangle, so a bbox becomes a handful of prefix ranges that
+# the (status, geo_cell, timestamp) index can answer with range scans.
+
+GEOHASH_PRECISION = 7            # ~150m x 150m cells
+MAX_COVER_CELLS = 32
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash_encode(lat: float, lng: float, precision: int = GEOHASH_PRECISION) -> str:
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        rng, coord = (lng_range, lng) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if coord >= mid:
+            value = (value << 1) | 1
+            rng[0] = mid
+        else:
+            value <<= 1
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits = 0
+            value = 0
+    return "".join(chars)
+
+
+def _geohash_cell_size(precision: int) -> Tuple[float, float]:
+    """(lat_height, lng_width) in degrees of a geohash cell"""
+    total_bits = precision * 5
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (2 ** lat_bits), 360.0 / (2 ** lng_bits)
+
+
+def geohash_cover(bbox: Tuple[float, float, float, float], max_cells: int = MAX_COVER_CELLS) -> list:
+    """
+    Geohash prefixes whose cells together cover bbox.
+
+    Uses the longest prefix length that needs at most max_cells cells.
+    """
+    west, south, east, north = bbox
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        cell_h, cell_w = _geohash_cell_size(precision)
+        rows = int(north // cell_h) - int(south // cell_h) + 1
+        cols = int(east // cell_w) - int(west // cell_w) + 1
+        if rows * cols > max_cells:
+            continue
+
+        prefixes = set()
+        lat = south
+        while True:
+            lng = west
+            while True:
+                prefixes.add(geohash_encode(min(lat, north), min(lng, east), precision))
+                if lng >= east:
+                    break
+                lng = min(lng + cell_w, east)
+            if lat >= north:
+                break
+            lat = min(lat + cell_h, north)
+        return sorted(prefixes)
+
+    return [""]
+
+
+def geohash_ranges(bbox: Tuple[float, float, float, float]) -> list:
+    """
+    Covering prefixes merged into contiguous (low, high) string ranges.
+
+    A report is inside a range when low <= geo_cell <= high.
+    """
+    ranges = []
+    for prefix in geohash_cover(bbox):
+        if ranges:
+            low, high_prefix = ranges[-1]
+            same_parent = len(prefix) == len(high_prefix) and prefix[:-1] == high_prefix[:-1]
+            if same_parent and _BASE32.index(prefix[-1]) == _BASE32.index(high_prefix[-1]) + 1:
+                ranges[-1] = (low, prefix)
+                continue
+        ranges.append((prefix, prefix))
+    # "~" sorts after every base32 character
+    return [(low, high + "~") for low, high in ranges]
@@ -0,0 +1,244 @@
+import heapq
+import logging
+import struct
+import threading
+import zlib
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from database import SessionLocal
+from models import IncidentReport
+from schemas import IncidentType
+from geo_utils import KENYA_BBOX
+import incident_events
+from incident_events import MapPoint
+
+logger = logging.getLogger("heatmap")
+
+# ============================================================
+# PRECOMPUTED DENSITY HEATMAPS
+# ============================================================
+# Count grids over Kenya at a few resolutions, one layer per
+# (resolution, incident type, time window). Verification events update the
+# affected cells in place; encoded tiles (PNG or quantized bytes) are cached
+# per layer version, so serving a heat layer is a dictionary lookup.
+# Each point remembers which windows it was counted in, and is removed from
+# exactly those; a heap of (timestamp + window) expiries drops points out of
+# the 7d/30d/90d layers as they age, so windows roll forward continuously.
+
+RESOLUTIONS = {          # degrees per cell
+    "coarse": 0.2,
+    "medium": 0.05,
+    "fine": 0.02,
+}
+WINDOWS = {              # None = all time
+    "all": None,
+    "90d": timedelta(days=90),
+    "30d": timedelta(days=30),
+    "7d": timedelta(days=7),
+}
+ALL_TYPES = "all"
+INCIDENT_TYPES = {t.value for t in IncidentType}
+FORMATS = ("png", "u8")
+
+_COUNT_MAX = np.iinfo(np.uint16).max
+
+
+def canonical_type(incident_type: Optional[str]) -> str:
+    """Map free-form stored types onto the schema enum (unknown -> other)"""
+    value = (incident_type or "").lower()
+    return value if value in INCIDENT_TYPES else IncidentType.OTHER.value
+
+
+def _grid_shape(resolution: float) -> Tuple[int, int]:
+    west, south, east, north = KENYA_BBOX
+    rows = int(np.ceil((north - south) / resolution))
+    cols = int(np.ceil((east - west) / resolution))
+    return rows, cols
+
+
+def _cell(resolution: float, lat: float, lng: float) -> Optional[Tuple[int, int]]:
+    west, south, east, north = KENYA_BBOX
+    if not (west <= lng < east and south < lat <= north):
+        return None
+    return int((north - lat) / resolution), int((lng - west) / resolution)
+
+
+def _png_gray8(pixels: np.ndarray) -> bytes:
+    """Minimal 8-bit grayscale PNG encoder (row 0 = north)"""
+    height, width = pixels.shape
+    filtered = np.zeros((height, width + 1), dtype=np.uint8)   # filter byte 0 per row
+    filtered[:, 1:] = pixels
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", zlib.compress(filtered.tobytes(), 9))
+        + chunk(b"IEND", b"")
+    )
+
+
+def quantize(counts: np.ndarray) -> Tuple[np.ndarray, int]:
+    """Log-scale counts into 0..255; returns (pixels, max_count)"""
+    max_count = int(counts.max()) if counts.size else 0
+    if max_count == 0:
+        return np.zeros(counts.shape, dtype=np.uint8), 0
+    scaled = np.log1p(counts.astype(np.float32)) / np.log1p(max_count) * 255.0
+    return np.round(scaled).astype(np.uint8), max_count
+
+
+class HeatmapStore:
+    """Per-process density grids, built lazily and kept current by map events"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._layers: Dict[Tuple[str, str, str], np.ndarray] = {}
+        self._versions: Dict[Tuple[str, str, str], int] = {}
+        self._encoded: Dict[Tuple[str, str, str, str], Tuple[int, bytes, int]] = {}
+        self._points: Dict[int, MapPoint] = {}
+        self._windows: Dict[int, Set[str]] = {}                  # point id -> windows it is counted in
+        self._expiries: List[Tuple[datetime, int, str]] = []     # heap of (leaves window at, point id, window)
+
+    # ---------------- maintenance ----------------
+
+    def _apply(self, point: MapPoint, windows: Iterable[str], delta: int):
+        types = (ALL_TYPES, canonical_type(point.incident_type))
+        windows = tuple(windows)
+
+        for res_name, resolution in RESOLUTIONS.items():
+            cell = _cell(resolution, point.lat, point.lng)
+            if cell is None:
+                continue
+            for window_name in windows:
+                for type_name in types:
+                    key = (res_name, type_name, window_name)
+                    grid = self._layers.get(key)
+                    if grid is None:
+                        grid = self._layers[key] = np.zeros(_grid_shape(resolution), dtype=np.uint16)
+                    current = int(grid[cell])
+                    grid[cell] = min(max(current + delta, 0), _COUNT_MAX)
+                    self._versions[key] = self._versions.get(key, 0) + 1
+
+    def _add(self, point: MapPoint, now: datetime):
+        if point.id in self._points:
+            return
+        windows = set()
+        for name, window in WINDOWS.items():
+            if window is None:
+                windows.add(name)
+            elif point.timestamp is not None and point.timestamp + window > now:
+                windows.add(name)
+                heapq.heappush(self._expiries, (point.timestamp + window, point.id, name))
+        self._points[point.id] = point
+        self._windows[point.id] = windows
+        self._apply(point, windows, +1)
+
+    def _remove(self, point_id: int):
+        point = self._points.pop(point_id, None)
+        if point is not None:
+            self._apply(point, self._windows.pop(point_id), -1)
+
+    def _expire(self, now: datetime):
+        """Drop points from the windows they have aged out of"""
+        while self._expiries and self._expiries[0][0] <= now:
+            leaves_at, point_id, name = heapq.heappop(self._expiries)
+            point = self._points.get(point_id)
+            windows = self._windows.get(point_id)
+            # Stale entry: the point was hidden, or re-added with another timestamp
+            if point is None or name not in windows or point.timestamp + WINDOWS[name] != leaves_at:
+                continue
+            windows.discard(name)
+            self._apply(point, (name,), -1)
+
+    def on_event(self, event: str, point: MapPoint):
+        with self._lock:
+            if not self._loaded:
+                return  # the initial load will read it from the database
+            if event == incident_events.VISIBLE:
+                self._add(point, datetime.utcnow())
+            elif event == incident_events.HIDDEN:
+                self._remove(point.id)
+
+    def _load(self):
+        """Full build from the database, at first use"""
+        self._layers.clear()
+        self._encoded.clear()
+        self._points.clear()
+        self._windows.clear()
+        self._expiries.clear()
+
+        now = datetime.utcnow()
+        db = SessionLocal()
+        try:
+            reports = db.query(IncidentReport).filter(
+                IncidentReport.latitude.isnot(None),
+                IncidentReport.longitude.isnot(None),
+                IncidentReport.status == "verified",
+                IncidentReport.mapping_consent == True
+            ).yield_per(1000)
+            for report in reports:
+                self._add(incident_events.point_from_report(report), now)
+        finally:
+            db.close()
+
+        self._loaded = True
+        logger.info(f"✅ Heatmap grids built from {len(self._points)} points ({len(self._layers)} layers)")
+
+    def ensure_current(self):
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            self._expire(datetime.utcnow())
+
+    # ---------------- serving ----------------
+
+    def tile(self, resolution: str, incident_type: str, window: str, fmt: str) -> Tuple[bytes, int]:
+        """
+        Encoded layer bytes and the max cell count it was scaled against.
+
+        "png": 8-bit grayscale PNG. "u8": zlib-compressed row-major uint8 cells.
+        Both are log-scaled so 255 == the busiest cell of the layer.
+        """
+        self.ensure_current()
+        key = (resolution, incident_type, window)
+
+        with self._lock:
+            version = self._versions.get(key, 0)
+            cached = self._encoded.get(key + (fmt,))
+            if cached and cached[0] == version:
+                return cached[1], cached[2]
+
+            grid = self._layers.get(key)
+            if grid is None:
+                grid = np.zeros(_grid_shape(RESOLUTIONS[resolution]), dtype=np.uint16)
+            pixels, max_count = quantize(grid)
+
+        body = _png_gray8(pixels) if fmt == "png" else zlib.compress(pixels.tobytes(), 9)
+
+        with self._lock:
+            self._encoded[key + (fmt,)] = (version, body, max_count)
+        return body, max_count
+
+    def metadata(self) -> dict:
+        west, south, east, north = KENYA_BBOX
+        return {
+            "bounds": {"west": west, "south": south, "east": east, "north": north},
+            "resolutions": {
+                name: {"degrees": res, "rows": _grid_shape(res)[0], "cols": _grid_shape(res)[1]}
+                for name, res in RESOLUTIONS.items()
+            },
+            "types": [ALL_TYPES] + sorted(INCIDENT_TYPES),
+            "windows": list(WINDOWS),
+            "formats": list(FORMATS),
+        }
+
+
+heatmap_store = HeatmapStore()
+incident_events.subscribe(heatmap_store.on_event)
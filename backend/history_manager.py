@@ -0,0 +1,247 @@
+import logging
+import re
+from typing import Any, List, Optional, Sequence
+
+from geo_utils import KENYA_COUNTIES
+
+logger = logging.getLogger("history_manager")
+
+# ============================================================
+# CHAT HISTORY WINDOWING
+# ============================================================
+# Every turn resends the whole chat history, so a long disclosure makes each
+# later turn slower and costlier. After a turn completes, compact() keeps the
+# last WINDOW_TURNS turns verbatim and folds everything older into an
+# IncidentSummary: the incident fields gathered so far (county, area, type,
+# timeframe, relationship, map consent), whether a report was already saved,
+# which resources were shared, and the tail of the survivor's own words.
+# The summary sits at the head of the history as one user/model exchange.
+#
+# Fields come from the model's own tool calls when it made them (authoritative)
+# and from keyword matching on the dropped user messages otherwise - no extra
+# model call. Only newly dropped turns are read, so compaction cost stays flat.
+# Compaction waits for COMPACT_SLACK extra turns so the prompt prefix is stable
+# between compactions.
+
+WINDOW_TURNS = 6
+COMPACT_SLACK = 4
+DISCLOSURE_CHARS = 800
+SUMMARY_MARKER = "[Summary of the earlier conversation]"
+SUMMARY_ACK = "Understood. I will continue from this summary without asking for these details again."
+CHARS_PER_TOKEN = 4
+
+_COUNTY_PATTERNS = [(county, re.compile(r"\b" + re.escape(county.lower()) + r"\b")) for county in KENYA_COUNTIES]
+
+INCIDENT_TYPE_WORDS = (
+    ("sexual_violence", ("rape", "raped", "sexual", "defiled", "touched me", "alinibaka")),
+    ("physical_violence", ("beat", "hit me", "slap", "punch", "kick", "attack", "choke",
+                           "nilipigwa", "alinipiga")),
+    ("harmful_practices", ("fgm", "circumcis", "forced marriage", "married off")),
+    ("online_gbv", ("online", "whatsapp", "facebook", "instagram", "tiktok", "my photos", "nudes")),
+    ("stalking", ("follows me", "following me", "stalk")),
+    ("economic_abuse", ("took my money", "my salary", "refuses to pay", "won't give me money")),
+    ("emotional_abuse", ("insult", "threaten", "shouts", "humiliat", "controls me")),
+    ("harassment", ("harass", "catcall", "groped")),
+)
+RELATIONSHIP_WORDS = (
+    ("ex_partner", ("ex-husband", "ex husband", "ex-boyfriend", "ex boyfriend", "former partner", "my ex")),
+    ("intimate_partner", ("husband", "wife", "boyfriend", "girlfriend", "partner", "mume wangu", "mpenzi")),
+    ("family_member", ("father", "mother", "uncle", "aunt", "brother", "sister", "cousin", "stepfather",
+                       "in-law", "baba", "mjomba")),
+    ("authority_figure", ("boss", "teacher", "police", "pastor", "manager", "lecturer")),
+    ("colleague", ("colleague", "coworker", "co-worker")),
+    ("acquaintance", ("neighbour", "neighbor", "friend", "landlord")),
+    ("stranger", ("stranger", "a man i don't know", "someone i don't know", "mtu nisiyemjua")),
+)
+TIMEFRAME_PATTERN = re.compile(
+    r"\b(right now|happening now|today|this morning|tonight|yesterday|last night|this week|last week|"
+    r"this month|last month|last year|\d+\s+(?:days?|weeks?|months?|years?)\s+ago|"
+    r"leo|jana|wiki iliyopita|mwezi uliopita|mwaka jana)\b"
+)
+CONSENT_NO = ("don't map", "do not map", "not on the map", "keep it private", "don't show", "do not show",
+              "usiweke kwenye ramani")
+CONSENT_YES = ("on the map", "you can map", "map it", "show it on the map", "weka kwenye ramani")
+
+
+def _first_match(text: str, table) -> Optional[str]:
+    for value, words in table:
+        if any(word in text for word in words):
+            return value
+    return None
+
+
+def _to_dict(message: Any, field: str) -> dict:
+    try:
+        return dict(type(message).to_dict(message).get(field) or {})
+    except Exception:
+        return {}
+
+
+class IncidentSummary:
+    """Incident fields collected from compacted turns"""
+
+    __slots__ = ("county", "specific_area", "incident_type", "timeframe", "relationship", "mapping_consent",
+                 "report_saved", "report_id", "resources_shared", "disclosure", "turns_compacted")
+
+    def __init__(self):
+        self.county: Optional[str] = None
+        self.specific_area: Optional[str] = None
+        self.incident_type: Optional[str] = None
+        self.timeframe: Optional[str] = None
+        self.relationship: Optional[str] = None
+        self.mapping_consent: Optional[bool] = None
+        self.report_saved = False
+        self.report_id: Optional[str] = None
+        self.resources_shared: List[str] = []
+        self.disclosure = ""
+        self.turns_compacted = 0
+
+    # ---------------- extraction ----------------
+
+    def _absorb_user_text(self, text: str):
+        lowered = text.lower()
+        for county, pattern in _COUNTY_PATTERNS:
+            if pattern.search(lowered):
+                self.county = county
+        self.incident_type = _first_match(lowered, INCIDENT_TYPE_WORDS) or self.incident_type
+        self.relationship = _first_match(lowered, RELATIONSHIP_WORDS) or self.relationship
+        timeframe = TIMEFRAME_PATTERN.search(lowered)
+        if timeframe:
+            self.timeframe = timeframe.group(1)
+        if any(phrase in lowered for phrase in CONSENT_NO):
+            self.mapping_consent = False
+        elif any(phrase in lowered for phrase in CONSENT_YES):
+            self.mapping_consent = True
+        self.disclosure = (self.disclosure + " " + text.strip()).strip()[-DISCLOSURE_CHARS:]
+
+    def _absorb_call(self, name: str, args: dict):
+        if name == "save_incident_report":
+            self.county = args.get("county") or self.county
+            self.specific_area = args.get("specific_area") or self.specific_area
+            self.incident_type = args.get("incident_type") or self.incident_type
+            if args.get("timeframe") and args["timeframe"] != "Unknown":
+                self.timeframe = args["timeframe"]
+            if args.get("relationship_type") and args["relationship_type"] != "Unknown":
+                self.relationship = args["relationship_type"]
+            if "mapping_consent" in args:
+                self.mapping_consent = bool(args["mapping_consent"])
+        elif name == "find_resources" and args.get("county"):
+            if args["county"] not in self.resources_shared:
+                self.resources_shared.append(args["county"])
+
+    def _absorb_result(self, name: str, response: dict):
+        result = response.get("result", response)
+        if name == "save_incident_report" and isinstance(result, dict) and result.get("success"):
+            self.report_saved = True
+            self.report_id = result.get("report_id") or self.report_id
+
+    def absorb(self, contents: Sequence[Any]):
+        for content in contents:
+            for part in content.parts:
+                if "function_call" in part:
+                    self._absorb_call(part.function_call.name, _to_dict(part.function_call, "args"))
+                elif "function_response" in part:
+                    self._absorb_result(part.function_response.name, _to_dict(part.function_response, "response"))
+                elif part.text and content.role == "user":
+                    self._absorb_user_text(part.text)
+
+    # ---------------- rendering ----------------
+
+    def render(self) -> str:
+        def show(value):
+            return "not yet known" if value in (None, "") else value
+
+        consent = {True: "yes", False: "no - keep private"}.get(self.mapping_consent, "not yet asked")
+        saved = f"yes (report {self.report_id}) - do not save it again" if self.report_saved else "no"
+        lines = [
+            SUMMARY_MARKER,
+            f"County: {show(self.county)}",
+            f"Specific area: {show(self.specific_area)}",
+            f"Incident type: {show(self.incident_type)}",
+            f"Timeframe: {show(self.timeframe)}",
+            f"Relationship to perpetrator: {show(self.relationship)}",
+            f"Map consent: {consent}",
+            f"Report saved: {saved}",
+            f"Resources already shared for: {', '.join(self.resources_shared) or 'none'}",
+            f"Survivor's earlier words: \"{self.disclosure}\"" if self.disclosure else "",
+        ]
+        return "\n".join(line for line in lines if line)
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+# ---------------- history handling ----------------
+
+def _is_turn_start(content: Any) -> bool:
+    return content.role == "user" and any(part.text for part in content.parts)
+
+
+def _is_summary(content: Any) -> bool:
+    return content.role == "user" and bool(content.parts) and content.parts[0].text.startswith(SUMMARY_MARKER)
+
+
+def split_turns(history: Sequence[Any]) -> List[List[Any]]:
+    """History (minus a leading summary exchange) grouped into turns, each starting at a user message"""
+    contents = list(history)
+    if contents and _is_summary(contents[0]):
+        contents = contents[2:]
+    turns: List[List[Any]] = []
+    for content in contents:
+        if _is_turn_start(content) or not turns:
+            turns.append([content])
+        else:
+            turns[-1].append(content)
+    return turns
+
+
+def summary_exchange(summary: IncidentSummary) -> List[Any]:
+    from google.generativeai import protos
+    return [
+        protos.Content(role="user", parts=[protos.Part(text=summary.render())]),
+        protos.Content(role="model", parts=[protos.Part(text=SUMMARY_ACK)]),
+    ]
+
+
+def compact(session: Any, window_turns: int = WINDOW_TURNS, slack: int = COMPACT_SLACK) -> bool:
+    """Fold turns older than the window into session.summary; True if the history changed"""
+    turns = split_turns(session.chat.history)
+    if len(turns) <= window_turns + slack:
+        return False
+
+    dropped, kept = turns[:-window_turns], turns[-window_turns:]
+    if session.summary is None:
+        session.summary = IncidentSummary()
+    session.summary.absorb([content for turn in dropped for content in turn])
+    session.summary.turns_compacted += len(dropped)
+
+    session.chat.history = summary_exchange(session.summary) + [content for turn in kept for content in turn]
+    logger.info(f"🗜️ Compacted {len(dropped)} turns of {session.key} "
+                f"({session.summary.turns_compacted} total, {len(kept)} kept)")
+    return True
+
+
+def flush_pending(session: Any) -> int:
+    """Move exchanges answered without the model into the chat history (call under the session's turn)"""
+    pending, session.pending = session.pending, []
+    if not pending:
+        return 0
+    from google.generativeai import protos
+    contents = []
+    for user_text, reply_text in pending:
+        contents.append(protos.Content(role="user", parts=[protos.Part(text=user_text)]))
+        contents.append(protos.Content(role="model", parts=[protos.Part(text=reply_text)]))
+    session.chat.history = list(session.chat.history) + contents
+    return len(pending)
+
+
+def context_tokens(history: Sequence[Any]) -> int:
+    """Rough token estimate of what the next turn resends (~4 characters per token)"""
+    chars = 0
+    for content in history:
+        for part in content.parts:
+            if part.text:
+                chars += len(part.text)
+            elif "function_call" in part or "function_response" in part:
+                chars += len(str(part))
+    return chars // CHARS_PER_TOKEN
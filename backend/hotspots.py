@@ -0,0 +1,290 @@
+import logging
+import math
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from database import SessionLocal
+from models import IncidentReport
+from geo_utils import KENYA_BBOX
+import incident_events
+from incident_events import MapPoint
+
+logger = logging.getLogger("hotspots")
+
+# ============================================================
+# GRID-ACCELERATED DENSITY HOTSPOTS
+# ============================================================
+# Grid DBSCAN over verified coordinates. Points are binned into EPS_KM cells
+# whose running sums (count, lat, lng, lat^2, lng^2) are updated in place on
+# every verification event. Clustering then works on cells, not points:
+#   - a cell is "dense" when its 3x3 neighbourhood holds >= MIN_POINTS reports
+#   - 8-connected dense cells form one hotspot (label propagation)
+#   - non-dense cells touching a hotspot join it as border cells
+# Every step is a vectorized NumPy pass over the occupied cells, and the
+# result is cached until the data changes. Each cell also counts the
+# (county, specific_area) of its reports, so a hotspot is labelled with the
+# main county of its cells and the main area within that county.
+
+EPS_KM = 1.0
+MIN_POINTS = 5
+MAX_HOTSPOTS = 50
+
+KM_PER_DEGREE = 111.32
+CELL_DEG = EPS_KM / KM_PER_DEGREE
+
+_WEST, _SOUTH, _EAST, _NORTH = KENYA_BBOX
+_COLS = int(math.ceil((_EAST - _WEST) / CELL_DEG)) + 2
+_NEIGHBOUR_OFFSETS = [(dr, dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1)]
+
+# Columns of the per-cell aggregate matrix
+_COUNT, _SUM_LAT, _SUM_LNG, _SUM_LAT2, _SUM_LNG2 = range(5)
+
+
+def _cell_keys(lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+    rows = np.floor((lats - _SOUTH) / CELL_DEG).astype(np.int64)
+    cols = np.floor((lngs - _WEST) / CELL_DEG).astype(np.int64) + 1
+    return rows * _COLS + cols
+
+
+def find_hotspots(keys: np.ndarray, stats: np.ndarray, min_points: int = MIN_POINTS,
+                  limit: int = MAX_HOTSPOTS, cells_out: Optional[list] = None) -> List[dict]:
+    """
+    Cluster occupied cells.
+
+    Args:
+        keys: sorted, unique int64 cell keys
+        stats: (n, 5) float64 aggregates aligned with keys
+        cells_out: if given, receives the member cell keys of each hotspot (same order)
+
+    Returns:
+        hotspots sorted by count: centroid, RMS radius (km), count, cell count
+    """
+    n = len(keys)
+    if n == 0:
+        return []
+
+    counts = stats[:, _COUNT]
+
+    # Neighbour index for each of the 9 offsets (-1 where the cell is empty)
+    neighbour_idx = np.full((len(_NEIGHBOUR_OFFSETS), n), -1, dtype=np.int64)
+    for i, (dr, dc) in enumerate(_NEIGHBOUR_OFFSETS):
+        target = keys + dr * _COLS + dc
+        pos = np.searchsorted(keys, target)
+        pos_clipped = np.minimum(pos, n - 1)
+        found = keys[pos_clipped] == target
+        neighbour_idx[i] = np.where(found, pos_clipped, -1)
+
+    present = neighbour_idx >= 0
+    density = np.where(present, counts[np.maximum(neighbour_idx, 0)], 0).sum(axis=0)
+    dense = density >= min_points
+    if not dense.any():
+        return []
+
+    # Connected components of dense cells (min-label propagation + pointer jumping)
+    labels = np.where(dense, np.arange(n), n)
+    edge_src = np.concatenate([np.nonzero(present[i] & dense)[0] for i in range(len(_NEIGHBOUR_OFFSETS))])
+    edge_dst = np.concatenate([neighbour_idx[i][present[i] & dense] for i in range(len(_NEIGHBOUR_OFFSETS))])
+    dense_edge = dense[edge_dst]
+    edge_src, edge_dst = edge_src[dense_edge], edge_dst[dense_edge]
+
+    while True:
+        previous = labels.copy()
+        np.minimum.at(labels, edge_src, labels[edge_dst])
+        np.minimum.at(labels, edge_dst, labels[edge_src])
+        labels = np.where(dense, labels[np.minimum(labels, n - 1)], n)
+        if np.array_equal(labels, previous):
+            break
+
+    # Border cells join the smallest-labelled dense neighbour
+    neighbour_labels = np.where(present, labels[np.maximum(neighbour_idx, 0)], n)
+    neighbour_labels = np.where(present & dense[np.maximum(neighbour_idx, 0)], neighbour_labels, n)
+    border_label = neighbour_labels.min(axis=0)
+    labels = np.where(dense, labels, border_label)
+
+    member = labels < n
+    cluster_ids, inverse = np.unique(labels[member], return_inverse=True)
+    totals = np.zeros((len(cluster_ids), stats.shape[1]))
+    np.add.at(totals, inverse, stats[member])
+    cell_counts = np.bincount(inverse, minlength=len(cluster_ids))
+
+    order = np.argsort(-totals[:, _COUNT])[:limit]
+    if cells_out is not None:
+        by_cluster = np.argsort(inverse, kind="stable")
+        starts = np.concatenate([[0], np.cumsum(cell_counts)])
+        member_keys = keys[member][by_cluster]
+        cells_out.extend(member_keys[starts[idx]:starts[idx + 1]] for idx in order)
+    hotspots = []
+    for idx in order:
+        count = totals[idx, _COUNT]
+        mean_lat = totals[idx, _SUM_LAT] / count
+        mean_lng = totals[idx, _SUM_LNG] / count
+        var_lat = max(totals[idx, _SUM_LAT2] / count - mean_lat ** 2, 0.0)
+        var_lng = max(totals[idx, _SUM_LNG2] / count - mean_lng ** 2, 0.0)
+        km_per_deg_lng = KM_PER_DEGREE * math.cos(math.radians(mean_lat))
+        radius_km = math.sqrt(var_lat * KM_PER_DEGREE ** 2 + var_lng * km_per_deg_lng ** 2)
+        hotspots.append({
+            "latitude": round(float(mean_lat), 6),
+            "longitude": round(float(mean_lng), 6),
+            "radius_km": round(max(radius_km, EPS_KM / 2), 3),
+            "count": int(count),
+            "cells": int(cell_counts[idx]),
+        })
+    return hotspots
+
+
+class HotspotEngine:
+    """Per-process hotspot engine, built lazily and kept current by map events"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._ids = set()
+        self._cell_index: Dict[int, int] = {}
+        self._keys = np.zeros(0, dtype=np.int64)
+        self._stats = np.zeros((0, 5), dtype=np.float64)
+        self._cell_labels: Dict[int, Counter] = {}     # cell key -> Counter of (county, area)
+        self._version = 0
+        self._cached_version = -1
+        self._cached: List[dict] = []
+
+    # ---------------- maintenance ----------------
+
+    def load_points(self, ids, lats: np.ndarray, lngs: np.ndarray,
+                    labels: Optional[Sequence[Tuple[Optional[str], Optional[str]]]] = None):
+        """Bulk-add points with one vectorized pass (initial load / benchmarks); labels are (county, area)"""
+        with self._lock:
+            self._load_points(ids, lats, lngs, labels)
+
+    def _load_points(self, ids, lats: np.ndarray, lngs: np.ndarray, labels=None):
+        fresh = np.array([pid not in self._ids for pid in ids], dtype=bool)
+        lats, lngs = lats[fresh], lngs[fresh]
+        self._ids.update(pid for pid, keep in zip(ids, fresh) if keep)
+        if len(lats) == 0:
+            return
+
+        keys = _cell_keys(lats, lngs)
+        if labels is not None:
+            fresh_labels = (label for label, keep in zip(labels, fresh) if keep)
+            for key, (county, area) in zip(keys.tolist(), fresh_labels):
+                self._count_label(key, county, area, 1)
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        values = np.column_stack([np.ones_like(lats), lats, lngs, lats ** 2, lngs ** 2])
+        sums = np.zeros((len(unique_keys), 5))
+        np.add.at(sums, inverse, values)
+
+        new_keys = [k for k in unique_keys.tolist() if k not in self._cell_index]
+        if new_keys:
+            start = len(self._keys)
+            self._keys = np.concatenate([self._keys, np.array(new_keys, dtype=np.int64)])
+            self._stats = np.vstack([self._stats, np.zeros((len(new_keys), 5))])
+            for offset, key in enumerate(new_keys):
+                self._cell_index[key] = start + offset
+
+        rows = np.array([self._cell_index[k] for k in unique_keys.tolist()], dtype=np.int64)
+        self._stats[rows] += sums
+        self._version += 1
+
+    def _count_label(self, key: int, county: Optional[str], area: Optional[str], delta: int):
+        label = (county or None, (area or "").strip() or None)
+        counter = self._cell_labels.setdefault(key, Counter())
+        counter[label] += delta
+        if counter[label] <= 0:
+            del counter[label]
+            if not counter:
+                del self._cell_labels[key]
+
+    def _apply(self, point: MapPoint, sign: float):
+        key = int(_cell_keys(np.array([point.lat]), np.array([point.lng]))[0])
+        self._count_label(key, point.county, point.area, int(sign))
+        row = self._cell_index.get(key)
+        if row is None:
+            row = self._cell_index[key] = len(self._keys)
+            self._keys = np.append(self._keys, np.int64(key))
+            self._stats = np.vstack([self._stats, np.zeros((1, 5))])
+        self._stats[row] += sign * np.array([1.0, point.lat, point.lng, point.lat ** 2, point.lng ** 2])
+        self._version += 1
+
+    def on_event(self, event: str, point: MapPoint):
+        with self._lock:
+            if not self._loaded:
+                return  # the initial load will read it from the database
+            if event == incident_events.VISIBLE and point.id not in self._ids:
+                self._ids.add(point.id)
+                self._apply(point, +1.0)
+            elif event == incident_events.HIDDEN and point.id in self._ids:
+                self._ids.discard(point.id)
+                self._apply(point, -1.0)
+
+    def ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            db = SessionLocal()
+            try:
+                rows = db.query(
+                    IncidentReport.id, IncidentReport.latitude, IncidentReport.longitude,
+                    IncidentReport.county, IncidentReport.specific_area
+                ).filter(
+                    IncidentReport.latitude.isnot(None),
+                    IncidentReport.longitude.isnot(None),
+                    IncidentReport.status == "verified",
+                    IncidentReport.mapping_consent == True
+                ).all()
+            finally:
+                db.close()
+
+            if rows:
+                coords = np.array([(row[1], row[2]) for row in rows], dtype=np.float64)
+                self._load_points([row[0] for row in rows], coords[:, 0], coords[:, 1],
+                                  [(row[3], row[4]) for row in rows])
+            self._loaded = True
+            logger.info(f"✅ Hotspot engine loaded with {len(self._ids)} points in {len(self._keys)} cells")
+
+    # ---------------- queries ----------------
+
+    def _label(self, cell_keys: np.ndarray) -> Tuple[Optional[str], Optional[str]]:
+        """Main county of a hotspot's reports, and its main named area within that county"""
+        totals: Counter = Counter()
+        for key in cell_keys.tolist():
+            totals.update(self._cell_labels.get(key, ()))
+        counties: Counter = Counter()
+        for (county, _), count in totals.items():
+            if county:
+                counties[county] += count
+        if not counties:
+            return None, None
+        county = counties.most_common(1)[0][0]
+        areas = Counter({area: count for (c, area), count in totals.items() if c == county and area})
+        return county, areas.most_common(1)[0][0] if areas else None
+
+    def hotspots(self, min_points: Optional[int] = None) -> List[dict]:
+        """Current hotspots; recomputed only when the data changed"""
+        self.ensure_loaded()
+        with self._lock:
+            if min_points is None and self._cached_version == self._version:
+                return self._cached
+
+            occupied = self._stats[:, _COUNT] > 0
+            keys, stats = self._keys[occupied], self._stats[occupied]
+            version = self._version
+
+        order = np.argsort(keys)
+        cells: list = []
+        result = find_hotspots(keys[order], stats[order], min_points=min_points or MIN_POINTS, cells_out=cells)
+        with self._lock:
+            for hotspot, cell_keys in zip(result, cells):
+                hotspot["county"], hotspot["area"] = self._label(cell_keys)
+
+        if min_points is None:
+            with self._lock:
+                self._cached, self._cached_version = result, version
+        return result
+
+
+hotspot_engine = HotspotEngine()
+incident_events.subscribe(hotspot_engine.on_event)
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import IdempotencyRecord
+
+logger = logging.getLogger("idempotency")
+
+# ============================================================
+# AT-MOST-ONCE TOOL CALLS
+# ============================================================
+# When /chat times out, the fallback model replays the same user turn on a fresh
+# chat session and may call save_incident_report again. Every /chat or
+# /chat/stream request gets a unique turn id (the client's message_id if it sent
+# one - reused only when it retries that same message - else a fresh uuid), and
+# a tool call is keyed by (session, turn id, tool) plus the tool's *stable*
+# arguments - the ones a replaying model repeats verbatim (county, incident
+# type), never free text it rephrases (descriptions, emotional state). A call
+# under that key runs once and any repeat gets the stored result back without
+# touching the report tables; a report of another type or county in the same
+# turn has its own key.
+
+IDEMPOTENCY_TTL = timedelta(hours=24)
+MEMORY_CACHE_SIZE = 5000
+PURGE_EVERY_N_RECORDS = 100
+
+_current_turn: ContextVar[Optional[str]] = ContextVar("vee_current_turn", default=None)
+
+_lock = threading.Lock()
+_completed: "OrderedDict[str, tuple]" = OrderedDict()   # key -> (created_at, result)
+_records_since_purge = 0
+
+
+def begin_turn(session_key: str, message_id: Optional[str] = None) -> str:
+    """
+    Start a new user turn for a chat session and bind it to the current context.
+
+    Call once per incoming request, before any LLM attempt; retries, model
+    fallbacks and hedges inside the same request share the turn. Nothing is
+    derived from process state, so restarts and returning sessions (or the
+    shared "default" session id) never reuse a turn key. The binding follows the
+    request into worker threads (asyncio.to_thread and llm_pool.run copy the context).
+    """
+    turn_key = f"{session_key}#{message_id or uuid.uuid4().hex}"
+    _current_turn.set(turn_key)
+    return turn_key
+
+
+def _canonical(value: Any) -> Any:
+    """Argument value with the differences a replaying model may introduce (case, spacing) removed"""
+    if isinstance(value, str):
+        return " ".join(value.lower().split())
+    if isinstance(value, float):
+        return round(value, 5)
+    return value
+
+
+def tool_call_key(tool_name: str, arguments: Dict[str, Any]) -> Optional[str]:
+    """Idempotency key for a tool call in the current turn (None outside /chat); pass only stable arguments"""
+    turn_key = _current_turn.get()
+    if not turn_key:
+        return None
+    canonical = json.dumps({name: _canonical(value) for name, value in arguments.items()},
+                           sort_keys=True, default=str)
+    return hashlib.sha256(f"{turn_key}|{tool_name}|{canonical}".encode()).hexdigest()
+
+
+def lookup(key: str) -> Optional[Dict[str, Any]]:
+    """Return the stored result for a completed call, memory first then database"""
+    cutoff = datetime.utcnow() - IDEMPOTENCY_TTL
+
+    with _lock:
+        entry = _completed.get(key)
+        if entry and entry[0] >= cutoff:
+            return entry[1]
+
+    db: Session = SessionLocal()
+    try:
+        record = db.query(IdempotencyRecord).filter(
+            IdempotencyRecord.key == key,
+            IdempotencyRecord.created_at >= cutoff
+        ).first()
+        if not record:
+            return None
+        result = json.loads(record.result)
+        remember(key, result, record.created_at)
+        return result
+    finally:
+        db.close()
+
+
+def record(db: Session, key: str, result: Dict[str, Any]):
+    """
+    Add the completed-call record to the caller's transaction.
+
+    Commit it together with the work it describes: the primary key makes a
+    concurrent duplicate fail at commit, so the work happens at most once.
+    """
+    global _records_since_purge
+
+    db.add(IdempotencyRecord(key=key, result=json.dumps(result), created_at=datetime.utcnow()))
+
+    with _lock:
+        _records_since_purge += 1
+        should_purge = _records_since_purge >= PURGE_EVERY_N_RECORDS
+        if should_purge:
+            _records_since_purge = 0
+
+    if should_purge:
+        db.query(IdempotencyRecord).filter(
+            IdempotencyRecord.created_at < datetime.utcnow() - IDEMPOTENCY_TTL
+        ).delete(synchronize_session=False)
+
+
+def remember(key: str, result: Dict[str, Any], created_at: datetime = None):
+    """Cache a completed result in memory (after the transaction committed)"""
+    with _lock:
+        _completed[key] = (created_at or datetime.utcnow(), result)
+        _completed.move_to_end(key)
+        while len(_completed) > MEMORY_CACHE_SIZE:
+            _completed.popitem(last=False)
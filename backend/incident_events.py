@@ -0,0 +1,99 @@
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from crypto_utils import blind_index_token
+
+logger = logging.getLogger("incident_events")
+
+# ============================================================
+# MAP VISIBILITY EVENTS
+# ============================================================
+# A report is "mappable" when it is verified, has mapping consent and has
+# coordinates. In-memory map indexes subscribe here and are updated
+# incrementally when a report becomes visible (auto-verified save, admin
+# approval) or hidden (admin rejection), instead of rescanning the table.
+
+VISIBLE = "visible"
+HIDDEN = "hidden"
+
+
+@dataclass(frozen=True)
+class MapPoint:
+    """Public, anonymized view of a mappable report"""
+    id: int
+    lat: float
+    lng: float
+    incident_type: Optional[str]
+    county: Optional[str]
+    area: Optional[str]
+    timeframe: Optional[str]
+    timestamp: Optional[datetime]
+
+    def to_public_dict(self) -> dict:
+        """Same shape as the /api/incidents payload"""
+        return {
+            "id": public_point_id(self.id),
+            "lat": self.lat,
+            "lng": self.lng,
+            "type": self.incident_type,
+            "county": self.county,
+            "area": self.area,
+            "timeframe": self.timeframe,
+        }
+
+
+Listener = Callable[[str, MapPoint], None]
+_listeners: List[Listener] = []
+
+
+def public_point_id(report_id: int) -> str:
+    """Stable opaque map id, so clients can apply deltas without learning row ids"""
+    return blind_index_token(f"map-point:{report_id}")[:16]
+
+
+def is_mappable(report) -> bool:
+    return (
+        report.status == "verified"
+        and bool(report.mapping_consent)
+        and report.latitude is not None
+        and report.longitude is not None
+    )
+
+
+def point_from_report(report) -> MapPoint:
+    return MapPoint(
+        id=report.id,
+        lat=float(report.latitude),
+        lng=float(report.longitude),
+        incident_type=report.incident_type,
+        county=report.county,
+        area=report.specific_area,
+        timeframe=report.timeframe,
+        timestamp=report.timestamp,
+    )
+
+
+def subscribe(listener: Listener) -> Listener:
+    """Register a listener called as listener(event, point)"""
+    _listeners.append(listener)
+    return listener
+
+
+def publish(event: str, point: MapPoint):
+    """Notify listeners; a failing listener never breaks the write path"""
+    for listener in _listeners:
+        try:
+            listener(event, point)
+        except Exception as e:
+            logger.error(f"❌ Map event listener {getattr(listener, '__qualname__', listener)} failed: {e}")
+
+
+def publish_transition(was_mappable: bool, report):
+    """Publish VISIBLE/HIDDEN after a committed change, if visibility actually changed"""
+    now_mappable = is_mappable(report)
+    if now_mappable and not was_mappable:
+        publish(VISIBLE, point_from_report(report))
+    elif was_mappable and not now_mappable:
+        publish(HIDDEN, point_from_report(report))
@@ -0,0 +1,383 @@
+import logging
+import re
+import threading
+import time
+import zlib
+from collections import Counter, deque
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from geo_utils import KENYA_COUNTIES
+from history_manager import INCIDENT_TYPE_WORDS
+from resource_registry import resource_directory
+
+logger = logging.getLogger("intent_router")
+
+# ============================================================
+# FAST-PATH INTENT ROUTER
+# ============================================================
+# Runs in front of the LLM on every chat turn and answers three kinds of
+# message locally, in well under a millisecond:
+#   emergency / self_harm  danger or suicidal language -> 999 / 1195 right away
+#   greeting               a short hello -> canned bilingual welcome
+#   resources              "where can I get help in Kisumu" -> resource_registry
+# Everything else ("open") goes to the model.
+#
+# Phrases are matched with one Aho-Corasick automaton over normalized text
+# (English and Swahili). Greetings and resource questions that miss the
+# phrase lists fall back to a small linear model (hashed unigrams and
+# bigrams, softmax regression trained during the warmup on SEED_EXAMPLES)
+# that must be confident before a turn skips the LLM. A message that
+# describes an incident always goes to the model, so a report is never
+# short-circuited into a resource list.
+#
+# Emergencies are found by phrase and stay recall-first, but a phrase hit
+# only answers locally when nothing argues against it: no negation or
+# reported-speech marker ("it's not an emergency", "he said he would kill
+# me") and either the model agrees or no other intent is confident. A hit
+# that is overruled still reaches the model, flagged (FastReply.flag) so the
+# turn leads with the emergency numbers instead of skipping the report.
+
+FEATURE_DIM = 1 << 12
+MIN_CONFIDENCE = 0.85
+MAX_GREETING_WORDS = 5
+MAX_RESOURCE_WORDS = 25
+LATENCY_SAMPLES = 1000
+
+EMERGENCY = "emergency"
+SELF_HARM = "self_harm"
+GREETING = "greeting"
+RESOURCES = "resources"
+OPEN = "open"
+CLASSES = (GREETING, RESOURCES, EMERGENCY, SELF_HARM, OPEN)
+DEFUSED = "defused"
+HELP = "help"
+
+PHRASES: Dict[str, Tuple[str, ...]] = {
+    EMERGENCY: (
+        "he is here", "she is here", "he's here", "they are here", "he is coming", "he is outside",
+        "outside my door", "breaking the door", "break the door", "locked me in", "has a knife",
+        "has a gun", "has a panga", "with a knife", "with a gun", "with a panga", "going to kill me",
+        "will kill me", "trying to kill me", "kill me", "i am bleeding", "i'm bleeding", "can't breathe",
+        "help me now", "emergency", "yuko hapa", "amekuja", "yuko nje", "ana kisu", "ana bunduki",
+        "ana panga", "ataniua", "anataka kuniua", "natoka damu", "msaada haraka", "dharura",
+    ),
+    SELF_HARM: (
+        "kill myself", "end my life", "want to die", "wanna die", "suicide", "suicidal",
+        "no reason to live", "better off dead", "hurt myself", "nataka kufa", "kujiua", "najiua",
+        "sitaki kuishi",
+    ),
+    # Any ask for help: a message carrying one is never answered with the greeting
+    HELP: ("help", "help me", "saidia", "nisaidie", "tusaidie", "nisaidieni", "msaada", "naomba msaada"),
+    # Negations and reported speech: the danger words are not about right now
+    DEFUSED: (
+        "not an emergency", "isn't an emergency", "not emergency", "no emergency", "not in danger",
+        "i'm safe now", "i am safe now", "he said", "she said", "they said", "told me", "threatened",
+        "used to", "last year", "last month", "last week", "years ago", "my friend", "si dharura",
+        "sio dharura", "hakuna dharura", "niko salama", "alisema", "aliniambia", "alitishia", "mwaka jana",
+        "wiki iliyopita", "rafiki yangu",
+    ),
+    GREETING: (
+        "hi", "hello", "hey", "hallo", "good morning", "good afternoon", "good evening", "hi vee",
+        "hello vee", "habari", "habari yako", "hujambo", "jambo", "mambo", "niaje", "shikamoo",
+    ),
+    RESOURCES: (
+        "where can i get help", "where can i go", "who can help", "help near", "get help", "need help",
+        "hospital", "clinic", "doctor", "shelter", "safe house", "lawyer", "legal aid", "legal help",
+        "counselor", "counsellor", "counseling", "counselling", "therapist", "police station",
+        "gender desk", "helpline", "hotline", "phone number", "msaada", "nisaidie", "hospitali",
+        "kliniki", "daktari", "wakili", "ushauri", "kituo cha polisi", "mahali salama",
+    ),
+    "svc:medical": ("hospital", "clinic", "doctor", "medical", "pep", "hospitali", "kliniki", "daktari"),
+    "svc:legal": ("lawyer", "legal", "court", "wakili", "sheria"),
+    "svc:counseling": ("counselor", "counsellor", "counseling", "counselling", "therapist", "talk to someone",
+                       "ushauri"),
+}
+
+# Towns people name instead of their county
+TOWN_COUNTIES = {
+    "eldoret": "Uasin Gishu", "thika": "Kiambu", "ruiru": "Kiambu", "kitale": "Trans Nzoia",
+    "malindi": "Kilifi", "naivasha": "Nakuru", "nanyuki": "Laikipia", "kitengela": "Kajiado",
+    "ngong": "Kajiado", "rongai": "Kajiado", "athi river": "Machakos", "kibera": "Nairobi",
+    "westlands": "Nairobi", "eastleigh": "Nairobi", "kondele": "Kisumu", "nyali": "Mombasa",
+    "likoni": "Mombasa", "ukunda": "Kwale", "voi": "Taita Taveta", "kericho town": "Kericho",
+}
+
+SEED_EXAMPLES: Tuple[Tuple[str, str], ...] = (
+    ("hi", GREETING), ("hello there", GREETING), ("hey vee", GREETING), ("good morning", GREETING),
+    ("good evening vee", GREETING), ("hi how are you", GREETING), ("hello is anyone there", GREETING),
+    ("habari yako", GREETING), ("habari za asubuhi", GREETING), ("hujambo vee", GREETING),
+    ("mambo vipi", GREETING), ("sasa vee", GREETING), ("niaje", GREETING),
+    ("where can i get help in kisumu", RESOURCES), ("is there a hospital near me in nakuru", RESOURCES),
+    ("i need a lawyer in mombasa", RESOURCES), ("which clinic gives pep in nairobi", RESOURCES),
+    ("where is the nearest shelter", RESOURCES), ("who can i talk to in eldoret", RESOURCES),
+    ("give me the number for a counselor in kiambu", RESOURCES), ("police gender desk in thika", RESOURCES),
+    ("where can i go for help", RESOURCES), ("ninaweza kupata msaada wapi kisumu", RESOURCES),
+    ("hospitali iko wapi nakuru", RESOURCES), ("nahitaji wakili mombasa", RESOURCES),
+    ("nambari ya simu ya msaada", RESOURCES), ("kuna mahali salama nairobi", RESOURCES),
+    ("nisaidie sasa", RESOURCES), ("msaada sasa", RESOURCES), ("hey help", RESOURCES), ("hi i need help", RESOURCES),
+    ("he is here with a knife", EMERGENCY), ("he is breaking the door", EMERGENCY),
+    ("help me now he is coming", EMERGENCY), ("he has a gun", EMERGENCY), ("they are outside my door", EMERGENCY),
+    ("i am bleeding please", EMERGENCY), ("he is going to kill me", EMERGENCY), ("emergency please", EMERGENCY),
+    ("yuko hapa ana kisu", EMERGENCY), ("anataka kuniua sasa", EMERGENCY), ("dharura msaada haraka", EMERGENCY),
+    ("i want to kill myself", SELF_HARM), ("i want to die", SELF_HARM), ("i don't want to live anymore", SELF_HARM),
+    ("i am going to end my life", SELF_HARM), ("i am suicidal", SELF_HARM), ("nataka kufa", SELF_HARM),
+    ("nataka kujiua", SELF_HARM), ("sitaki kuishi tena", SELF_HARM),
+    ("my husband beat me last night", OPEN), ("i don't know how to say this", OPEN),
+    ("it started when we moved", OPEN), ("he takes all my money", OPEN), ("i am scared to go home", OPEN),
+    ("my boss keeps touching me at work", OPEN), ("i want to report what happened", OPEN),
+    ("thank you for listening", OPEN), ("yes you can put it on the map", OPEN), ("it was last week", OPEN),
+    ("i feel like it's my fault", OPEN), ("can you keep this private", OPEN), ("what will happen now", OPEN),
+    ("he shouts at me every day", OPEN), ("nilipigwa na mume wangu", OPEN), ("naogopa kurudi nyumbani", OPEN),
+    ("asante kwa kunisikiliza", OPEN), ("ilitokea wiki iliyopita", OPEN), ("sijui nianzie wapi", OPEN),
+    ("it's not an emergency i want to report something", OPEN), ("he said he would kill me", OPEN),
+    ("he told me he would kill me if i left", OPEN), ("last year he threatened me with a knife", OPEN),
+    ("my friend said she wants to die", OPEN), ("i want to report that he hit me", OPEN),
+    ("alisema ataniua", OPEN), ("si dharura nataka kuripoti", OPEN),
+)
+
+_NON_WORD = re.compile(r"[^\w']+")
+_DISCLOSURE_WORDS = tuple(word for _, words in INCIDENT_TYPE_WORDS for word in words)
+
+
+def normalize(text: str) -> str:
+    return " ".join(_NON_WORD.sub(" ", text.lower()).split())
+
+
+# ---------------- keyword automaton ----------------
+
+class PhraseAutomaton:
+    """Aho-Corasick over whole words: every labelled phrase found in one pass"""
+
+    def __init__(self, phrases: Iterable[Tuple[str, str]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Set[str]] = [set()]
+        for phrase, label in phrases:
+            self._add(f" {normalize(phrase)} ", label)
+        self._link()
+
+    def _add(self, phrase: str, label: str):
+        state = 0
+        for char in phrase:
+            nxt = self._goto[state].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(set())
+            state = nxt
+        self._out[state].add(label)
+
+    def _link(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(char, 0)
+                self._out[nxt] |= self._out[self._fail[nxt]]
+
+    def find(self, normalized: str) -> Set[str]:
+        labels: Set[str] = set()
+        state = 0
+        for char in f" {normalized} ":
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            if self._out[state]:
+                labels |= self._out[state]
+        return labels
+
+
+# ---------------- linear model ----------------
+
+def _features(normalized: str) -> np.ndarray:
+    vector = np.zeros(FEATURE_DIM, dtype=np.float32)
+    words = normalized.split()
+    for token in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+        vector[zlib.crc32(token.encode()) % FEATURE_DIM] += 1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class LinearIntentModel:
+    """Softmax regression over hashed n-grams; trained in a few ms during the startup warmup"""
+
+    def __init__(self, examples: Iterable[Tuple[str, str]], epochs: int = 300, learning_rate: float = 2.0,
+                 l2: float = 1e-3):
+        examples = list(examples)
+        x = np.stack([_features(normalize(text)) for text, _ in examples])
+        y = np.zeros((len(examples), len(CLASSES)), dtype=np.float32)
+        for row, (_, label) in enumerate(examples):
+            y[row, CLASSES.index(label)] = 1.0
+        # Hashed columns no example uses keep zero weight, so train on the used ones only
+        used = np.flatnonzero(x.any(axis=0))
+        x = x[:, used]
+        weights = np.zeros((len(used), len(CLASSES)), dtype=np.float32)
+        self.bias = np.zeros(len(CLASSES), dtype=np.float32)
+        for _ in range(epochs):
+            probs = self._softmax(x @ weights + self.bias)
+            grad = probs - y
+            weights -= learning_rate * (x.T @ grad / len(examples) + l2 * weights)
+            self.bias -= learning_rate * grad.mean(axis=0)
+        self.weights = np.zeros((FEATURE_DIM, len(CLASSES)), dtype=np.float32)
+        self.weights[used] = weights
+
+    @staticmethod
+    def _softmax(logits: np.ndarray) -> np.ndarray:
+        logits = logits - logits.max(axis=-1, keepdims=True)
+        exp = np.exp(logits)
+        return exp / exp.sum(axis=-1, keepdims=True)
+
+    def predict(self, normalized: str) -> Tuple[str, float]:
+        probs = self._softmax(_features(normalized) @ self.weights + self.bias)
+        best = int(probs.argmax())
+        return CLASSES[best], float(probs[best])
+
+
+# ---------------- replies ----------------
+
+REPLIES = {
+    EMERGENCY: {
+        "en": ("If you are in danger right now, please call 999 (Police) or 1195 (GBV Helpline, free, 24/7) "
+               "immediately. If you can, move to a safe place or go to a neighbour, and keep your phone with you. "
+               "I am here with you - when you are safe, tell me what is happening."),
+        "sw": ("Kama uko hatarini sasa hivi, tafadhali piga simu 999 (Polisi) au 1195 (Msaada wa GBV, bure, saa 24) "
+               "mara moja. Ukiweza, nenda mahali salama au kwa jirani, na ubaki na simu yako. Niko hapa nawe - "
+               "ukiwa salama, niambie kinachoendelea."),
+    },
+    SELF_HARM: {
+        "en": ("I'm really glad you told me, and you deserve support right now. Please call Befrienders Kenya on "
+               "0722-178177 or the GBV Helpline 1195 (free, 24/7), or 999 if you are in immediate danger. "
+               "I'm here and listening - would you like to tell me what is making you feel this way?"),
+        "sw": ("Nashukuru kwa kuniambia, na unastahili msaada sasa hivi. Tafadhali piga Befrienders Kenya "
+               "0722-178177 au Msaada wa GBV 1195 (bure, saa 24), au 999 kama uko hatarini sasa. Niko hapa "
+               "nakusikiliza - ungependa kuniambia kinachokufanya ujisikie hivi?"),
+    },
+    GREETING: {
+        "en": "Hello, I'm Vee. I'm here to listen, and everything you share stays private. How are you feeling today?",
+        "sw": "Habari, mimi ni Vee. Niko hapa kukusikiliza, na kila unachoshiriki ni siri. Unajisikiaje leo?",
+    },
+}
+
+RESOURCE_OUTRO = {
+    "en": "Would you like to tell me what happened, or is there anything else I can help with?",
+    "sw": "Ungependa kuniambia kilichotokea, au kuna kitu kingine naweza kukusaidia?",
+}
+
+
+# ---------------- router ----------------
+
+class FastReply:
+    """A local answer, or (text None) a turn for the LLM that carries a safety flag"""
+    __slots__ = ("intent", "text", "county", "flag")
+
+    def __init__(self, intent: str, text: Optional[str], county: Optional[str] = None,
+                 flag: Optional[str] = None):
+        self.intent = intent
+        self.text = text
+        self.county = county
+        self.flag = flag
+
+    @property
+    def local(self) -> bool:
+        return self.text is not None
+
+
+class IntentRouter:
+    def __init__(self):
+        labelled = [(phrase, label) for label, phrases in PHRASES.items() for phrase in phrases]
+        labelled += [(county, f"county:{county}") for county in KENYA_COUNTIES]
+        labelled += [(town, f"county:{county}") for town, county in TOWN_COUNTIES.items()]
+        self.automaton = PhraseAutomaton(labelled)
+        # Until warm() trains it, only exact phrases route locally (emergencies never wait for it)
+        self.model: Optional[LinearIntentModel] = None
+        self._lock = threading.Lock()
+        self._routes: Counter = Counter()
+        self._latency_us: deque = deque(maxlen=LATENCY_SAMPLES)
+
+    def warm(self):
+        if self.model is None:
+            self.model = LinearIntentModel(SEED_EXAMPLES)
+
+    def classify(self, message: str) -> Tuple[str, Optional[str], Optional[str], Optional[str]]:
+        """(intent, county, service_type, safety_flag) for one message"""
+        normalized = normalize(message)
+        labels = self.automaton.find(normalized)
+        model = self.model
+        predicted, confidence = model.predict(normalized) if model is not None else (None, 0.0)
+        confident = confidence >= MIN_CONFIDENCE
+
+        danger = EMERGENCY if EMERGENCY in labels else SELF_HARM if SELF_HARM in labels else None
+        if danger:
+            overruled = predicted not in (None, danger, EMERGENCY, SELF_HARM) and confident
+            if DEFUSED in labels or overruled:
+                return OPEN, None, None, danger
+            return danger, None, None, None
+
+        words = normalized.split()
+        if any(word in normalized for word in _DISCLOSURE_WORDS):
+            return OPEN, None, None, None
+
+        counties = sorted(label[7:] for label in labels if label.startswith("county:"))
+        county = counties[0] if len(counties) == 1 else None
+        service = next((label[4:] for label in sorted(labels) if label.startswith("svc:")), None)
+
+        # "sasa" is "hi" on its own but "now" in "nisaidie sasa"
+        asks_help = HELP in labels or RESOURCES in labels or service is not None
+        if not asks_help and len(words) <= MAX_GREETING_WORDS and (
+            (GREETING in labels and len(words) <= 2) or words == ["sasa"] or (predicted == GREETING and confident)
+        ):
+            return GREETING, None, None, None
+        if county and len(words) <= MAX_RESOURCE_WORDS and (
+            RESOURCES in labels or (predicted == RESOURCES and confident)
+        ):
+            return RESOURCES, county, service, None
+        return OPEN, None, None, None
+
+    def route(self, message: str, language: str) -> Optional[FastReply]:
+        """A local reply for this message, a flagged LLM turn (text None), or None for a plain LLM turn"""
+        started = time.perf_counter()
+        intent, county, service, flag = self.classify(message)
+        language = language if language in ("en", "sw") else "en"
+        reply = None
+        if flag:
+            reply = FastReply(intent, None, flag=flag)
+        elif intent in REPLIES:
+            reply = FastReply(intent, REPLIES[intent][language])
+        elif intent == RESOURCES:
+            text = resource_directory.current().answer(county, service, language)
+            reply = FastReply(intent, f"{text}\n\n{RESOURCE_OUTRO[language]}", county)
+
+        with self._lock:
+            self._routes[f"{intent}:{flag}" if flag else intent] += 1
+            self._latency_us.append((time.perf_counter() - started) * 1e6)
+        if flag:
+            logger.info(f"🚩 {flag} phrase overruled, flagging the LLM turn")
+        elif reply is not None:
+            logger.info(f"⚡ Fast path: {intent}" + (f" ({county})" if county else ""))
+        return reply
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = sum(self._routes.values())
+            latencies = sorted(self._latency_us)
+            routes = dict(self._routes)
+        served = total - sum(count for intent, count in routes.items() if intent.startswith(OPEN))
+        return {
+            "turns": total,
+            "routes": routes,
+            "served_without_llm": served,
+            "served_without_llm_share": round(served / total, 3) if total else 0.0,
+            "p50_us": round(latencies[len(latencies) // 2], 1) if latencies else None,
+            "model_trained": self.model is not None,
+        }
+
+
+intent_router = IntentRouter()
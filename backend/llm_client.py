@@ -0,0 +1,66 @@
+import abc
+import logging
+import os
+from typing import Any, Callable, List
+
+logger = logging.getLogger("llm_client")
+
+# ============================================================
+# LLM CLIENT BACKENDS
+# ============================================================
+# The model registry builds and checks models through an LLMClient, picked
+# with VEE_LLM_BACKEND:
+#   gemini  the real Gemini API (default)
+#   fake    fake_llm.FakeClient - local, no API key, no quota; configurable
+#           latency, injected 429s/timeouts and scripted tool calls for load
+#           tests (see benchmarks/load_chat.py)
+# Both hand back real GenerativeModel objects, so chat sessions, automatic
+# function calling and streaming always run the SDK's own code. The SDK is
+# imported when a client is first used (the startup warmup), not on import.
+
+LLM_BACKEND = os.getenv("VEE_LLM_BACKEND", "gemini").lower()
+
+
+class LLMClient(abc.ABC):
+    """What the registry needs from a backend"""
+
+    name = "base"
+    requires_api_key = True
+
+    @abc.abstractmethod
+    def configure(self, api_key: str):
+        ...
+
+    @abc.abstractmethod
+    def create_model(self, model_name: str, tools: List[Callable], system_instruction: str) -> Any:
+        ...
+
+    @abc.abstractmethod
+    def check_model(self, model_name: str):
+        """Cheap availability check (no generation); raises if the model is unusable"""
+
+
+class GeminiClient(LLMClient):
+    name = "gemini"
+
+    def configure(self, api_key: str):
+        import google.generativeai as genai
+        genai.configure(api_key=api_key)
+
+    def create_model(self, model_name: str, tools: List[Callable], system_instruction: str) -> Any:
+        import google.generativeai as genai
+        return genai.GenerativeModel(model_name=model_name, tools=tools, system_instruction=system_instruction)
+
+    def check_model(self, model_name: str):
+        import google.generativeai as genai
+        genai.get_model(f"models/{model_name}")
+
+
+def client_from_env() -> LLMClient:
+    if LLM_BACKEND == "fake":
+        from fake_llm import FakeClient
+        logger.warning("🧪 Using the FAKE LLM backend - replies are scripted, not generated")
+        return FakeClient()
+    if LLM_BACKEND != "gemini":
+        raise ValueError(f"Unknown VEE_LLM_BACKEND '{LLM_BACKEND}' (expected gemini or fake)")
+    return GeminiClient()
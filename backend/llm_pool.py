@@ -0,0 +1,216 @@
+import asyncio
+import contextvars
+import logging
+import os
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger("llm_pool")
+
+# ============================================================
+# BOUNDED LLM EXECUTION
+# ============================================================
+# Blocking Gemini calls run on a dedicated pool of LLM_WORKERS threads, not the
+# default executor shared with DB work. A chat turn must be admitted first:
+#   - per session, turns run one at a time in arrival order (asyncio.Lock is
+#     FIFO), and at most MAX_TURNS_PER_SESSION may be running or queued
+#   - globally, at most LLM_WORKERS turns run at once; at most LLM_MAX_QUEUE
+#     more may wait, each for up to QUEUE_TIMEOUT_SECONDS
+# Anything beyond that is shed immediately with PoolBusy, which the endpoints
+# turn into a 503 "please wait", so overload costs a retry, not a timeout.
+# A slot stands for a worker thread, so it is only freed once the turn has
+# ended *and* every call it started has returned: a timed-out attempt or a
+# losing hedge keeps its thread busy until the SDK gives up, and until then
+# its turn counts as "orphaned" against admission. A hedge takes an extra
+# slot (reserve_extra) and is skipped when none is free.
+# All bookkeeping happens on the event loop thread, so it needs no locks.
+
+LLM_WORKERS = int(os.getenv("VEE_LLM_WORKERS", "16"))
+LLM_MAX_QUEUE = int(os.getenv("VEE_LLM_MAX_QUEUE", "32"))
+MAX_TURNS_PER_SESSION = 2          # the running turn plus one queued behind it
+QUEUE_TIMEOUT_SECONDS = 15.0
+RETRY_AFTER_SECONDS = 5
+WAIT_SAMPLES = 500
+
+
+class PoolBusy(Exception):
+    """A turn was shed: reason is queue_full, session_busy or queue_timeout"""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class _TurnSlots:
+    """Slots held by one turn and the executor calls it still has running"""
+    __slots__ = ("held", "in_flight", "closed")
+
+    def __init__(self):
+        self.held = 1
+        self.in_flight = 0
+        self.closed = False
+
+
+_turn_slots: contextvars.ContextVar[Optional[_TurnSlots]] = contextvars.ContextVar("llm_turn_slots", default=None)
+
+
+class LLMPool:
+    def __init__(self, workers: int = LLM_WORKERS, max_queue: int = LLM_MAX_QUEUE,
+                 max_turns_per_session: int = MAX_TURNS_PER_SESSION):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.max_turns_per_session = max_turns_per_session
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="vee-llm")
+        self._slots = asyncio.Semaphore(workers)
+        self._session_locks: Dict[str, asyncio.Lock] = {}
+        self._session_turns: Counter = Counter()
+        self._queued = 0
+        self._running = 0
+        self._orphaned = 0
+        self._calls_in_flight = 0
+        self._admitted = 0
+        self._shed: Counter = Counter()
+        self._waits: deque = deque(maxlen=WAIT_SAMPLES)
+
+    # ---------------- admission ----------------
+
+    def check(self, session_key: str):
+        """Raise PoolBusy if a turn for this session would be shed right now"""
+        if self._session_turns[session_key] >= self.max_turns_per_session:
+            self._shed["session_busy"] += 1
+            raise PoolBusy("session_busy")
+        if self._running + self._orphaned + self._queued >= self.workers + self.max_queue:
+            self._shed["queue_full"] += 1
+            raise PoolBusy("queue_full")
+
+    async def _acquire(self, lock: asyncio.Lock):
+        await lock.acquire()
+        try:
+            await self._slots.acquire()
+        except BaseException:
+            lock.release()
+            raise
+
+    @asynccontextmanager
+    async def turn(self, session_key: str):
+        """Hold this session's turn and one global slot for the duration of the block"""
+        self.check(session_key)
+        self._session_turns[session_key] += 1
+        self._queued += 1
+        self._admitted += 1
+        lock = self._session_locks.setdefault(session_key, asyncio.Lock())
+        queued_at = time.perf_counter()
+        started = False
+        try:
+            try:
+                await asyncio.wait_for(self._acquire(lock), QUEUE_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                self._shed["queue_timeout"] += 1
+                raise PoolBusy("queue_timeout")
+
+            self._queued -= 1
+            self._running += 1
+            started = True
+            self._waits.append((time.perf_counter() - queued_at) * 1000)
+            slots = _TurnSlots()
+            token = _turn_slots.set(slots)
+            try:
+                yield
+            finally:
+                _turn_slots.reset(token)
+                self._running -= 1
+                slots.closed = True
+                if slots.in_flight:
+                    self._orphaned += 1
+                    logger.info(f"🧵 Turn of {session_key} ended with {slots.in_flight} call(s) still running")
+                else:
+                    self._release(slots)
+                lock.release()
+        finally:
+            if not started:
+                self._queued -= 1
+            self._session_turns[session_key] -= 1
+            if self._session_turns[session_key] <= 0:
+                del self._session_turns[session_key]
+                self._session_locks.pop(session_key, None)
+
+    def _release(self, slots: _TurnSlots):
+        for _ in range(slots.held):
+            self._slots.release()
+        slots.held = 0
+
+    async def reserve_extra(self) -> bool:
+        """One more slot for the current turn (a hedge) if a worker is free right now"""
+        slots = _turn_slots.get()
+        if slots is None or slots.closed or self._slots.locked():
+            return False
+        await self._slots.acquire()
+        slots.held += 1
+        return True
+
+    # ---------------- execution ----------------
+
+    def _call_done(self, slots: Optional[_TurnSlots]):
+        self._calls_in_flight -= 1
+        if slots is None:
+            return
+        slots.in_flight -= 1
+        if slots.closed and not slots.in_flight and slots.held:
+            self._orphaned -= 1
+            self._release(slots)
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """
+        fn(*args) on an LLM worker thread, with the caller's contextvars (idempotency turn).
+
+        Cancelling the await does not stop the thread; the turn's slot stays
+        held until fn actually returns.
+        """
+        loop = asyncio.get_running_loop()
+        slots = _turn_slots.get()
+        context = contextvars.copy_context()
+        future = self._executor.submit(context.run, fn, *args)
+        self._calls_in_flight += 1
+        if slots is not None:
+            slots.in_flight += 1
+
+        def done(_):
+            try:
+                loop.call_soon_threadsafe(self._call_done, slots)
+            except RuntimeError:    # loop already closed at shutdown
+                pass
+
+        future.add_done_callback(done)
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self):
+        """Drop queued calls at application shutdown; running ones end at their request timeout"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        logger.info(f"🧵 LLM pool shut down ({self._calls_in_flight} call(s) still running)")
+
+    # ---------------- metrics ----------------
+
+    def stats(self) -> dict:
+        waits = sorted(self._waits)
+
+        def percentile(p: float):
+            return round(waits[min(len(waits) - 1, int(p * len(waits)))], 1) if waits else None
+
+        return {
+            "workers": self.workers,
+            "running": self._running,
+            "orphaned": self._orphaned,
+            "calls_in_flight": self._calls_in_flight,
+            "queue_depth": self._queued,
+            "max_queue": self.max_queue,
+            "sessions_active": len(self._session_turns),
+            "admitted": self._admitted,
+            "shed": dict(self._shed),
+            "queue_wait_ms": {"p50": percentile(0.5), "p95": percentile(0.95)},
+        }
+
+
+llm_pool = LLMPool()
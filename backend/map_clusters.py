@@ -0,0 +1,223 @@
+import logging
+import threading
+from collections import Counter
+from typing import Dict, List, Set, Tuple
+
+from database import SessionLocal
+from models import IncidentReport
+from geo_utils import lnglat_to_world_px
+import incident_events
+from incident_events import MapPoint
+
+logger = logging.getLogger("map_clusters")
+
+# ============================================================
+# ZOOM-AWARE SERVER-SIDE CLUSTERING
+# ============================================================
+# Hierarchical grid over Web Mercator pixel space: at every zoom level up to
+# LEAF_ZOOM a point falls into one CELL_PX x CELL_PX cell, and each cell keeps
+# running aggregates (count, coordinate sums, type counts). Adding or removing
+# a point touches one cell per level. Above LEAF_ZOOM the view covers only a
+# few leaf cells, so their points are clustered on the fly.
+#
+# A query visits at most MAX_QUERY_CELLS cells (zooming out if the bbox is too
+# large for the requested zoom), so the response size is bounded no matter how
+# many reports exist.
+
+MIN_ZOOM = 0
+LEAF_ZOOM = 12
+MAX_ZOOM = 18
+CELL_PX = 64
+MAX_QUERY_CELLS = 1024
+
+CellKey = Tuple[int, int]
+
+
+def _cell_key(point: MapPoint, zoom: int) -> CellKey:
+    x, y = lnglat_to_world_px(point.lng, point.lat, zoom)
+    return int(x // CELL_PX), int(y // CELL_PX)
+
+
+def _cell_range(bbox, zoom: int) -> Tuple[int, int, int, int]:
+    west, south, east, north = bbox
+    x0, y0 = lnglat_to_world_px(west, north, zoom)
+    x1, y1 = lnglat_to_world_px(east, south, zoom)
+    return int(x0 // CELL_PX), int(y0 // CELL_PX), int(x1 // CELL_PX), int(y1 // CELL_PX)
+
+
+class _Cell:
+    __slots__ = ("count", "sum_lat", "sum_lng", "id_xor", "types")
+
+    def __init__(self):
+        self.count = 0
+        self.sum_lat = 0.0
+        self.sum_lng = 0.0
+        self.id_xor = 0          # equals the remaining point id whenever count == 1
+        self.types = Counter()
+
+    def add(self, point: MapPoint):
+        self.count += 1
+        self.sum_lat += point.lat
+        self.sum_lng += point.lng
+        self.id_xor ^= point.id
+        self.types[point.incident_type or "other"] += 1
+
+    def remove(self, point: MapPoint):
+        self.count -= 1
+        self.sum_lat -= point.lat
+        self.sum_lng -= point.lng
+        self.id_xor ^= point.id
+        type_key = point.incident_type or "other"
+        self.types[type_key] -= 1
+        if self.types[type_key] <= 0:
+            del self.types[type_key]
+
+
+class ClusterIndex:
+    """Per-process cluster index, built lazily and kept current by map events"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._points: Dict[int, MapPoint] = {}
+        self._grids: List[Dict[CellKey, _Cell]] = [dict() for _ in range(LEAF_ZOOM + 1)]
+        self._leaf_points: Dict[CellKey, Set[int]] = {}
+
+    # ---------------- maintenance ----------------
+
+    def _add(self, point: MapPoint):
+        if point.id in self._points:
+            return
+        self._points[point.id] = point
+        for zoom in range(MIN_ZOOM, LEAF_ZOOM + 1):
+            key = _cell_key(point, zoom)
+            cell = self._grids[zoom].get(key)
+            if cell is None:
+                cell = self._grids[zoom][key] = _Cell()
+            cell.add(point)
+        self._leaf_points.setdefault(_cell_key(point, LEAF_ZOOM), set()).add(point.id)
+
+    def _remove(self, point_id: int):
+        point = self._points.pop(point_id, None)
+        if point is None:
+            return
+        for zoom in range(MIN_ZOOM, LEAF_ZOOM + 1):
+            key = _cell_key(point, zoom)
+            cell = self._grids[zoom].get(key)
+            if cell is None:
+                continue
+            cell.remove(point)
+            if cell.count <= 0:
+                del self._grids[zoom][key]
+        leaf_key = _cell_key(point, LEAF_ZOOM)
+        members = self._leaf_points.get(leaf_key)
+        if members is not None:
+            members.discard(point_id)
+            if not members:
+                del self._leaf_points[leaf_key]
+
+    def on_event(self, event: str, point: MapPoint):
+        with self._lock:
+            if not self._loaded:
+                return  # the initial load will read it from the database
+            if event == incident_events.VISIBLE:
+                self._add(point)
+            elif event == incident_events.HIDDEN:
+                self._remove(point.id)
+
+    def ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            db = SessionLocal()
+            try:
+                reports = db.query(IncidentReport).filter(
+                    IncidentReport.latitude.isnot(None),
+                    IncidentReport.longitude.isnot(None),
+                    IncidentReport.status == "verified",
+                    IncidentReport.mapping_consent == True
+                ).yield_per(1000)
+                for report in reports:
+                    self._add(incident_events.point_from_report(report))
+            finally:
+                db.close()
+            self._loaded = True
+            logger.info(f"✅ Cluster index loaded with {len(self._points)} points")
+
+    # ---------------- queries ----------------
+
+    def _leaf_cells_on_the_fly(self, bbox, zoom: int) -> Dict[CellKey, _Cell]:
+        """Aggregate the points of the leaf cells under bbox into cells at zoom > LEAF_ZOOM"""
+        west, south, east, north = bbox
+        lx0, ly0, lx1, ly1 = _cell_range(bbox, LEAF_ZOOM)
+        cells: Dict[CellKey, _Cell] = {}
+        for lx in range(lx0, lx1 + 1):
+            for ly in range(ly0, ly1 + 1):
+                for point_id in self._leaf_points.get((lx, ly), ()):
+                    point = self._points[point_id]
+                    if not (west <= point.lng <= east and south <= point.lat <= north):
+                        continue
+                    key = _cell_key(point, zoom)
+                    cell = cells.get(key)
+                    if cell is None:
+                        cell = cells[key] = _Cell()
+                    cell.add(point)
+        return cells
+
+    def query(self, bbox: Tuple[float, float, float, float], zoom: int) -> dict:
+        """
+        Clusters inside bbox at (at most) the requested zoom.
+
+        Cells holding a single report are returned as that report's point.
+        """
+        self.ensure_loaded()
+        requested_zoom = min(max(zoom, MIN_ZOOM), MAX_ZOOM)
+
+        # Zoom out until the bbox spans a bounded number of cells
+        effective_zoom = MIN_ZOOM
+        for z in range(requested_zoom, MIN_ZOOM - 1, -1):
+            cx0, cy0, cx1, cy1 = _cell_range(bbox, z)
+            if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) <= MAX_QUERY_CELLS:
+                effective_zoom = z
+                break
+
+        with self._lock:
+            if effective_zoom > LEAF_ZOOM:
+                cells = self._leaf_cells_on_the_fly(bbox, effective_zoom)
+                candidates = cells.values()
+            else:
+                grid = self._grids[effective_zoom]
+                cx0, cy0, cx1, cy1 = _cell_range(bbox, effective_zoom)
+                candidates = [
+                    grid[(cx, cy)]
+                    for cx in range(cx0, cx1 + 1)
+                    for cy in range(cy0, cy1 + 1)
+                    if (cx, cy) in grid
+                ]
+
+            clusters = []
+            total = 0
+            for cell in candidates:
+                total += cell.count
+                if cell.count == 1 and cell.id_xor in self._points:
+                    clusters.append({**self._points[cell.id_xor].to_public_dict(), "count": 1})
+                else:
+                    clusters.append({
+                        "lat": round(cell.sum_lat / cell.count, 6),
+                        "lng": round(cell.sum_lng / cell.count, 6),
+                        "count": cell.count,
+                        "types": dict(cell.types),
+                    })
+
+        return {
+            "zoom": effective_zoom,
+            "requested_zoom": zoom,
+            "clusters": clusters,
+            "total": total,
+        }
+
+
+cluster_index = ClusterIndex()
+incident_events.subscribe(cluster_index.on_event)
@@ -0,0 +1,264 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional, Set, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import IncidentReport, MapChange
+from response_cache import response_cache
+import incident_events
+from incident_events import MapPoint
+
+logger = logging.getLogger("map_feed")
+
+# ============================================================
+# MAP DELTA FEED
+# ============================================================
+# Every visibility change (auto-verified save, approval, rejection) appends a
+# MapChange row in the same transaction as the status change. Its seq is a
+# monotonic cursor: a client that has seen cursor N asks for seq > N and gets
+# only the changes since, via a primary-key range scan.
+#
+# SSE streams in this process are woken by incident_events.
+#
+# The map indexes (map_clusters, heatmap, hotspots) and the response cache
+# live in each worker, and a write only publishes incident_events in the
+# worker that made it. So the endpoints serving them call catch_up() first:
+# at most every CATCH_UP_SECONDS it reads the log past this worker's cursor
+# and replays other workers' changes through incident_events (listeners
+# ignore a point that is already present or absent), then bumps the response
+# cache. Each row carries the writing worker's token, so a worker skips its
+# own changes (already published locally) without relying on seq values,
+# which SQLite can hand out again after a rollback. The cursor is taken before the indexes load, so nothing committed
+# in between is missed.
+
+CHANGE_RETENTION = timedelta(days=30)
+PRUNE_EVERY_N_CHANGES = 500
+MAX_CHANGES_PER_PAGE = 1000
+STREAM_HEARTBEAT_SECONDS = 15
+CATCH_UP_SECONDS = 1.0
+
+_lock = threading.Lock()
+_changes_since_prune = 0
+_version = 0
+_waiters: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+
+_catch_up_lock = threading.Lock()
+_applied_cursor: Optional[int] = None
+_caught_up_at = 0.0
+_token: Optional[Tuple[int, str]] = None     # (pid, token): a forked worker gets its own
+
+
+def worker_token() -> str:
+    global _token
+    if _token is None or _token[0] != os.getpid():
+        _token = (os.getpid(), uuid.uuid4().hex)
+    return _token[1]
+
+
+def record_change(db: Session, was_mappable: bool, report) -> Optional[str]:
+    """
+    Add a MapChange row to the caller's transaction if visibility changed.
+
+    The report must already be flushed (it needs an id). Returns the event.
+    """
+    global _changes_since_prune
+
+    now_mappable = incident_events.is_mappable(report)
+    if now_mappable == was_mappable:
+        return None
+
+    event = incident_events.VISIBLE if now_mappable else incident_events.HIDDEN
+    db.add(MapChange(report_id=report.id, event=event, origin=worker_token(), created_at=datetime.utcnow()))
+
+    with _lock:
+        _changes_since_prune += 1
+        should_prune = _changes_since_prune >= PRUNE_EVERY_N_CHANGES
+        if should_prune:
+            _changes_since_prune = 0
+
+    if should_prune:
+        db.query(MapChange).filter(
+            MapChange.created_at < datetime.utcnow() - CHANGE_RETENTION
+        ).delete(synchronize_session=False)
+
+    return event
+
+
+def latest_cursor(db: Session) -> int:
+    return db.query(func.max(MapChange.seq)).scalar() or 0
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def point_filter(bounds: Optional[Tuple[float, float, float, float]] = None, after: Optional[datetime] = None,
+                 until: Optional[datetime] = None, incident_type: Optional[str] = None,
+                 county: Optional[str] = None) -> Optional[Callable[[MapPoint], bool]]:
+    """The /api/incidents filters as a predicate over points (None when nothing is filtered)"""
+    after, until = _naive_utc(after), _naive_utc(until)
+    incident_type = incident_type.lower() if incident_type and incident_type != "all" else None
+    county = county.strip().lower() if county and county != "all" else None
+    if not (bounds or after or until or incident_type or county):
+        return None
+
+    def keep(point: MapPoint) -> bool:
+        if bounds:
+            west, south, east, north = bounds
+            if not (south <= point.lat <= north and west <= point.lng <= east):
+                return False
+        if (after or until) and point.timestamp is None:
+            return False
+        if after and point.timestamp < after:
+            return False
+        if until and point.timestamp > until:
+            return False
+        if incident_type and point.incident_type != incident_type:
+            return False
+        return not county or (point.county or "").lower() == county
+
+    return keep
+
+
+def changes_since(db: Session, since: int, limit: int = MAX_CHANGES_PER_PAGE,
+                  keep: Optional[Callable[[MapPoint], bool]] = None) -> dict:
+    """
+    Changes with seq > since, oldest first.
+
+    keep (see point_filter) drops "visible" changes outside the client's view;
+    "hidden" changes are always sent, since the client may hold the point.
+    reset=True means the cursor is older than the retained log (or from another
+    database); the client should reload /api/incidents and continue from cursor.
+    """
+    limit = max(1, min(limit, MAX_CHANGES_PER_PAGE))
+    oldest, newest = db.query(func.min(MapChange.seq), func.max(MapChange.seq)).one()
+    newest = newest or 0
+
+    if since > newest or (oldest is not None and since < oldest - 1):
+        return {"cursor": newest, "changes": [], "has_more": False, "reset": True}
+
+    rows = db.query(MapChange, IncidentReport).outerjoin(
+        IncidentReport, IncidentReport.id == MapChange.report_id
+    ).filter(
+        MapChange.seq > since
+    ).order_by(MapChange.seq).limit(limit + 1).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    changes = []
+    for change, report in rows:
+        if change.event == incident_events.VISIBLE:
+            # Skip points that stopped being mappable; their HIDDEN row follows
+            if report is None or not incident_events.is_mappable(report):
+                continue
+            point = incident_events.point_from_report(report)
+            if keep is not None and not keep(point):
+                continue
+            changes.append({"seq": change.seq, "event": change.event, **point.to_public_dict()})
+        else:
+            changes.append({
+                "seq": change.seq,
+                "event": change.event,
+                "id": incident_events.public_point_id(change.report_id),
+            })
+
+    cursor = rows[-1][0].seq if rows else since
+    return {"cursor": cursor, "changes": changes, "has_more": has_more, "reset": False}
+
+
+# ---------------- cross-worker catch-up ----------------
+
+def catch_up(force: bool = False) -> int:
+    """Replay changes other workers committed since the last catch-up; returns how many"""
+    global _applied_cursor, _caught_up_at
+
+    if not force and time.monotonic() - _caught_up_at < CATCH_UP_SECONDS:
+        return 0
+    if not _catch_up_lock.acquire(blocking=False):
+        return 0  # another thread is catching up right now
+    try:
+        db = SessionLocal()
+        try:
+            if _applied_cursor is None:
+                _applied_cursor = latest_cursor(db)
+                _caught_up_at = time.monotonic()
+                return 0
+            rows = db.query(MapChange, IncidentReport).join(
+                IncidentReport, IncidentReport.id == MapChange.report_id
+            ).filter(
+                MapChange.seq > _applied_cursor
+            ).order_by(MapChange.seq).all()
+        finally:
+            db.close()
+        _caught_up_at = time.monotonic()
+        if not rows:
+            return 0
+
+        token = worker_token()
+        foreign = [(change, report) for change, report in rows if change.origin != token]
+        for change, report in foreign:
+            # A VISIBLE for a point that has since stopped being mappable is followed by its HIDDEN
+            if change.event == incident_events.VISIBLE and not incident_events.is_mappable(report):
+                continue
+            incident_events.publish(change.event, incident_events.point_from_report(report))
+        _applied_cursor = rows[-1][0].seq
+
+        if foreign:
+            response_cache.bump()
+            logger.info(f"🔁 Caught up {len(foreign)} map change(s) from other workers (cursor {_applied_cursor})")
+        return len(foreign)
+    except Exception as e:
+        logger.error(f"❌ Map change catch-up failed: {e}")
+        return 0
+    finally:
+        _catch_up_lock.release()
+
+
+# ---------------- in-process wakeups for SSE streams ----------------
+
+def _on_event(event: str, point: MapPoint):
+    global _version
+    with _lock:
+        _version += 1
+        waiters = list(_waiters)
+    for loop, waiter in waiters:
+        try:
+            loop.call_soon_threadsafe(waiter.set)
+        except RuntimeError:
+            pass  # loop already closed
+
+
+def current_version() -> int:
+    return _version
+
+
+async def wait_for_change(seen_version: int, timeout: float) -> bool:
+    """Wait until a change is published after seen_version; False on timeout"""
+    waiter = asyncio.Event()
+    entry = (asyncio.get_running_loop(), waiter)
+    with _lock:
+        if _version != seen_version:
+            return True
+        _waiters.add(entry)
+    try:
+        await asyncio.wait_for(waiter.wait(), timeout)
+        return True
+    except asyncio.TimeoutError:
+        return False
+    finally:
+        with _lock:
+            _waiters.discard(entry)
+
+
+incident_events.subscribe(_on_event)
@@ -0,0 +1,96 @@
+import gzip
+import hashlib
+from typing import Iterable, List, Optional, Tuple
+
+import orjson
+from fastapi import Request, Response
+
+# ============================================================
+# MAP PAYLOAD ENCODING
+# ============================================================
+# /api/incidents can return points as rows (one dict per point) or as columns:
+# parallel arrays, with the low-cardinality string fields (type, county, area,
+# timeframe) dictionary-encoded as integer codes. Both are serialized with
+# orjson and gzip-compressed when the client accepts it.
+#
+# The ETag is derived from the map change cursor and the query, not from the
+# body: the set of mappable points only changes through a map_changes row, so
+# an unchanged cursor means an unchanged response and a 304 needs no query.
+
+FORMATS = ("rows", "columnar")
+PAYLOAD_VERSION = "1"
+COORD_DECIMALS = 5           # ~1 m, plenty for an anonymized public map
+GZIP_MIN_BYTES = 1024
+GZIP_LEVEL = 6
+
+# (id, lat, lng, type, county, area, timeframe)
+PointRow = Tuple[str, float, float, Optional[str], Optional[str], Optional[str], Optional[str]]
+_DICT_FIELDS = ("type", "county", "area", "timeframe")
+
+
+def rows_payload(points: List[PointRow]) -> List[dict]:
+    return [
+        {"id": pid, "lat": lat, "lng": lng, "type": itype, "county": county, "area": area, "timeframe": timeframe}
+        for pid, lat, lng, itype, county, area, timeframe in points
+    ]
+
+
+def _dictionary_encode(values: Iterable[Optional[str]]) -> Tuple[List[Optional[str]], List[int]]:
+    dictionary: List[Optional[str]] = []
+    positions = {}
+    codes = []
+    for value in values:
+        code = positions.get(value)
+        if code is None:
+            code = positions[value] = len(dictionary)
+            dictionary.append(value)
+        codes.append(code)
+    return dictionary, codes
+
+
+def columnar_payload(points: List[PointRow]) -> dict:
+    """Parallel arrays; columns in `dictionaries` hold indexes into that list"""
+    ids, lats, lngs, *string_columns = zip(*points) if points else ((),) * 7
+    columns = {
+        "id": list(ids),
+        "lat": [round(lat, COORD_DECIMALS) for lat in lats],
+        "lng": [round(lng, COORD_DECIMALS) for lng in lngs],
+    }
+    dictionaries = {}
+    for name, values in zip(_DICT_FIELDS, string_columns):
+        dictionaries[name], columns[name] = _dictionary_encode(values)
+    return {"columns": columns, "dictionaries": dictionaries}
+
+
+def etag_for(cursor: int, *query_parts) -> str:
+    digest = hashlib.blake2b(repr((PAYLOAD_VERSION,) + query_parts).encode(), digest_size=8).hexdigest()
+    return f'W/"{cursor}-{digest}"'
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """304 response if the client already holds this version"""
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    return None
+
+
+class EncodedPayload:
+    """Serialized body plus its gzip form, computed once so it can be cached"""
+    __slots__ = ("raw", "gzipped")
+
+    def __init__(self, content: dict):
+        self.raw = orjson.dumps(content)
+        self.gzipped = gzip.compress(self.raw, compresslevel=GZIP_LEVEL) if len(self.raw) >= GZIP_MIN_BYTES else None
+
+
+def json_response(request: Request, payload: EncodedPayload, etag: Optional[str] = None) -> Response:
+    """Encoded response, gzip-compressed when the client accepts it and it is worth it"""
+    headers = {"Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+    if etag:
+        headers["ETag"] = etag
+    body = payload.raw
+    if payload.gzipped is not None and "gzip" in request.headers.get("accept-encoding", ""):
+        body = payload.gzipped
+        headers["Content-Encoding"] = "gzip"
+    return Response(content=body, media_type="application/json", headers=headers)
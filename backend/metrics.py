@@ -0,0 +1,153 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple
+
+import timing
+
+# ============================================================
+# PROMETHEUS METRICS
+# ============================================================
+# Every HTTP request gets a TurnTimings (timing.py) bound by
+# MetricsMiddleware; when the response has been sent, its stage spans are
+# folded into fixed-bucket histograms:
+#   vee_request_duration_seconds{route,method}   whole request, incl. streaming
+#   vee_stage_duration_seconds{route,stage}      exclusive time per stage per request
+#                                                ("other" = request time outside any stage)
+#   vee_tool_duration_seconds{tool}              each model tool call, inclusive
+#   vee_chat_ttft_seconds                        time to first streamed token
+#   vee_requests_total{route,method,status}
+# Routes are the path templates ("/admin/reports/{report_id}"), never the
+# raw path, so no ids end up in labels. Recording is a bisect and a few
+# integer increments under a lock; text is only rendered when /metrics is
+# scraped. VEE_METRICS=0 leaves the middleware out entirely.
+
+METRICS_ENABLED = os.getenv("VEE_METRICS", "1") != "0"
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # labels -> per-bucket counts (last slot is +Inf), then the sum
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            snapshot = {labels: list(series) for labels, series in self._series.items()}
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                bucket_labels = _labels(self.labelnames, labels, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            snapshot = dict(self._values)
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(snapshot.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {value:g}")
+        return lines
+
+
+request_duration = Histogram("vee_request_duration_seconds", "HTTP request duration, including streamed bodies",
+                             ("route", "method"))
+stage_duration = Histogram("vee_stage_duration_seconds", "Exclusive time per stage within one request",
+                           ("route", "stage"))
+tool_duration = Histogram("vee_tool_duration_seconds", "Model tool call duration", ("tool",))
+chat_ttft = Histogram("vee_chat_ttft_seconds", "Time to first streamed token of a chat turn")
+requests_total = Counter("vee_requests_total", "HTTP requests by final status", ("route", "method", "status"))
+
+METRICS = (request_duration, stage_duration, tool_duration, chat_ttft, requests_total)
+
+
+def observe_request(route: str, method: str, status: int, seconds: float, timings: timing.TurnTimings):
+    request_duration.observe(seconds, route, method)
+    requests_total.inc(route, method, str(status))
+    stages = timings.as_dict()
+    for stage, ms in stages.items():
+        stage_duration.observe(ms / 1000, route, stage)
+    if stages:
+        stage_duration.observe(max(0.0, seconds - sum(stages.values()) / 1000), route, "other")
+    for tool, ms in list(timings.tool_ms):
+        tool_duration.observe(ms / 1000, tool)
+
+
+def render() -> str:
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware: binds the request's TurnTimings and records it once the body is sent"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = timing.bind_turn()
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = getattr(scope.get("route"), "path", "unmatched")
+            observe_request(route, scope["method"], status[0], time.perf_counter() - started, timings)
@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from llm_client import LLMClient, client_from_env
+from model_router import ERROR, ModelRouter
+
+logger = logging.getLogger("model_registry")
+
+# ============================================================
+# SHARED MODEL REGISTRY
+# ============================================================
+# One configured GenerativeModel per (language, model name) for the whole
+# process, built through the configured LLMClient (real Gemini or the local
+# fake). Building a model object is local; nothing here sends a message.
+# Model health lives in the router (model_router.py) and comes from two sources:
+#   - real traffic: every chat call records its latency and outcome, which
+#     drives the per-model circuit breakers
+#   - a background metadata check (client.check_model) every few minutes,
+#     which costs no generation quota; a failed lookup counts as an error
+# New sessions start on the best healthy model with zero extra round trips.
+
+MODEL_PRIORITIES = [
+    "gemini-2.5-flash",           # ✅ Confirmed working
+    "gemini-flash-latest",        # Stable fallback
+    "gemini-2.0-flash",           # Alternative
+    "gemini-2.0-flash-exp",       # Experimental but capable
+    "gemini-flash-lite-latest",   # Lightweight fallback
+]
+
+HEALTH_CHECK_INTERVAL_SECONDS = 300
+
+
+class ModelRegistry:
+    """Process-wide cache of configured models plus their health"""
+
+    def __init__(self, priorities: Sequence[str] = MODEL_PRIORITIES, client: Optional[LLMClient] = None):
+        self.priorities: List[str] = list(priorities)
+        self.client = client
+        self._lock = threading.Lock()
+        self._configured = False
+        self._tools: List[Callable] = []
+        self._system_prompts: Dict[str, str] = {}
+        self._models: Dict[Tuple[str, str], Any] = {}
+        self.router = ModelRouter(self.priorities)
+        self._health_task: Optional[asyncio.Task] = None
+
+    def configure(self, api_key: str, tools: List[Callable], system_prompts: Dict[str, str]):
+        """Call once at startup; system_prompts maps language -> prompt ("en" is the default)"""
+        if self.client is None:
+            self.client = client_from_env()
+        self.client.configure(api_key)
+        with self._lock:
+            self._tools = list(tools)
+            self._system_prompts = dict(system_prompts)
+            self._models.clear()
+            self._configured = True
+
+    # ---------------- models ----------------
+
+    def get_model(self, language: str, model_name: str) -> Any:
+        """Cached GenerativeModel for (language, model); built on first use"""
+        if not self._configured:
+            raise RuntimeError("Model registry is not configured")
+        language = language if language in self._system_prompts else "en"
+        key = (language, model_name)
+        with self._lock:
+            model = self._models.get(key)
+            if model is None:
+                model = self._models[key] = self.client.create_model(
+                    model_name, self._tools, self._system_prompts[language]
+                )
+        return model
+
+    def start_chat(self, language: str, model_name: str, history: Optional[list] = None) -> Any:
+        """New chat on the model, optionally continuing an existing history (model switch)"""
+        return self.get_model(language, model_name).start_chat(
+            history=list(history) if history else None, enable_automatic_function_calling=True
+        )
+
+    # ---------------- health ----------------
+
+    def best_model(self) -> Optional[str]:
+        return self.router.peek()
+
+    def check_health(self):
+        """Metadata lookup per model - no generation, no quota"""
+        for model_name in self.priorities:
+            try:
+                self.client.check_model(model_name)
+            except Exception as e:
+                logger.warning(f"⚠️ Health check failed for {model_name}: {str(e)[:100]}")
+                self.router.record(model_name, 0.0, ERROR, e)
+
+    async def _health_loop(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.check_health)
+            except Exception as e:
+                logger.error(f"❌ Model health check failed: {e}")
+            await asyncio.sleep(HEALTH_CHECK_INTERVAL_SECONDS)
+
+    def start_background_checks(self):
+        """Start the periodic health check on the running event loop"""
+        if self._health_task is None or self._health_task.done():
+            self._health_task = asyncio.get_running_loop().create_task(self._health_loop())
+
+    def stop_background_checks(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+
+    def status(self) -> dict:
+        return self.router.status()
+
+
+model_registry = ModelRegistry()
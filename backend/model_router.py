@@ -0,0 +1,212 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Sequence
+
+logger = logging.getLogger("model_router")
+
+# ============================================================
+# LATENCY-AWARE MODEL ROUTING
+# ============================================================
+# Every chat call records (latency, outcome) for its model. Each model has a
+# circuit breaker:
+#   CLOSED     normal traffic
+#   OPEN       skipped until OPEN_SECONDS pass (doubling on repeat trips);
+#              tripped by a 429, by CONSECUTIVE_FAILURES_TO_OPEN failures in a
+#              row, or by an error rate >= ERROR_RATE_TO_OPEN over the window
+#   HALF_OPEN  one trial call is let through; success closes the breaker,
+#              failure re-opens it with a longer cooldown
+# Routing picks the first model in priority order whose breaker admits a call,
+# on every turn, so traffic returns to the preferred model once it recovers.
+# hedge_delay() gives the point (the model's rolling p95) after which a second
+# request to a backup model is worth sending.
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+OK = "ok"
+ERROR = "error"
+QUOTA = "quota"
+TIMEOUT = "timeout"
+
+WINDOW_SECONDS = 300
+WINDOW_MAX_SAMPLES = 500
+MIN_CALLS_FOR_RATE = 10
+ERROR_RATE_TO_OPEN = 0.5
+CONSECUTIVE_FAILURES_TO_OPEN = 3
+OPEN_SECONDS = 30
+MAX_OPEN_SECONDS = 300
+TRIAL_TIMEOUT_SECONDS = 60     # a trial whose outcome never arrives frees the slot
+
+HEDGE_MIN_SECONDS = 3.0
+HEDGE_DEFAULT_SECONDS = 8.0
+MIN_SAMPLES_FOR_P95 = 20
+
+
+def classify_error(error: BaseException) -> str:
+    if isinstance(error, TimeoutError):
+        return TIMEOUT
+    message = str(error).lower()
+    if "429" in message or "quota" in message or "resource exhausted" in message:
+        return QUOTA
+    return ERROR
+
+
+class ModelStats:
+    """Rolling window of (timestamp, latency_ms, outcome) plus the breaker state"""
+
+    def __init__(self):
+        self.samples: deque = deque(maxlen=WINDOW_MAX_SAMPLES)
+        self.state = CLOSED
+        self.opened_until = 0.0
+        self.open_seconds = OPEN_SECONDS
+        self.consecutive_failures = 0
+        self.trial_in_flight = False
+        self.trial_started = 0.0
+        self.last_error: Optional[str] = None
+
+    def _window(self, now: float) -> List[tuple]:
+        while self.samples and now - self.samples[0][0] > WINDOW_SECONDS:
+            self.samples.popleft()
+        return list(self.samples)
+
+    def summary(self, now: float) -> dict:
+        window = self._window(now)
+        total = len(window)
+        latencies = sorted(ms for _, ms, outcome in window if outcome == OK)
+
+        def rate(outcomes: Iterable[str]) -> float:
+            wanted = set(outcomes)
+            return round(sum(1 for _, _, outcome in window if outcome in wanted) / total, 3) if total else 0.0
+
+        def percentile(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 1)
+
+        return {
+            "calls": total,
+            "p50_ms": percentile(0.5),
+            "p95_ms": percentile(0.95),
+            "error_rate": rate((ERROR, QUOTA, TIMEOUT)),
+            "quota_rate": rate((QUOTA,)),
+            "timeout_rate": rate((TIMEOUT,)),
+            "ok_samples": len(latencies),
+        }
+
+
+class ModelRouter:
+    def __init__(self, priorities: Sequence[str]):
+        self.priorities: List[str] = list(priorities)
+        self._lock = threading.Lock()
+        self._stats: Dict[str, ModelStats] = {name: ModelStats() for name in self.priorities}
+
+    # ---------------- routing ----------------
+
+    def _admits(self, stats: ModelStats, now: float) -> bool:
+        if stats.state == CLOSED:
+            return True
+        if stats.state == OPEN and now >= stats.opened_until:
+            stats.state = HALF_OPEN
+            stats.trial_in_flight = False
+        if stats.state == HALF_OPEN and (not stats.trial_in_flight or now - stats.trial_started > TRIAL_TIMEOUT_SECONDS):
+            stats.trial_in_flight = True
+            stats.trial_started = now
+            return True
+        return False
+
+    def peek(self) -> Optional[str]:
+        """Model choose() would pick, without reserving a half-open trial"""
+        now = time.monotonic()
+        with self._lock:
+            for name in self.priorities:
+                stats = self._stats[name]
+                if stats.state == CLOSED or now >= stats.opened_until:
+                    return name
+        return self.priorities[0] if self.priorities else None
+
+    def choose(self, exclude: Iterable[str] = ()) -> Optional[str]:
+        """
+        Best model to call now, skipping `exclude`.
+
+        When every remaining breaker is open, the remaining model whose
+        cooldown ends first is returned: trying beats refusing a survivor.
+        """
+        excluded = set(exclude)
+        candidates = [name for name in self.priorities if name not in excluded]
+        if not candidates:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            for name in candidates:
+                if self._admits(self._stats[name], now):
+                    return name
+            return min(candidates, key=lambda name: self._stats[name].opened_until)
+
+    def hedge_delay(self, model_name: str, ceiling: float) -> float:
+        """Seconds to wait on model_name before hedging with a backup"""
+        with self._lock:
+            summary = self._stats[model_name].summary(time.monotonic())
+        if summary["ok_samples"] < MIN_SAMPLES_FOR_P95 or summary["p95_ms"] is None:
+            delay = HEDGE_DEFAULT_SECONDS
+        else:
+            delay = summary["p95_ms"] / 1000
+        return min(max(delay, HEDGE_MIN_SECONDS), ceiling)
+
+    # ---------------- outcomes ----------------
+
+    def _open(self, name: str, stats: ModelStats, now: float, reason: str):
+        if stats.state == HALF_OPEN:
+            stats.open_seconds = min(stats.open_seconds * 2, MAX_OPEN_SECONDS)
+        stats.state = OPEN
+        stats.opened_until = now + stats.open_seconds
+        stats.trial_in_flight = False
+        logger.warning(f"🔌 Circuit OPEN for {name} ({reason}) for {stats.open_seconds}s")
+
+    def record(self, model_name: str, latency_ms: float, outcome: str, error: Optional[BaseException] = None):
+        now = time.monotonic()
+        with self._lock:
+            stats = self._stats.get(model_name)
+            if stats is None:
+                return
+            stats.samples.append((now, latency_ms, outcome))
+            if error is not None:
+                stats.last_error = str(error)[:200]
+
+            if outcome == OK:
+                if stats.state != CLOSED:
+                    logger.info(f"✅ Circuit CLOSED for {model_name}")
+                stats.state = CLOSED
+                stats.consecutive_failures = 0
+                stats.open_seconds = OPEN_SECONDS
+                stats.trial_in_flight = False
+                return
+
+            stats.consecutive_failures += 1
+            if stats.state == HALF_OPEN:
+                self._open(model_name, stats, now, f"trial failed: {outcome}")
+            elif stats.state == CLOSED:
+                summary = stats.summary(now)
+                if outcome == QUOTA:
+                    self._open(model_name, stats, now, "429 / quota")
+                elif stats.consecutive_failures >= CONSECUTIVE_FAILURES_TO_OPEN:
+                    self._open(model_name, stats, now, f"{stats.consecutive_failures} failures in a row")
+                elif summary["calls"] >= MIN_CALLS_FOR_RATE and summary["error_rate"] >= ERROR_RATE_TO_OPEN:
+                    self._open(model_name, stats, now, f"error rate {summary['error_rate']:.0%}")
+
+    # ---------------- status ----------------
+
+    def status(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                name: {
+                    "state": stats.state,
+                    "open_for_seconds": max(0, round(stats.opened_until - now)) if stats.state == OPEN else 0,
+                    "last_error": stats.last_error,
+                    **stats.summary(now),
+                }
+                for name, stats in self._stats.items()
+            }
@@ -1,6 +1,6 @@
 # models.py - Rewritten to fix NameError and Base conflict
 
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, ForeignKey, UniqueConstraint, Index
 # 1. ✅ FIX: Import 'datetime' class from the 'datetime' module
 from datetime import datetime 
 # 2. ✅ FIX: REMOVE the declarative_base import, it's not needed here
@@ -13,6 +13,10 @@ from database import Base
 
 class IncidentReport(Base):
     __tablename__ = "incident_reports"
+    __table_args__ = (
+        # Map window queries: status filter + geohash prefix range + time window
+        Index("ix_incident_status_cell_time", "status", "geo_cell", "timestamp"),
+    )
     
     # Primary Key & Identification
     id = Column(Integer, primary_key=True, index=True)
@@ -39,6 +43,7 @@ class IncidentReport(Base):
     latitude = Column(Float)
     longitude = Column(Float)
     location_accuracy_km = Column(Float, default=5.0)
+    geo_cell = Column(String(12), nullable=True)  # geohash of (latitude, longitude)
     
     # Status & Verification
     status = Column(String(50), default="unverified", index=True)
@@ -63,4 +68,60 @@ class AggregatedStatistics(Base):
     county = Column(String(50), index=True)
     incident_type = Column(String(50), index=True)
     count = Column(Integer, default=0)
-    support_gap_score = Column(Float)
\ No newline at end of file
+    support_gap_score = Column(Float)
+
+class ReportSearchToken(Base):
+    """Blind index: keyed HMAC of each normalized narrative token, one row per (token, report)"""
+    __tablename__ = "report_search_tokens"
+    __table_args__ = (
+        UniqueConstraint("token_hash", "report_id", name="uq_search_token_report"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    token_hash = Column(String(64), nullable=False, index=True)
+    report_id = Column(Integer, ForeignKey("incident_reports.id", ondelete="CASCADE"), nullable=False, index=True)
+
+class ReportFingerprint(Base):
+    """Keyed content fingerprint (exact hash + MinHash signature) used for duplicate detection"""
+    __tablename__ = "report_fingerprints"
+    
+    report_id = Column(Integer, ForeignKey("incident_reports.id", ondelete="CASCADE"), primary_key=True)
+    content_hash = Column(String(64), nullable=False, index=True)
+    signature = Column(Text, nullable=False)  # MinHash values, hex, comma separated
+
+class ReportLSHBucket(Base):
+    """LSH band buckets - reports sharing a bucket are near-duplicate candidates"""
+    __tablename__ = "report_lsh_buckets"
+    
+    id = Column(Integer, primary_key=True)
+    bucket = Column(String(40), nullable=False, index=True)
+    report_id = Column(Integer, ForeignKey("incident_reports.id", ondelete="CASCADE"), nullable=False, index=True)
+
+class ReportDuplicateLink(Base):
+    """Records that a report was flagged as a (near-)duplicate of an earlier one"""
+    __tablename__ = "report_duplicate_links"
+    
+    id = Column(Integer, primary_key=True)
+    report_id = Column(Integer, ForeignKey("incident_reports.id", ondelete="CASCADE"), unique=True, nullable=False)
+    duplicate_of_id = Column(Integer, ForeignKey("incident_reports.id", ondelete="CASCADE"), nullable=False, index=True)
+    similarity = Column(Float, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class IdempotencyRecord(Base):
+    """Completed tool calls keyed by (session, turn, tool) - short-lived, purged after a TTL"""
+    __tablename__ = "idempotency_keys"
+    
+    key = Column(String(64), primary_key=True)
+    result = Column(Text, nullable=False)  # JSON tool result (no survivor plaintext)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+class MapChange(Base):
+    """Append-only log of map visibility changes; seq is the public delta-feed cursor"""
+    __tablename__ = "map_changes"
+    __table_args__ = {"sqlite_autoincrement": True}  # never reuse a cursor value after pruning
+    
+    seq = Column(Integer, primary_key=True, autoincrement=True)
+    report_id = Column(Integer, ForeignKey("incident_reports.id", ondelete="CASCADE"), nullable=False)
+    event = Column(String(10), nullable=False)  # visible | hidden
+    origin = Column(String(32), nullable=True)  # token of the worker that wrote it (map_feed.worker_token)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
@@ -1,21 +1,42 @@
 import logging
 import json
 import hashlib
+import threading
+from contextvars import ContextVar
 from datetime import datetime
 from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
 from pathlib import Path
 
 from database import SessionLocal
 from models import IncidentReport
 from crypto_utils import encrypt_text
+from geo_utils import geohash_encode, KENYA_COUNTY_CENTERS
+from search_index import index_report
+from resource_registry import resource_directory
+import idempotency
+import incident_events
+import timing
+import map_feed
+from response_cache import response_cache
+from dedup import compute_fingerprint, find_duplicate, record_fingerprint, record_duplicate
 
 logger = logging.getLogger("orchestrator")
 
+# Language of the chat turn the tools run in (follows the context into LLM worker threads)
+_turn_language: ContextVar[str] = ContextVar("vee_turn_language", default="en")
+
+
+def bind_language(language: str):
+    _turn_language.set(language)
+
 # ============================================================
-# LOAD GEONAMES DATA ON STARTUP
+# GEONAMES DATA (loaded by the startup warmup, or on first geocode)
 # ============================================================
 GEONAMES_DATA = {}
 LOCATION_CACHE = {}
+_geonames_lock = threading.Lock()
+_geonames_loaded = False
 
 def load_kenya_locations():
     """Load pre-processed GeoNames data"""
@@ -34,24 +55,21 @@ def load_kenya_locations():
         logger.error(f"❌ Error loading GeoNames: {e}")
         GEONAMES_DATA = {}
 
-# Load on module import
-load_kenya_locations()
+def ensure_kenya_locations():
+    """Load the GeoNames data once; cheap after the first call"""
+    global _geonames_loaded
+    if _geonames_loaded:
+        return
+    with _geonames_lock:
+        if not _geonames_loaded:
+            load_kenya_locations()
+            _geonames_loaded = True
 
 # Fallback county centers
-COUNTY_CENTERS = {
-    "nairobi": (-1.286389, 36.817223),
-    "nakuru": (-0.303099, 36.080025),
-    "mombasa": (-4.043740, 39.668207),
-    "kisumu": (-0.091702, 34.767956),
-    "uasin gishu": (0.514277, 35.269779),
-    "eldoret": (0.514277, 35.269779),
-    "machakos": (-1.51768, 37.26341),
-    "kajiado": (-1.8524, 36.7820),
-    "kiambu": (-1.1714, 36.8356),
-    "meru": (0.0469, 37.6502),
-    "kakamega": (0.2827, 34.7519),
-}
+COUNTY_CENTERS = {county.lower(): coords for county, coords in KENYA_COUNTY_CENTERS.items()}
+COUNTY_CENTERS["eldoret"] = KENYA_COUNTY_CENTERS["Uasin Gishu"]
 
+@timing.timed("geocode")
 def geocode_location_internal(location_string: str, county: str = None) -> tuple:
     """
     Geocode using GeoNames database with intelligent fallbacks.
@@ -69,6 +87,7 @@ def geocode_location_internal(location_string: str, county: str = None) -> tuple
         return LOCATION_CACHE[cache_key]
     
     query = location_string.lower().strip()
+    ensure_kenya_locations()
     
     # Try exact match
     if query in GEONAMES_DATA:
@@ -117,10 +136,39 @@ def geocode_location_internal(location_string: str, county: str = None) -> tuple
     return default
 
 
+def backfill_geo_cells(batch_size: int = 1000) -> int:
+    """Set geo_cell for reports saved before the column existed"""
+    db: Session = SessionLocal()
+    updated = 0
+    try:
+        while True:
+            reports = db.query(IncidentReport).filter(
+                IncidentReport.geo_cell.is_(None),
+                IncidentReport.latitude.isnot(None),
+                IncidentReport.longitude.isnot(None)
+            ).limit(batch_size).all()
+            if not reports:
+                break
+            for report in reports:
+                report.geo_cell = geohash_encode(report.latitude, report.longitude)
+            db.commit()
+            updated += len(reports)
+        if updated:
+            logger.info(f"✅ Backfilled geo_cell for {updated} reports")
+        return updated
+    except Exception as e:
+        db.rollback()
+        logger.error(f"❌ geo_cell backfill failed: {e}")
+        return updated
+    finally:
+        db.close()
+
+
 class VeeTools:
     """Tools for Gemini - Trauma-informed data collection for GBV mapping"""
 
     @staticmethod
+    @timing.timed_tool
     def save_incident_report(
         county: str,
         incident_type: str,
@@ -139,6 +187,17 @@ class VeeTools:
         Save GBV incident with coordinates for mapping.
         Auto-geocodes using GeoNames database.
         """
+        # At-most-once per chat turn and report: a retried/fallback call gets the original result.
+        # Keyed on the fields a replaying model repeats verbatim, never on its free-text wording
+        idempotency_key = idempotency.tool_call_key("save_incident_report", {
+            "county": county, "incident_type": incident_type,
+        })
+        if idempotency_key:
+            previous = idempotency.lookup(idempotency_key)
+            if previous:
+                logger.info("🔁 Duplicate save_incident_report call in same turn - returning original result")
+                return previous
+        
         db: Session = SessionLocal()
         
         try:
@@ -164,10 +223,14 @@ class VeeTools:
                     longitude = None
                     mapping_consent = False
             
-            # Hash for deduplication
+            # Unique submission id
             unique_string = f"{session_id}_{county}_{datetime.utcnow().isoformat()}"
             report_id_hash = hashlib.sha256(unique_string.encode()).hexdigest()
             
+            # Content-based duplicate check (keyed, on plaintext before encryption)
+            fingerprint = compute_fingerprint(incident_description, county)
+            duplicate = find_duplicate(db, fingerprint, session_id)
+            
             # Encrypt sensitive data
             enc_description = encrypt_text(incident_description)
             enc_location = encrypt_text(f"{specific_area}, {county}" if specific_area else county)
@@ -196,6 +259,11 @@ class VeeTools:
                 auto_verified = False
                 logger.info(f"🟡 Needs review: {incident_type_normalized}")
             
+            # Duplicates are kept for moderators but never mapped or counted
+            if duplicate:
+                status = "duplicate"
+                auto_verified = False
+            
             # Create report
             report = IncidentReport(
                 report_id_hash=report_id_hash,
@@ -209,6 +277,7 @@ class VeeTools:
                 relationship_type=relationship_type,
                 latitude=latitude if mapping_consent else None,
                 longitude=longitude if mapping_consent else None,
+                geo_cell=geohash_encode(latitude, longitude) if (mapping_consent and latitude is not None and longitude is not None) else None,
                 mapping_consent=mapping_consent,
                 support_needs=support_needs,
                 emotional_state=emotional_state,
@@ -218,10 +287,19 @@ class VeeTools:
             )
             
             db.add(report)
-            db.commit()
-            db.refresh(report)
+            db.flush()
+            
+            # Blind search tokens (plaintext never leaves this function)
+            index_report(db, report.id, incident_description)
+            
+            if duplicate:
+                record_duplicate(db, report.id, duplicate_of_id=duplicate[0], similarity=duplicate[1])
+            else:
+                record_fingerprint(db, report.id, fingerprint)
             
-            if auto_verified:
+            if duplicate:
+                msg = "We already have this report, so it has been linked to the earlier one. Thank you for sharing."
+            elif auto_verified:
                 if mapping_consent and latitude and longitude:
                     msg = f"Your report is verified and will appear on the map at {specific_area or county}."
                 else:
@@ -229,16 +307,51 @@ class VeeTools:
             else:
                 msg = "Your report is saved and will be reviewed shortly."
             
-            logger.info(f"✅ Saved report ID {report.id} | Coords: ({latitude}, {longitude}) | Status: {status}")
-            
-            return {
+            result = {
                 "success": True,
                 "report_id": str(report.id),
                 "auto_verified": auto_verified,
-                "mapped": (mapping_consent and latitude is not None),
+                "mapped": (mapping_consent and latitude is not None and not duplicate),
+                "duplicate_of": str(duplicate[0]) if duplicate else None,
                 "message": msg
             }
             
+            # Referral from the report's own point, closest first
+            if latitude is not None and longitude is not None:
+                result["nearby_support"] = [
+                    f"{resource.name}: {resource.phone} ({km:.0f} km)"
+                    for resource, km in resource_directory.current().nearest(latitude, longitude, k=3)
+                ]
+            
+            # Delta-feed cursor advances in the same transaction
+            map_feed.record_change(db, False, report)
+            
+            # Completed-call record commits atomically with the report
+            if idempotency_key:
+                idempotency.record(db, idempotency_key, result)
+            
+            db.commit()
+            
+            if idempotency_key:
+                idempotency.remember(idempotency_key, result)
+            
+            # Auto-verified, consented reports go straight onto the map
+            incident_events.publish_transition(False, report)
+            response_cache.bump()
+            
+            logger.info(f"✅ Saved report ID {report.id} | Coords: ({latitude}, {longitude}) | Status: {status}")
+            
+            return result
+            
+        except IntegrityError as e:
+            db.rollback()
+            # A concurrent attempt of the same tool call committed first
+            previous = idempotency.lookup(idempotency_key) if idempotency_key else None
+            if previous:
+                logger.info("🔁 Concurrent duplicate save_incident_report - returning original result")
+                return previous
+            logger.error(f"❌ Error saving report: {e}")
+            return {"success": False, "message": "Trouble saving. Your info is safe with me."}
         except Exception as e:
             logger.error(f"❌ Error saving report: {e}")
             db.rollback()
@@ -247,65 +360,17 @@ class VeeTools:
             db.close()
 
     @staticmethod
-    def find_resources(county: str, support_needs: str = "all"):
-        """Find support resources by location"""
-        logger.info(f"🔍 Finding resources in {county}")
-        
-        resources_db = {
-            "nairobi": {
-                "medical": [
-                    "Nairobi Women's Hospital - GBV Unit: 0733 123 456",
-                    "Kenyatta National Hospital: 0726 478 000"
-                ],
-                "legal": [
-                    "FIDA Kenya: 0721 234 567",
-                    "Legal Aid Nairobi: 0722 345 678"
-                ],
-                "counseling": [
-                    "LVCT Health: 1190",
-                    "Kenya Red Cross: 1199"
-                ],
-                "police": [
-                    "Gender Desk - Central: 0723 456 789"
-                ]
-            },
-            "mombasa": {
-                "medical": ["Coast General Hospital: 0734 567 890"],
-                "legal": ["Mombasa Women's Rights: 0723 456 789"],
-                "counseling": ["Coast Mental Health: 0712 345 678"]
-            },
-            "kisumu": {
-                "medical": ["Kisumu County Hospital: 0712 345 678"],
-                "legal": ["Legal Aid Kisumu: 0734 567 890"]
-            }
-        }
-        
-        county_lower = county.lower()
-        county_resources = resources_db.get(county_lower, {})
-        
-        if not county_resources:
-            return [
-                "\n📞 National GBV Helpline: 1195 (24/7, toll-free)",
-                "📞 Emergency Police: 999",
-                "📞 Childline: 116"
-            ]
-        
-        result = [f"\n**Support in {county.title()}:**\n"]
-        
-        if support_needs == "all":
-            for category, contacts in county_resources.items():
-                result.append(f"\n**{category.title()}:**")
-                for contact in contacts:
-                    result.append(f"  • {contact}")
-        else:
-            contacts = county_resources.get(support_needs, [])
-            if contacts:
-                result.append(f"\n**{support_needs.title()}:**")
-                for contact in contacts:
-                    result.append(f"  • {contact}")
+    @timing.timed_tool
+    def find_resources(county: str, support_needs: str = "all", specific_area: str = None):
+        """Find the support services nearest to the survivor (specific_area within county, if known)"""
+        logger.info(f"🔍 Finding resources near {specific_area + ', ' if specific_area else ''}{county}")
+        directory = resource_directory.current()
+        service = None if support_needs in (None, "", "all") else support_needs
+        language = _turn_language.get()
+        if not specific_area:
+            return directory.answer(county, service, language)
         
-        result.append("\n**National Emergency:**")
-        result.append("  • GBV Helpline: 1195 (24/7)")
-        result.append("  • Emergency Police: 999")
+        def locate():
+            return geocode_location_internal(f"{specific_area}, {county}", county=county)
         
-        return result
\ No newline at end of file
+        return directory.answer_near(f"{specific_area}, {county}", locate, service, language)
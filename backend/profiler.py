@@ -0,0 +1,149 @@
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger("profiler")
+
+# ============================================================
+# ON-DEMAND SAMPLING PROFILER
+# ============================================================
+# POST /admin/profile samples every thread of this worker with
+# sys._current_frames() for a few seconds and returns collapsed stacks
+# ("thread;file.py:Class.func;... count" per line), ready for flamegraph.pl,
+# speedscope or inferno. Nothing has to be installed or enabled beforehand
+# and nothing runs between profiles.
+#
+# Privacy: a sample is the *code identity* of each frame only - file name and
+# qualified function name. Frame locals, arguments, line contents and thread
+# payloads are never read, so a survivor's message cannot end up in a profile
+# however hot the code that handles it.
+#
+# Overhead: at most MAX_HZ samples per second for at most MAX_SECONDS, one
+# profile per worker at a time. The sampler holds the GIL while it walks the
+# stacks; if that exceeds MAX_OVERHEAD of wall time it halves its own rate.
+
+MAX_SECONDS = 60
+MAX_HZ = 200
+DEFAULT_HZ = 100
+MAX_OVERHEAD = float(os.getenv("VEE_PROFILE_MAX_OVERHEAD", "0.02"))
+MAX_DEPTH = 128
+GOVERNOR_WARMUP_SECONDS = 0.5
+
+# Leaf frames of a thread that is parked, not working (skipped unless include_idle)
+IDLE_LEAVES = {
+    "threading.py:Condition.wait",
+    "threading.py:Event.wait",
+    "threading.py:Thread._wait_for_tstate_lock",
+    "selectors.py:EpollSelector.select",
+    "selectors.py:PollSelector.select",
+    "selectors.py:SelectSelector.select",
+    "selectors.py:KqueueSelector.select",
+    "queue.py:Queue.get",
+    "thread.py:_worker",
+}
+
+_THREAD_SUFFIX = re.compile(r"[_-]?\d+$")
+
+
+class ProfilerBusy(Exception):
+    """Another profile is already running on this worker"""
+
+
+class SamplingProfiler:
+    def __init__(self):
+        self._running = threading.Lock()
+        self._labels: Dict[object, str] = {}
+        self.last: Optional[dict] = None
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            name = getattr(code, "co_qualname", code.co_name)
+            label = f"{os.path.basename(code.co_filename)}:{name}".replace(";", ":").replace(" ", "_")
+            self._labels[code] = label
+        return label
+
+    def _thread_names(self) -> Dict[int, str]:
+        return {thread.ident: _THREAD_SUFFIX.sub("", thread.name) or thread.name
+                for thread in threading.enumerate()}
+
+    def profile(self, seconds: float, hz: int = DEFAULT_HZ, include_idle: bool = False) -> Tuple[str, dict]:
+        """Sample for `seconds` (blocking; run it off the event loop); returns (collapsed stacks, stats)"""
+        seconds = min(max(seconds, 0.1), MAX_SECONDS)
+        hz = min(max(hz, 1), MAX_HZ)
+        if not self._running.acquire(blocking=False):
+            raise ProfilerBusy()
+        try:
+            return self._sample(seconds, hz, include_idle)
+        finally:
+            self._running.release()
+
+    def _sample(self, seconds: float, hz: int, include_idle: bool) -> Tuple[str, dict]:
+        me = threading.get_ident()
+        names = self._thread_names()
+        stacks: Counter = Counter()
+        interval = 1.0 / hz
+        samples = idle = throttled = 0
+        busy = 0.0
+
+        started = time.perf_counter()
+        deadline = started + seconds
+        next_at = started
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            frames = sys._current_frames()
+            for ident, frame in frames.items():
+                if ident == me:
+                    continue
+                labels = []
+                while frame is not None and len(labels) < MAX_DEPTH:
+                    labels.append(self._label(frame.f_code))
+                    frame = frame.f_back
+                if not labels:
+                    continue
+                if not include_idle and labels[0] in IDLE_LEAVES:
+                    idle += 1
+                    continue
+                if ident not in names:
+                    names = self._thread_names()
+                labels.append(names.get(ident, "thread"))
+                stacks[";".join(reversed(labels))] += 1
+            del frames, frame
+            samples += 1
+
+            finished = time.perf_counter()
+            busy += finished - now
+            # Governor: keep the time spent holding the GIL under MAX_OVERHEAD (judged after a short warmup)
+            if finished - started > GOVERNOR_WARMUP_SECONDS and busy > MAX_OVERHEAD * (finished - started) \
+                    and interval < 1.0:
+                interval = min(interval * 2, 1.0)
+                throttled += 1
+            next_at = max(next_at + interval, finished)
+            time.sleep(max(0.0, min(next_at, deadline) - time.perf_counter()))
+
+        elapsed = time.perf_counter() - started
+        stats = {
+            "seconds": round(elapsed, 2),
+            "samples": samples,
+            "requested_hz": hz,
+            "effective_hz": round(samples / elapsed, 1) if elapsed else 0.0,
+            "overhead": round(busy / elapsed, 4) if elapsed else 0.0,
+            "throttled": throttled,
+            "stacks": len(stacks),
+            "idle_skipped": idle,
+        }
+        self.last = stats
+        logger.info(f"🔥 Profiled {stats['seconds']}s: {samples} samples at {stats['effective_hz']} Hz, "
+                    f"overhead {stats['overhead']:.2%}")
+        collapsed = "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+        return collapsed, stats
+
+
+profiler = SamplingProfiler()
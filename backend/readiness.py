@@ -0,0 +1,134 @@
+import asyncio
+import inspect
+import logging
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger("readiness")
+
+# ============================================================
+# DEFERRED STARTUP & READINESS
+# ============================================================
+# Importing app.py only defines things; anything slow or fallible (schema
+# sync, GeoNames parsing, model configuration, the resource index) is a
+# component warmed in the background once the server is up. Each component
+# is a plain function (run in a thread) or a coroutine; it may wait for
+# others with `after`. A failed warmup never kills the worker: it is logged,
+# shown on /ready and retried with exponential backoff.
+#   /live   the process is up and serving (always 200)
+#   /ready  every *required* component is warm (503 until then)
+# Optional components (intent model, map indexes) only make things faster;
+# the code behind them works cold, just slower.
+
+RETRY_INITIAL_SECONDS = 1.0
+RETRY_MAX_SECONDS = 60.0
+
+PENDING = "pending"
+WARMING = "warming"
+READY = "ready"
+FAILED = "failed"
+
+
+class Component:
+    def __init__(self, name: str, warm: Callable, required: bool, after: Sequence[str]):
+        self.name = name
+        self.warm = warm
+        self.required = required
+        self.after = tuple(after)
+        self.state = PENDING
+        self.attempts = 0
+        self.duration_ms: Optional[float] = None
+        self.error: Optional[str] = None
+        self.done = asyncio.Event()
+
+    def status(self) -> dict:
+        return {
+            "state": self.state,
+            "required": self.required,
+            "attempts": self.attempts,
+            "duration_ms": self.duration_ms,
+            "error": self.error,
+        }
+
+
+class Readiness:
+    def __init__(self):
+        self._components: Dict[str, Component] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._started_at: Optional[float] = None
+        self._ready_at: Optional[float] = None
+
+    def register(self, name: str, warm: Callable, required: bool = True, after: Sequence[str] = ()):
+        self._components[name] = Component(name, warm, required, after)
+
+    # ---------------- warmup ----------------
+
+    async def _run(self, component: Component):
+        for name in component.after:
+            await self._components[name].done.wait()
+
+        delay = RETRY_INITIAL_SECONDS
+        while True:
+            component.state = WARMING
+            component.attempts += 1
+            started = time.perf_counter()
+            try:
+                if inspect.iscoroutinefunction(component.warm):
+                    await component.warm()
+                else:
+                    await asyncio.to_thread(component.warm)
+            except Exception as e:
+                component.state = FAILED
+                component.error = str(e)[:200]
+                logger.error(f"❌ Warmup of {component.name} failed (attempt {component.attempts}), "
+                             f"retrying in {delay:g}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RETRY_MAX_SECONDS)
+                continue
+
+            component.state = READY
+            component.error = None
+            component.duration_ms = round((time.perf_counter() - started) * 1000, 1)
+            component.done.set()
+            logger.info(f"✅ {component.name} warm in {component.duration_ms} ms")
+            if self._ready_at is None and self.is_ready():
+                self._ready_at = time.perf_counter()
+                logger.info(f"🚦 Ready in {(self._ready_at - self._started_at) * 1000:.0f} ms after startup")
+            return
+
+    def start(self):
+        """Warm every registered component on the running event loop (returns immediately)"""
+        self._started_at = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._run(component), name=f"warm-{component.name}")
+                       for component in self._components.values()]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def wait_ready(self, timeout: Optional[float] = None, optional: bool = False):
+        """Block until the required (or, with optional, all) components are warm - scripts and benchmarks"""
+        waits = [c.done.wait() for c in self._components.values() if c.required or optional]
+        await asyncio.wait_for(asyncio.gather(*waits), timeout)
+
+    # ---------------- status ----------------
+
+    def is_ready(self) -> bool:
+        return all(c.state == READY for c in self._components.values() if c.required)
+
+    def missing(self) -> List[str]:
+        return [c.name for c in self._components.values() if c.required and c.state != READY]
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.is_ready(),
+            "ready_after_ms": round((self._ready_at - self._started_at) * 1000, 1)
+            if self._ready_at is not None else None,
+            "components": {name: c.status() for name, c in self._components.items()},
+        }
+
+
+readiness = Readiness()
@@ -0,0 +1,499 @@
+import heapq
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from geo_utils import KENYA_COUNTY_CENTERS
+from resources_data import FALLBACK_HOTLINES, RESOURCES_FILE, SERVICE_TYPES, load_resources
+from translation_cache import translation_cache
+
+logger = logging.getLogger("resource_registry")
+
+# ============================================================
+# SUPPORT RESOURCE REGISTRY
+# ============================================================
+# A ResourceRegistry is one immutable, fully indexed snapshot of the
+# directory in resources_data's file. Lookups by county, by (county, service),
+# by service and by language are dict hits. Nearest-service referral uses a
+# static k-d tree over points on the unit sphere: straight-line (chord)
+# distance between unit vectors orders points exactly like great-circle
+# distance, so the tree's Euclidean pruning is valid for lat/lng and the
+# chord converts back to kilometres at the end. k-nearest is O(log n) on
+# average, and a service/language filter is applied while walking the tree.
+#
+# ResourceDirectory holds the live snapshot. A watcher thread polls the data
+# file; on a change it loads and indexes a complete new snapshot off to the
+# side and then swaps one reference, so a lookup never waits on a reload and
+# never sees a half-built index. Callers take current() once per request. A
+# file that fails to load or validate is logged and the old snapshot stays.
+#
+# Each snapshot also renders its answers (per county, service type and
+# language) while it is built, so the find_resources tool and the intent
+# router return a finished string. Kiswahili text comes from the persistent
+# translation cache only; anything missing is translated by the watcher in
+# the background, after which the snapshot is rebuilt with it.
+
+EARTH_RADIUS_KM = 6371.0088
+DEFAULT_PER_SERVICE = 2
+LEAF_SIZE = 16
+POLL_SECONDS = float(os.getenv("VEE_RESOURCES_POLL_SECONDS", "5"))
+
+_SERVICE_ALIASES = {"counselling": "counseling", "medical care": "medical", "hospital": "medical",
+                    "law": "legal", "legal aid": "legal", "gender desk": "police", "safe house": "shelter"}
+
+
+def unit_vector(lat: float, lng: float) -> Tuple[float, float, float]:
+    phi, lam = math.radians(lat), math.radians(lng)
+    return (math.cos(phi) * math.cos(lam), math.cos(phi) * math.sin(lam), math.sin(phi))
+
+
+def chord_to_km(chord: float) -> float:
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+
+def county_key(county: Optional[str]) -> str:
+    key = (county or "").strip().lower()
+    return key[:-len(" county")] if key.endswith(" county") else key
+
+
+_COUNTY_CENTERS = {county_key(name): coords for name, coords in KENYA_COUNTY_CENTERS.items()}
+
+
+def normalize_service(service: Optional[str]) -> Optional[str]:
+    """A SERVICE_TYPES value, or None for "all"/unknown"""
+    if not service:
+        return None
+    service = service.strip().lower()
+    service = _SERVICE_ALIASES.get(service, service)
+    return service if service in SERVICE_TYPES else None
+
+
+class Resource:
+    __slots__ = ("id", "name", "phone", "county", "service", "location", "lat", "lng", "services", "hours",
+                 "languages")
+
+    def __init__(self, resource_id: int, entry: dict):
+        self.id = resource_id
+        self.name = entry["name"]
+        self.phone = entry["phone"]
+        self.county = entry["county"]
+        self.service = entry["service"]
+        self.location = entry.get("location")
+        self.lat = float(entry["lat"])
+        self.lng = float(entry["lng"])
+        self.services = tuple(entry.get("services", ()))
+        self.hours = entry.get("hours")
+        self.languages = tuple(entry.get("languages", ("en", "sw")))
+
+    def as_dict(self, distance_km: Optional[float] = None) -> dict:
+        data = {"name": self.name, "phone": self.phone, "county": self.county, "type": self.service,
+                "services": list(self.services)}
+        if self.location:
+            data["location"] = self.location
+        if self.hours:
+            data["hours"] = self.hours
+        if distance_km is not None:
+            data["distance_km"] = round(distance_km, 1)
+        return data
+
+
+# ---------------- spatial index ----------------
+
+class KDTree:
+    """
+    Static k-d tree over 3-d points with leaf buckets of up to LEAF_SIZE.
+
+    Built with numpy (one argsort per inner node), queried in plain Python.
+    Inner nodes are (axis, split, left, right); leaves are (-1, point ids, -1, -1).
+    """
+
+    def __init__(self, points: Sequence[Tuple[float, float, float]]):
+        self.points = [tuple(point) for point in points]
+        self._nodes: list = []
+        array = np.asarray(self.points, dtype=float).reshape(-1, 3)
+        self._root = self._build(array, np.arange(len(array)))
+
+    def _build(self, array: np.ndarray, ids: np.ndarray) -> int:
+        node = len(self._nodes)
+        if len(ids) <= LEAF_SIZE:
+            self._nodes.append((-1, tuple(int(i) for i in ids), -1, -1))
+            return node
+        block = array[ids]
+        axis = int(np.argmax(block.max(axis=0) - block.min(axis=0)))
+        ordered = ids[np.argsort(block[:, axis], kind="stable")]
+        mid = len(ordered) // 2
+        self._nodes.append(None)
+        left = self._build(array, ordered[:mid])
+        right = self._build(array, ordered[mid:])
+        self._nodes[node] = (axis, float(array[ordered[mid], axis]), left, right)
+        return node
+
+    def nearest(self, point: Tuple[float, float, float], k: int,
+                accept: Optional[Callable[[int], bool]] = None) -> List[Tuple[float, int]]:
+        """Up to k (distance, point id) pairs, closest first, among points accept() allows"""
+        px, py, pz = point
+        points, nodes = self.points, self._nodes
+        heap: List[Tuple[float, int]] = []      # max-heap on squared distance: (-d2, id)
+        stack = [(0.0, self._root)]             # (squared distance to the node's region bound, node)
+
+        while stack:
+            bound, node = stack.pop()
+            if len(heap) >= k and bound >= -heap[0][0]:
+                continue
+            axis, split, left, right = nodes[node]
+            if axis < 0:
+                for pid in split:
+                    if accept is not None and not accept(pid):
+                        continue
+                    x, y, z = points[pid]
+                    d2 = (x - px) ** 2 + (y - py) ** 2 + (z - pz) ** 2
+                    if len(heap) < k:
+                        heapq.heappush(heap, (-d2, pid))
+                    elif d2 < -heap[0][0]:
+                        heapq.heapreplace(heap, (-d2, pid))
+                continue
+            diff = point[axis] - split
+            near, far = (left, right) if diff < 0 else (right, left)
+            stack.append((max(bound, diff * diff), far))
+            stack.append((bound, near))
+        return sorted((math.sqrt(-neg), pid) for neg, pid in heap)
+
+
+# ---------------- rendered answers ----------------
+
+LANGUAGES = ("en", "sw")
+ANSWER_CACHE_SIZE = 1024
+
+LABELS = {
+    "en": {
+        "local": "Support in {place}:", "nearest": "Nearest support to {place}:",
+        "hotlines": "National hotlines (free, 24/7):", "km": "{km:.0f} km",
+        "medical": "Medical", "legal": "Legal", "counseling": "Counseling", "police": "Police",
+        "shelter": "Shelter",
+    },
+    "sw": {
+        "local": "Msaada uliopo {place}:", "nearest": "Msaada ulio karibu zaidi na {place}:",
+        "hotlines": "Nambari za kitaifa (bure, saa 24):", "km": "km {km:.0f}",
+        "medical": "Matibabu", "legal": "Msaada wa kisheria", "counseling": "Ushauri nasaha", "police": "Polisi",
+        "shelter": "Makazi salama",
+    },
+}
+
+# (service type, [(resource, km or None)]) per group
+Groups = List[Tuple[str, List[Tuple[Resource, Optional[float]]]]]
+
+
+# ---------------- registry ----------------
+
+class ResourceRegistry:
+    """
+    One indexed, read-only snapshot of the directory.
+
+    Every (county, service type, language) answer is rendered when the
+    snapshot is built, so answer() is a dict hit. Free text is translated
+    through translate(text, language), which must not block; strings it has
+    no translation for stay in English and are listed in self.untranslated.
+    """
+
+    def __init__(self, entries: Sequence[dict], hotlines: Sequence[dict], version: str = "",
+                 translate: Optional[Callable[[str, str], Optional[str]]] = None):
+        self.version = version
+        self.resources: Tuple[Resource, ...] = tuple(Resource(i, entry) for i, entry in enumerate(entries))
+        self.hotlines: Tuple[dict, ...] = tuple(dict(h) for h in hotlines)
+        self._rendered = tuple(resource.as_dict() for resource in self.resources)
+
+        by_county: Dict[str, Dict[Optional[str], list]] = defaultdict(lambda: defaultdict(list))
+        by_service: Dict[str, list] = defaultdict(list)
+        by_language: Dict[str, set] = defaultdict(set)
+        for resource in self.resources:
+            county = county_key(resource.county)
+            by_county[county][None].append(resource)
+            by_county[county][resource.service].append(resource)
+            by_service[resource.service].append(resource)
+            for language in resource.languages:
+                by_language[language].add(resource.id)
+
+        self._county_names = {county_key(resource.county): resource.county for resource in self.resources}
+        self._by_county = {county: {svc: tuple(items) for svc, items in services.items()}
+                           for county, services in by_county.items()}
+        self._by_service = {svc: tuple(items) for svc, items in by_service.items()}
+        self._by_language = {lang: frozenset(ids) for lang, ids in by_language.items()}
+        self._tree = KDTree([unit_vector(r.lat, r.lng) for r in self.resources])
+
+        self._translate = translate
+        self.untranslated: set = set()
+        self._answers: Dict[Tuple[str, Optional[str], str], str] = {}
+        self._answers_near: "OrderedDict[tuple, str]" = OrderedDict()
+        self._answers_lock = threading.Lock()
+        county_names = {county_key(name): name for name in KENYA_COUNTY_CENTERS}
+        county_names.update(self._county_names)
+        for key, name in county_names.items():
+            for service in (None,) + SERVICE_TYPES:
+                referred, groups = self._select(key, service)
+                for language in LANGUAGES:
+                    self._answers[(key, service, language)] = self._render(name, referred, groups, language)
+        for language in LANGUAGES:
+            self._answers[("", None, language)] = self._render("Kenya", False, [], language)
+
+    # ---------------- exact lookups ----------------
+
+    def counties(self) -> List[str]:
+        """Counties with at least one local service"""
+        return sorted(self._county_names.values())
+
+    def in_county(self, county: str, service: Optional[str] = None) -> Tuple[Resource, ...]:
+        return self._by_county.get(county_key(county), {}).get(normalize_service(service), ())
+
+    def by_service(self, service: str) -> Tuple[Resource, ...]:
+        return self._by_service.get(normalize_service(service), ())
+
+    # ---------------- nearest ----------------
+
+    def nearest(self, lat: float, lng: float, k: int = 3, service: Optional[str] = None,
+                language: Optional[str] = None) -> List[Tuple[Resource, float]]:
+        """The k services closest to (lat, lng) as (resource, km), optionally one service type / language"""
+        service = normalize_service(service)
+        speaks = self._by_language.get(language) if language else None
+
+        def accept(rid: int) -> bool:
+            if service is not None and self.resources[rid].service != service:
+                return False
+            return speaks is None or rid in speaks
+
+        filtered = service is not None or speaks is not None
+        hits = self._tree.nearest(unit_vector(lat, lng), k, accept if filtered else None)
+        return [(self.resources[rid], chord_to_km(chord)) for chord, rid in hits]
+
+    def _nearest_groups(self, lat: float, lng: float, service: Optional[str], language: Optional[str] = None,
+                        per_service: int = DEFAULT_PER_SERVICE) -> Groups:
+        services = [service] if service else [svc for svc in SERVICE_TYPES if svc in self._by_service]
+        groups = []
+        for svc in services:
+            hits = self.nearest(lat, lng, per_service, svc, language)
+            if hits:
+                groups.append((svc, hits))
+        return groups
+
+    def _select(self, key: str, service: Optional[str]) -> Tuple[bool, Groups]:
+        """(referred, groups): the county's own services, else the nearest to its headquarters"""
+        local = self._by_county.get(key, {})
+        if local and (service is None or service in local):
+            services = [service] if service else [svc for svc in SERVICE_TYPES if svc in local]
+            return False, [(svc, [(resource, None) for resource in local[svc]]) for svc in services]
+        center = _COUNTY_CENTERS.get(key)
+        if center is None:
+            return True, []
+        return True, self._nearest_groups(center[0], center[1], service)
+
+    # ---------------- structured results ----------------
+
+    def _grouped(self, titled: List[Tuple[str, list]]) -> List[dict]:
+        results = [{"category": title,
+                    "resources": [self._rendered[r.id] if km is None else r.as_dict(km) for r, km in hits]}
+                   for title, hits in titled]
+        results.append({"category": "National Hotlines", "resources": list(self.hotlines)})
+        return results
+
+    def referral(self, lat: float, lng: float, service: Optional[str] = None, language: Optional[str] = None,
+                 per_service: int = DEFAULT_PER_SERVICE) -> List[dict]:
+        """Nearest services per type (or of one type), grouped like search(), national hotlines last"""
+        groups = self._nearest_groups(lat, lng, normalize_service(service), language, per_service)
+        return self._grouped([(f"Nearest {svc.title()}", hits) for svc, hits in groups])
+
+    def search(self, county: Optional[str] = None, service_type: Optional[str] = None) -> List[dict]:
+        """
+        Services for a county, grouped by type, national hotlines always last.
+        The resource dicts belong to the snapshot: read them, don't modify them.
+
+        A county without its own listed services (of the requested type) is
+        referred to the nearest ones from its headquarters.
+        """
+        key = county_key(county)
+        referred, groups = self._select(key, normalize_service(service_type))
+        if referred:
+            return self._grouped([(f"Nearest {svc.title()}", hits) for svc, hits in groups])
+        name = self._county_names[key]
+        return self._grouped([(f"{name} - {svc.title()}", hits) for svc, hits in groups])
+
+    # ---------------- rendered answers ----------------
+
+    def _text(self, text: str, language: str) -> str:
+        if language == "en" or self._translate is None:
+            return text
+        translated = self._translate(text, language)
+        if translated is None:
+            self.untranslated.add(text)
+            return text
+        return translated
+
+    def _render(self, place: str, referred: bool, groups: Groups, language: str) -> str:
+        labels = LABELS[language]
+        lines = [labels["nearest" if referred else "local"].format(place=place)]
+        for svc, hits in groups:
+            lines.append(f"\n{labels[svc]}:")
+            for resource, km in hits:
+                notes = [", ".join(self._text(item, language) for item in resource.services), resource.hours,
+                         resource.location, labels["km"].format(km=km) if km is not None else None]
+                notes = "; ".join(note for note in notes if note)
+                lines.append(f"  • {resource.name}: {resource.phone}" + (f" ({notes})" if notes else ""))
+        lines.append(f"\n{labels['hotlines']}")
+        for hotline in self.hotlines:
+            lines.append(f"  • {self._text(hotline['name'], language)}: {hotline['phone']}")
+        return "\n".join(lines)
+
+    def answer(self, county: Optional[str], service: Optional[str] = None, language: str = "en") -> str:
+        """Pre-rendered answer for a county (national hotlines only if it is not a county)"""
+        language = language if language in LANGUAGES else "en"
+        service = normalize_service(service)
+        return (self._answers.get((county_key(county), service, language))
+                or self._answers[("", None, language)])
+
+    def answer_near(self, place: str, locate: Callable[[], Tuple[float, float]], service: Optional[str] = None,
+                    language: str = "en") -> str:
+        """
+        Answer for a named place: the nearest services with distances.
+        Rendered once per (place, service, language) in this snapshot; locate()
+        (e.g. geocoding) is only called on a miss.
+        """
+        language = language if language in LANGUAGES else "en"
+        service = normalize_service(service)
+        key = (place.strip().lower(), service, language)
+        with self._answers_lock:
+            cached = self._answers_near.get(key)
+            if cached is not None:
+                self._answers_near.move_to_end(key)
+                return cached
+        lat, lng = locate()
+        text = self._render(place.strip().title(), True, self._nearest_groups(lat, lng, service), language)
+        with self._answers_lock:
+            self._answers_near[key] = text
+            while len(self._answers_near) > ANSWER_CACHE_SIZE:
+                self._answers_near.popitem(last=False)
+        return text
+
+
+# ---------------- live directory ----------------
+
+class ResourceDirectory:
+    def __init__(self, path: Path = RESOURCES_FILE, poll_seconds: float = POLL_SECONDS):
+        self.path = Path(path)
+        self.poll_seconds = poll_seconds
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._signature = None
+        self._reloads = 0
+        self._failures = 0
+        self._last_error: Optional[str] = None
+        self._last_build_ms: Optional[float] = None
+        self._loaded_at: Optional[float] = None
+        self._translated_snapshot: Optional[ResourceRegistry] = None
+        # National hotlines only until the first reload() (the startup warmup) indexes the file
+        self._snapshot = ResourceRegistry((), FALLBACK_HOTLINES, "fallback", translation_cache.lookup)
+
+    def warm(self):
+        """First load plus the watcher; raises so the startup warmup retries while there is no directory"""
+        translation_cache.load()
+        if not self.reload(force=True) and self._snapshot.version == "fallback":
+            raise RuntimeError(f"no resource directory at {self.path} ({self._last_error}) - "
+                               f"serving national hotlines only")
+        self.start_watching()
+
+    def current(self) -> ResourceRegistry:
+        return self._snapshot
+
+    def _file_signature(self):
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def reload(self, force: bool = False) -> bool:
+        """Re-index the data file if it changed (or force); True if a new snapshot was swapped in"""
+        with self._reload_lock:
+            try:
+                signature = self._file_signature()
+            except OSError as e:
+                self._failures += 1
+                self._last_error = str(e)
+                return False
+            if not force and signature == self._signature:
+                return False
+            
+            started = time.perf_counter()
+            try:
+                version, entries, hotlines = load_resources(self.path)
+                snapshot = ResourceRegistry(entries, hotlines, version, translation_cache.lookup)
+            except Exception as e:
+                # Don't retry the same broken file every poll; the next write changes the signature
+                self._signature = signature
+                self._failures += 1
+                self._last_error = str(e)[:200]
+                logger.error(f"❌ Resource reload failed, keeping {self._snapshot.version}: {e}")
+                return False
+            
+            self._snapshot = snapshot
+            self._signature = signature
+            self._reloads += 1
+            self._last_error = None
+            self._last_build_ms = round((time.perf_counter() - started) * 1000, 2)
+            self._loaded_at = time.time()
+            logger.info(f"✅ Resource directory {version}: {len(snapshot.resources)} services in "
+                        f"{len(snapshot.counties())} counties ({self._last_build_ms} ms)")
+            return True
+
+    # ---------------- watcher ----------------
+
+    def _translate_missing(self):
+        """Translate what the current snapshot rendered in English, then re-render with it"""
+        snapshot = self._snapshot
+        if snapshot.untranslated and snapshot is not self._translated_snapshot:
+            self._translated_snapshot = snapshot
+            if translation_cache.fill(snapshot.untranslated, "sw"):
+                self.reload(force=True)
+                self._translated_snapshot = self._snapshot
+
+    def _watch(self):
+        self._translate_missing()
+        while not self._stop.wait(self.poll_seconds):
+            self.reload()
+            self._translate_missing()
+
+    def start_watching(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="vee-resources", daemon=True)
+        self._thread.start()
+        logger.info(f"👀 Watching {self.path.name} every {self.poll_seconds:g}s")
+
+    def stop_watching(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_seconds + 1)
+            self._thread = None
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "version": snapshot.version,
+            "services": len(snapshot.resources),
+            "counties": len(snapshot.counties()),
+            "reloads": self._reloads,
+            "failures": self._failures,
+            "last_error": self._last_error,
+            "last_build_ms": self._last_build_ms,
+            "loaded_at": datetime.utcfromtimestamp(self._loaded_at).isoformat() if self._loaded_at else None,
+            "watching": self._thread is not None and self._thread.is_alive(),
+            "untranslated": len(snapshot.untranslated),
+            "translations": translation_cache.stats(),
+        }
+
+
+resource_directory = ResourceDirectory()
@@ -1,112 +1,89 @@
+import csv
+import json
 import logging
-from typing import List, Dict, Any, Optional
+import os
+from pathlib import Path
+from typing import List, Tuple
+
+from geo_utils import KENYA_BBOX
 
 logger = logging.getLogger(__name__)
 
 # ==========================================================
 # 🇰🇪 KENYAN GBV RESOURCES DATASET
-# 
-# NOTE: This is the large dictionary structure you provided in the chat history.
-# I am including a condensed version here for code stability.
+#
+# The support directory lives in a data file (resources.json by default,
+# VEE_RESOURCES_FILE to override) so a hotline number or a new clinic can
+# be changed without a code change or a restart: resource_registry watches
+# the file and swaps in a re-indexed snapshot.
+#
+# JSON: {"version": ..., "resources": [...], "national_hotlines": [...]}
+# CSV:  one row per service with the resource fields as columns; "services"
+#       and "languages" are ;-separated, rows with service "hotline" are
+#       national hotlines. Coordinates are the facility (or head office, for
+#       phone-based services) to roughly 100 m.
 # ==========================================================
-KENYA_GBV_RESOURCES = {
-    "Nairobi": {
-        "medical": [
-            {"name": "Kenyatta National Hospital - GBV Centre", "phone": "0709-854000", "location": "Hospital Road", "services": ["PEP", "Forensics"]},
-            {"name": "Nairobi Women's Hospital - GVRC", "phone": "0722-845841", "location": "Hurlingham", "services": ["Medical", "Counseling"]}
-        ],
-        "legal": [
-            {"name": "FIDA Kenya - Nairobi Office", "phone": "0800-720553", "services": ["Free legal advice", "Representation"]},
-            {"name": "Kituo Cha Sheria", "phone": "0730-123222", "services": ["Legal aid", "Advocacy"]}
-        ],
-        "counseling": [
-            {"name": "Befrienders Kenya", "phone": "0722-178177", "services": ["Emotional Support"], "hours": "24/7"}
-        ]
-    },
-    "Mombasa": {
-        "medical": [
-            {"name": "Coast General Hospital - GBV Centre", "phone": "041-2312301", "location": "Mombasa Island", "services": ["PEP", "Counseling"]}
-        ],
-        "legal": [
-            {"name": "FIDA Kenya - Mombasa Office", "phone": "041-2314925", "services": ["Legal aid"]}
-        ]
-    },
-    "Kisumu": {
-         "medical": [
-            {"name": "Jaramogi Oginga Odinga Teaching Hospital", "phone": "057-2023395", "services": ["Medical care", "Counseling"]}
-        ]
-    },
-    "Uasin Gishu": {
-         "medical": [
-            {"name": "Moi Teaching and Referral Hospital - GBV Centre", "phone": "053-2033471", "services": ["Medical care", "Forensics"]}
-        ]
-    }
-}
 
-# List of official counties for matching
-KENYA_COUNTY_NAMES = list(KENYA_GBV_RESOURCES.keys())
+SERVICE_TYPES = ("medical", "legal", "counseling", "police", "shelter")
+RESOURCES_FILE = Path(os.getenv("VEE_RESOURCES_FILE", Path(__file__).parent / "resources.json"))
 
-# ==========================================================
-# 🇰🇪 UNIFIED LOOKUP FUNCTIONS
-# ==========================================================
+REQUIRED_FIELDS = ("name", "phone", "county", "service", "lat", "lng")
+
+# Served if the data file cannot be read at startup - never run without these
+FALLBACK_HOTLINES = [
+    {"name": "GBV Helpline", "phone": "1195", "availability": "24/7", "type": "hotline"},
+    {"name": "Police Emergency", "phone": "999", "availability": "24/7", "type": "police"},
+    {"name": "Childline Kenya", "phone": "116", "availability": "24/7", "type": "counseling"},
+]
 
-def get_all_counties() -> List[str]:
-    """Returns a list of all counties with available resources."""
-    return KENYA_COUNTY_NAMES
 
-def search_resources(query: str = None, county: str = None, service_type: str = None):
-    """
-    Search resources with filters. This is the main function called by the AI tools.
-    """
-    results = []
-    
-    # Normalize county name
-    county_clean = county.strip().title() if county else None
+def _split(value) -> List[str]:
+    if isinstance(value, list):
+        return value
+    return [item.strip() for item in (value or "").split(";") if item.strip()]
 
-    # 1. Add county-specific resources (if county is known)
-    if county_clean and county_clean in KENYA_GBV_RESOURCES:
-        county_data = KENYA_GBV_RESOURCES[county_clean]
-        
-        # Filter by service type if requested
-        if service_type and service_type in county_data:
-            results.append({
-                "category": f"{county_clean} - {service_type.title()}",
-                "resources": county_data[service_type]
-            })
-        else:
-            # Add all resources for the county
-            for svc_type, resources in county_data.items():
-                 results.append({
-                    "category": f"{county_clean} - {svc_type.title()}",
-                    "resources": resources
-                })
 
-    # 2. Always add National Hotlines (Hardcoded for safety/reliability)
-    results.append({
-        "category": "National Hotlines",
-        "resources": [
-            {"name": "GBV Helpline", "phone": "1195", "availability": "24/7", "type": "hotline"},
-            {"name": "Police Emergency", "phone": "999", "availability": "24/7", "type": "police"},
-            {"name": "Childline Kenya", "phone": "116", "availability": "24/7", "type": "counseling"}
-        ]
-    })
-    
-    return results
+def _validate(entry: dict, row: int) -> dict:
+    missing = [field for field in REQUIRED_FIELDS if entry.get(field) in (None, "")]
+    if missing:
+        raise ValueError(f"resource {row}: missing {', '.join(missing)}")
+    if entry["service"] not in SERVICE_TYPES:
+        raise ValueError(f"resource {row}: unknown service '{entry['service']}'")
+    west, south, east, north = KENYA_BBOX
+    lat, lng = float(entry["lat"]), float(entry["lng"])
+    if not (south <= lat <= north and west <= lng <= east):
+        raise ValueError(f"resource {row}: ({lat}, {lng}) is outside Kenya")
+    entry = {key: value for key, value in entry.items() if value not in (None, "")}
+    entry.update(lat=lat, lng=lng, services=_split(entry.get("services")),
+                 languages=_split(entry.get("languages")) or ["en", "sw"])
+    return entry
 
-def get_resources_for_county(county: str, resource_type: str = None):
-    """Alias function maintained for compatibility with the old app.py structure."""
-    return search_resources(county=county, service_type=resource_type)
 
-auto_verify_types = [
-    'physical_violence',
-    'sexual_violence', 
-    'physical_assault',
-    'sexual_assault',
-    'rape',
-    'femicide'
-]
+def _validate_hotline(entry: dict, row: int) -> dict:
+    if not entry.get("name") or not entry.get("phone"):
+        raise ValueError(f"hotline {row}: needs a name and a phone")
+    return {key: value for key, value in entry.items() if value not in (None, "")}
+
+
+def load_resources(path: Path = RESOURCES_FILE) -> Tuple[str, List[dict], List[dict]]:
+    """(version, resources, national hotlines) from a JSON or CSV file; ValueError if anything is malformed"""
+    path = Path(path)
+    if path.suffix.lower() == ".csv":
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        version = f"{path.name}@{int(path.stat().st_mtime)}"
+        resources = [row for row in rows if row.get("service") != "hotline"]
+        hotlines = [{"name": row["name"], "phone": row["phone"], "availability": row.get("hours") or "24/7",
+                     "type": "hotline"} for row in rows if row.get("service") == "hotline"]
+    else:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        version = str(data.get("version") or f"{path.name}@{int(path.stat().st_mtime)}")
+        resources = data.get("resources", [])
+        hotlines = data.get("national_hotlines", [])
 
-if incident_type in auto_verify_types:
-    report.status = "verified"  # Shows on map NOW
-else:
-    report.status = "pending_review"     
\ No newline at end of file
+    resources = [_validate(dict(entry), row) for row, entry in enumerate(resources, 1)]
+    hotlines = [_validate_hotline(dict(entry), row) for row, entry in enumerate(hotlines, 1)]
+    if not hotlines:
+        raise ValueError("no national hotlines - refusing a directory without 1195/999")
+    return version, resources, hotlines
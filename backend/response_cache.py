@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+logger = logging.getLogger("response_cache")
+
+# ============================================================
+# VERSION-STAMPED RESPONSE CACHE
+# ============================================================
+# Read-heavy endpoints (map, dashboard stats, analytics) only change when a
+# report is saved or verified. Both write paths bump a data-version counter;
+# cached responses are keyed by (endpoint, params, version), so a bump makes
+# every older entry unreachable.
+#
+# Concurrent misses for the same key share one computation (single-flight).
+# The counter is per process: map changes from other workers bump it through
+# map_feed.catch_up(), and entries also expire after MAX_AGE_SECONDS to pick
+# up their other writes (new unverified reports in the admin stats).
+
+MAX_ENTRIES = 256
+MAX_AGE_SECONDS = 30
+
+CacheKey = Tuple[str, Tuple, int]
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int = MAX_ENTRIES, max_age: float = MAX_AGE_SECONDS):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._version = 0
+        self._entries: "OrderedDict[CacheKey, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[CacheKey, asyncio.Future] = {}
+        self._stats: Dict[str, Counter] = {}
+
+    # ---------------- versioning ----------------
+
+    def bump(self):
+        """Call after a committed write that changes what the cached endpoints return"""
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    # ---------------- lookups ----------------
+
+    def _count(self, endpoint: str, outcome: str):
+        self._stats.setdefault(endpoint, Counter())[outcome] += 1
+
+    async def get_or_compute(self, endpoint: str, params: Dict[str, Hashable], compute: Callable[[], Any]) -> Any:
+        """
+        Cached value for (endpoint, params) at the current data version.
+
+        compute() is synchronous (database work) and runs in a worker thread;
+        exceptions propagate to every caller waiting on it and are not cached.
+        """
+        key: CacheKey = (endpoint, tuple(sorted(params.items())), self._version)
+        now = time.monotonic()
+        owner = False
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and now - entry[0] < self.max_age:
+                self._entries.move_to_end(key)
+                self._count(endpoint, "hits")
+                return entry[1]
+
+            pending = self._inflight.get(key)
+            if pending is not None:
+                self._count(endpoint, "coalesced")
+            else:
+                self._count(endpoint, "misses")
+                pending = self._inflight[key] = asyncio.get_running_loop().create_future()
+                owner = True
+
+        if not owner:
+            return await asyncio.shield(pending)
+
+        try:
+            value = await asyncio.to_thread(compute)
+        except BaseException as e:
+            # Includes cancellation of the owning request: waiters must not hang
+            pending.set_exception(e if isinstance(e, Exception) else RuntimeError("computation cancelled"))
+            pending.exception()   # mark retrieved when nobody else was waiting
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+        with self._lock:
+            if key[2] == self._version:
+                self._entries[key] = (time.monotonic(), value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self._count(endpoint, "evictions")
+        pending.set_result(value)
+        return value
+
+    # ---------------- metrics ----------------
+
+    def stats(self) -> dict:
+        with self._lock:
+            endpoints = {}
+            for endpoint, counts in self._stats.items():
+                lookups = counts["hits"] + counts["misses"] + counts["coalesced"]
+                endpoints[endpoint] = {
+                    **dict(counts),
+                    "hit_rate": round((counts["hits"] + counts["coalesced"]) / lookups, 4) if lookups else 0.0,
+                }
+            return {
+                "data_version": self._version,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "max_age_seconds": self.max_age,
+                "endpoints": endpoints,
+            }
+
+
+response_cache = ResponseCache()
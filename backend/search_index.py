@@ -0,0 +1,153 @@
+import logging
+import re
+import unicodedata
+from typing import List, Set
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from database import SessionLocal, init_db
+from models import IncidentReport, ReportSearchToken
+from crypto_utils import blind_index_token, decrypt_text
+
+logger = logging.getLogger("search_index")
+
+# ============================================================
+# BLIND TOKEN INDEX FOR ENCRYPTED NARRATIVES
+# ============================================================
+# Narratives are stored encrypted, so moderators cannot search them with SQL.
+# At write time we split the plaintext into normalized tokens and store only a
+# keyed HMAC of each token. A keyword search hashes the query terms the same
+# way and becomes an indexed lookup - nothing is decrypted except the matches.
+
+MIN_TOKEN_LENGTH = 3
+MAX_TOKENS_PER_REPORT = 500
+MAX_QUERY_TERMS = 8
+
+# Common English/Kiswahili words that would match almost every report
+STOPWORDS = {
+    # English
+    "the", "and", "for", "was", "were", "with", "that", "this", "they", "them",
+    "then", "have", "has", "had", "but", "not", "you", "are", "from", "his",
+    "her", "she", "him", "when", "what", "who", "there", "their", "been", "into",
+    "out", "our", "all", "did", "does", "its", "just", "about", "after", "before",
+    # Kiswahili
+    "na", "ya", "wa", "za", "kwa", "la", "kwenye", "katika", "yeye", "mimi",
+    "wewe", "sisi", "nini", "hii", "hiyo", "huyo", "lakini", "pia", "sana", "kama",
+    "ili", "bado", "tu", "ni", "alikuwa", "nilikuwa",
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize_tokens(text: str) -> List[str]:
+    """
+    Split text into normalized, de-duplicated search tokens.
+
+    Lowercases, strips accents and punctuation, and drops short words and stopwords.
+    The same function is used at write time and query time so tokens always line up.
+    """
+    if not text:
+        return []
+
+    folded = unicodedata.normalize("NFKD", text.lower())
+    folded = "".join(ch for ch in folded if not unicodedata.combining(ch))
+
+    seen: Set[str] = set()
+    tokens = []
+    for token in _TOKEN_RE.findall(folded):
+        if len(token) < MIN_TOKEN_LENGTH or token in STOPWORDS or token in seen:
+            continue
+        seen.add(token)
+        tokens.append(token)
+        if len(tokens) >= MAX_TOKENS_PER_REPORT:
+            break
+    return tokens
+
+
+def index_report(db: Session, report_id: int, plaintext: str) -> int:
+    """
+    Add blind tokens for a report to the session (caller commits).
+
+    Returns:
+        int: number of tokens indexed
+    """
+    hashes = {blind_index_token(token) for token in normalize_tokens(plaintext)}
+    db.add_all(ReportSearchToken(token_hash=h, report_id=report_id) for h in hashes)
+    return len(hashes)
+
+
+def search_report_ids(db: Session, query: str, limit: int = 50, offset: int = 0) -> List[int]:
+    """
+    Find reports whose narrative contains ALL query terms.
+
+    Args:
+        query: Free-text keywords, e.g. "panga school"
+
+    Returns:
+        list of report ids, newest first
+    """
+    terms = normalize_tokens(query)[:MAX_QUERY_TERMS]
+    if not terms:
+        return []
+
+    hashes = [blind_index_token(term) for term in terms]
+
+    rows = db.query(ReportSearchToken.report_id).filter(
+        ReportSearchToken.token_hash.in_(hashes)
+    ).group_by(ReportSearchToken.report_id).having(
+        func.count(ReportSearchToken.token_hash) == len(hashes)
+    ).order_by(ReportSearchToken.report_id.desc()).offset(offset).limit(limit).all()
+
+    return [row[0] for row in rows]
+
+
+def rebuild_index(batch_size: int = 500) -> int:
+    """
+    Drop and rebuild the whole blind index from the encrypted narratives.
+
+    Needed after changing BLIND_INDEX_KEY / ENCRYPTION_KEY or for reports saved
+    before the index existed. Decrypts in batches to keep memory flat.
+    """
+    db: Session = SessionLocal()
+    total_reports = 0
+
+    try:
+        logger.info("🔄 Rebuilding blind search index...")
+        db.query(ReportSearchToken).delete(synchronize_session=False)
+        db.commit()
+
+        last_id = 0
+        while True:
+            batch = db.query(
+                IncidentReport.id, IncidentReport.incident_description_encrypted
+            ).filter(
+                IncidentReport.id > last_id
+            ).order_by(IncidentReport.id).limit(batch_size).all()
+
+            if not batch:
+                break
+
+            for report_id, encrypted in batch:
+                if encrypted:
+                    index_report(db, report_id, decrypt_text(encrypted))
+                last_id = report_id
+
+            db.commit()
+            total_reports += len(batch)
+            logger.info(f"   ✓ Indexed {total_reports} reports")
+
+        logger.info(f"✅ Blind index rebuilt for {total_reports} reports")
+        return total_reports
+
+    except Exception as e:
+        db.rollback()
+        logger.error(f"❌ Blind index rebuild failed: {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    init_db()
+    rebuild_index()
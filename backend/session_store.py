@@ -0,0 +1,164 @@
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Optional
+
+logger = logging.getLogger("session_store")
+
+# ============================================================
+# BOUNDED CHAT SESSION STORE
+# ============================================================
+# Chat sessions (Gemini chat object + model handle) keyed by
+# "<session_id>_<language>", kept in LRU order of last use. A session is
+# evicted when it has been idle longer than IDLE_TTL_SECONDS, when the store
+# holds more than MAX_SESSIONS, or (oldest first) when the combined history
+# size passes HISTORY_BUDGET_BYTES. History size is accounted incrementally
+# after each turn, so stats() is O(1) no matter how many sessions exist.
+
+MAX_SESSIONS = 2000
+IDLE_TTL_SECONDS = 30 * 60
+HISTORY_BUDGET_BYTES = 64 * 1024 * 1024
+
+
+def content_size(content: Any) -> int:
+    """Approximate in-memory size of one history message"""
+    pb = getattr(content, "_pb", None)
+    if pb is not None:
+        try:
+            return pb.ByteSize()
+        except Exception:
+            pass
+    return len(str(content))
+
+
+class ChatSession:
+    __slots__ = ("key", "language", "chat", "manager", "created_at", "last_used",
+                 "history_bytes", "history_messages", "summary", "pending")
+
+    def __init__(self, key: str, language: str, chat: Any, manager: Any):
+        self.key = key
+        self.language = language
+        self.chat = chat
+        self.manager = manager
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.history_bytes = 0
+        self.history_messages = 0
+        self.summary = None             # history_manager.IncidentSummary once turns are compacted
+        self.pending = []               # (user, reply) exchanges answered by the intent router, not yet in history
+
+
+class SessionStore:
+    """Thread-safe LRU + idle-TTL store for chat sessions"""
+
+    def __init__(self, max_sessions: int = MAX_SESSIONS, idle_ttl: float = IDLE_TTL_SECONDS,
+                 history_budget: int = HISTORY_BUDGET_BYTES):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.history_budget = history_budget
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._total_history_bytes = 0
+        self._evictions = Counter()
+        self._created = 0
+
+    # ---------------- eviction ----------------
+
+    def _evict(self, key: str, reason: str):
+        session = self._sessions.pop(key)
+        self._total_history_bytes -= session.history_bytes
+        self._evictions[reason] += 1
+
+    def _evict_expired(self, now: float):
+        # LRU order == last-used order, so expired sessions are at the front
+        while self._sessions:
+            key, session = next(iter(self._sessions.items()))
+            if now - session.last_used < self.idle_ttl:
+                break
+            self._evict(key, "idle")
+
+    def _enforce_limits(self, keep: Optional[str] = None):
+        while len(self._sessions) > self.max_sessions:
+            self._evict(next(iter(self._sessions)), "capacity")
+        while self._total_history_bytes > self.history_budget and len(self._sessions) > 1:
+            oldest = next(iter(self._sessions))
+            if oldest == keep:
+                break
+            self._evict(oldest, "memory")
+
+    # ---------------- access ----------------
+
+    def get(self, key: str) -> Optional[ChatSession]:
+        now = time.monotonic()
+        with self._lock:
+            self._evict_expired(now)
+            session = self._sessions.get(key)
+            if session is not None:
+                session.last_used = now
+                self._sessions.move_to_end(key)
+            return session
+
+    def create(self, key: str, language: str, chat: Any, manager: Any) -> ChatSession:
+        session = ChatSession(key, language, chat, manager)
+        with self._lock:
+            previous = self._sessions.pop(key, None)
+            if previous is not None:
+                self._total_history_bytes -= previous.history_bytes
+            self._sessions[key] = session
+            self._created += 1
+            self._evict_expired(session.last_used)
+            self._enforce_limits(keep=key)
+        return session
+
+    def replace_chat(self, session: ChatSession, chat: Any):
+        """Swap the chat object (model fallback); the new chat's history is re-accounted"""
+        with self._lock:
+            session.chat = chat
+        self.recount(session)
+
+    def recount(self, session: ChatSession):
+        """Re-account the whole history after it was replaced or compacted"""
+        with self._lock:
+            if self._sessions.get(session.key) is session:
+                self._total_history_bytes -= session.history_bytes
+            session.history_bytes = 0
+            session.history_messages = 0
+        self.account(session)
+
+    def account(self, session: ChatSession):
+        """Add the size of history messages appended since the last call"""
+        history = getattr(session.chat, "history", None) or []
+        new_messages = history[session.history_messages:]
+        added = sum(content_size(content) for content in new_messages)
+        with self._lock:
+            session.history_messages = len(history)
+            session.history_bytes += added
+            if self._sessions.get(session.key) is session:
+                self._total_history_bytes += added
+                self._enforce_limits(keep=session.key)
+
+    def discard(self, key: str):
+        with self._lock:
+            if key in self._sessions:
+                self._evict(key, "discarded")
+
+    # ---------------- metrics ----------------
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "active": len(self._sessions),
+                "created": self._created,
+                "max_sessions": self.max_sessions,
+                "idle_ttl_seconds": self.idle_ttl,
+                "history_bytes": self._total_history_bytes,
+                "history_budget_bytes": self.history_budget,
+                "evictions": dict(self._evictions),
+            }
+
+
+session_store = SessionStore()
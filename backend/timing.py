@@ -0,0 +1,129 @@
+import contextvars
+import functools
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+# ============================================================
+# PER-TURN STAGE TIMING
+# ============================================================
+# A chat turn can be broken down into stages (session, llm, tool, geocode,
+# encrypt, decrypt, db_commit). Code marks a stage with
+# `with timing.stage("name"):` or `@timing.timed("name")`; the time is only
+# collected while a TurnTimings is bound with bind_turn(), otherwise stage()
+# is a single contextvar lookup. metrics.MetricsMiddleware binds one per HTTP
+# request and folds it into the /metrics histograms when the response ends.
+#
+# Times are exclusive: a stage's nested stages are subtracted from it, so
+# "llm" is model time only and "tool" excludes the geocoding/encryption/commit
+# it triggered. Context copies made for worker threads (llm_pool.run,
+# asyncio.to_thread) share the same TurnTimings and enclosing frame, so tool
+# calls made inside the SDK's function calling still land in the right turn.
+
+STAGES = ("session", "llm", "tool", "geocode", "encrypt", "decrypt", "db_commit")
+
+
+class TurnTimings:
+    """Exclusive milliseconds per stage, plus the tools called (and their inclusive ms), for one turn"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages: Dict[str, float] = defaultdict(float)
+        self.tools: List[str] = []
+        self.tool_ms: List[Tuple[str, float]] = []
+
+    def add(self, name: str, ms: float):
+        with self._lock:
+            self.stages[name] += ms
+
+    def note_tool(self, name: str):
+        with self._lock:
+            self.tools.append(name)
+
+    def note_tool_time(self, name: str, ms: float):
+        with self._lock:
+            self.tool_ms.append((name, ms))
+
+    def as_dict(self) -> Dict[str, float]:
+        with self._lock:
+            return {name: round(ms, 3) for name, ms in self.stages.items()}
+
+
+_turn: contextvars.ContextVar[Optional[TurnTimings]] = contextvars.ContextVar("turn_timings", default=None)
+# Child-time accumulator of the innermost open stage ([ms]) - mutable so threads can add to it
+_frame: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar("stage_frame", default=None)
+
+
+def bind_turn(timings: Optional[TurnTimings] = None) -> TurnTimings:
+    """Collect stage times for the rest of this context (one turn)"""
+    timings = timings or TurnTimings()
+    _turn.set(timings)
+    _frame.set(None)
+    return timings
+
+
+def current_turn() -> Optional[TurnTimings]:
+    return _turn.get()
+
+
+@contextmanager
+def stage(name: str):
+    timings = _turn.get()
+    if timings is None:
+        yield
+        return
+    parent = _frame.get()
+    frame = [0.0]
+    token = _frame.set(frame)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = (time.perf_counter() - started) * 1000
+        _frame.reset(token)
+        if parent is not None:
+            parent[0] += elapsed
+        timings.add(name, elapsed - frame[0])
+
+
+def record(name: str, ms: float):
+    """Add an already-measured span (e.g. from a library event hook) to the bound turn"""
+    timings = _turn.get()
+    if timings is None:
+        return
+    parent = _frame.get()
+    if parent is not None:
+        parent[0] += ms
+    timings.add(name, ms)
+
+
+def timed(name: str) -> Callable:
+    """Decorator form of stage() for functions that are always one span"""
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _turn.get() is None:
+                return fn(*args, **kwargs)
+            with stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def timed_tool(fn: Callable) -> Callable:
+    """Run a model-callable tool as a "tool" stage (signature and docstring are kept for the SDK)"""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        timings = _turn.get()
+        if timings is None:
+            return fn(*args, **kwargs)
+        timings.note_tool(fn.__name__)
+        started = time.perf_counter()
+        try:
+            with stage("tool"):
+                return fn(*args, **kwargs)
+        finally:
+            timings.note_tool_time(fn.__name__, (time.perf_counter() - started) * 1000)
+    return wrapper
@@ -0,0 +1,139 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+try:
+    from deep_translator import GoogleTranslator
+except ImportError:     # optional: without it Kiswahili answers keep English descriptions
+    GoogleTranslator = None
+
+logger = logging.getLogger("translation_cache")
+
+# ============================================================
+# PERSISTENT TRANSLATION CACHE
+# ============================================================
+# Free-text directory fields (service descriptions, hotline names) are
+# written in English. Kiswahili answers translate each one once with
+# deep-translator and keep the result in a small SQLite file, so restarts and
+# directory reloads never repeat a round trip. lookup() only reads memory and
+# is what rendering uses; the network is only touched by fill(), which the
+# resource watcher runs in the background for whatever lookup() missed.
+# The file keeps at most MAX_ENTRIES rows, oldest translations dropped first.
+# It lives next to the other backend data files and is opened by load() in the
+# startup warmup (or the first fill()), never on import.
+
+CACHE_PATH = os.getenv("VEE_TRANSLATION_CACHE", str(Path(__file__).parent / "translation_cache.db"))
+MAX_ENTRIES = int(os.getenv("VEE_TRANSLATION_CACHE_MAX", "5000"))
+TRANSLATION_ENABLED = os.getenv("VEE_TRANSLATE", "1") != "0"
+SOURCE_LANGUAGE = "en"
+
+
+class TranslationCache:
+    def __init__(self, path: str = CACHE_PATH, max_entries: int = MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._memory: Dict[Tuple[str, str], str] = {}
+        self._conn: Optional[sqlite3.Connection] = None
+        self._hits = 0
+        self._misses = 0
+        self._translated = 0
+        self._failures = 0
+        self._opened = False
+
+    def load(self):
+        """Open the SQLite file and read the cached translations into memory (once)"""
+        with self._lock:
+            if self._opened:
+                return
+            self._opened = True
+        try:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                "target TEXT NOT NULL, source TEXT NOT NULL, translated TEXT NOT NULL, last_used REAL NOT NULL, "
+                "PRIMARY KEY (target, source))"
+            )
+            rows = conn.execute(
+                "SELECT target, source, translated FROM translations ORDER BY last_used DESC LIMIT ?",
+                (self.max_entries,)
+            ).fetchall()
+            # Oldest first, so eviction pops from the front
+            self._memory = {(target, source): translated for target, source, translated in reversed(rows)}
+            self._conn = conn
+            if rows:
+                logger.info(f"✅ Loaded {len(rows)} cached translations")
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Translation cache unavailable ({e}); translating in memory only")
+
+    def lookup(self, text: str, target: str) -> Optional[str]:
+        """Cached translation of text, the text itself for the source language, else None (no network, no disk)"""
+        if target == SOURCE_LANGUAGE or not text:
+            return text
+        translated = self._memory.get((target, text))
+        if translated is None:
+            self._misses += 1
+        else:
+            self._hits += 1
+        return translated
+
+    def fill(self, texts: Iterable[str], target: str) -> int:
+        """Translate and store whatever is not cached yet (network; run off the request path)"""
+        if not TRANSLATION_ENABLED or GoogleTranslator is None or target == SOURCE_LANGUAGE:
+            return 0
+        self.load()
+        missing = sorted({text for text in texts if text and (target, text) not in self._memory})
+        if not missing:
+            return 0
+
+        translator = GoogleTranslator(source=SOURCE_LANGUAGE, target=target)
+        now = time.time()
+        added = []
+        for text in missing:
+            try:
+                translated = translator.translate(text)
+            except Exception as e:
+                self._failures += 1
+                logger.warning(f"⚠️ Translation failed for '{text[:40]}': {e}")
+                break
+            if translated:
+                added.append((target, text, translated, now))
+
+        with self._lock:
+            for target_lang, text, translated, _ in added:
+                self._memory[(target_lang, text)] = translated
+            self._translated += len(added)
+            if self._conn is not None and added:
+                try:
+                    self._conn.executemany("INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?)", added)
+                    self._conn.execute(
+                        "DELETE FROM translations WHERE rowid NOT IN "
+                        "(SELECT rowid FROM translations ORDER BY last_used DESC LIMIT ?)", (self.max_entries,)
+                    )
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    logger.warning(f"⚠️ Could not persist translations: {e}")
+            while len(self._memory) > self.max_entries:
+                self._memory.pop(next(iter(self._memory)))
+        if added:
+            logger.info(f"🌍 Translated {len(added)} directory strings to {target}")
+        return len(added)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._memory),
+            "max_entries": self.max_entries,
+            "hits": self._hits,
+            "misses": self._misses,
+            "translated": self._translated,
+            "failures": self._failures,
+            "enabled": TRANSLATION_ENABLED and GoogleTranslator is not None,
+            "persistent": self._conn is not None,
+        }
+
+
+translation_cache = TranslationCache()
@@ -23,6 +23,8 @@ export interface Chat {
   messages: ChatMessage[];
 }
 
+const MAX_SEND_ATTEMPTS = 3;
+
 export default function ChatLayout({
   children,
 }: {
@@ -207,31 +209,90 @@ export default function ChatLayout({
     }
   };
 
-  const sendMessageToVee = async (message: string): Promise<string> => {
+  const sendMessageToVee = async (
+    message: string,
+    onToken?: (text: string) => void
+  ): Promise<string> => {
     if (!message.trim()) {
       return language === 'sw' ? "Tafadhali ingiza ujumbe." : "Please enter a message.";
     }
 
+    // One id per user message, reused by every retry, so the backend runs its tools (saving a report) once
+    const messageId = `msg_${Date.now()}_${Math.random().toString(36).substr(2, 9)}`;
+
     try {
-      const response = await fetch("http://localhost:8000/chat", {
-        method: "POST",
-        headers: { 
-          "Content-Type": "application/json",
-          "Accept": "application/json"
-        },
-        body: JSON.stringify({
-          message: message.trim(),
-          session_id: sessionId,
-          language: language
-        }),
-      });
-
-      if (!response.ok) {
+      // Streamed reply: tokens are shown as they arrive. A connection that drops
+      // before any token arrives is retried with the same message id.
+      let response!: Response;
+      for (let attempt = 1; ; attempt++) {
+        try {
+          response = await fetch("http://localhost:8000/chat/stream", {
+            method: "POST",
+            headers: { 
+              "Content-Type": "application/json",
+              "Accept": "text/event-stream"
+            },
+            body: JSON.stringify({
+              message: message.trim(),
+              session_id: sessionId,
+              language: language,
+              message_id: messageId
+            }),
+          });
+          break;
+        } catch (error) {
+          if (attempt >= MAX_SEND_ATTEMPTS) throw error;
+          await new Promise(resolve => setTimeout(resolve, 1000 * attempt));
+        }
+      }
+
+      // Server is shedding load: show its "please wait" message instead of an error
+      if (response.status === 503) {
+        const busy = await response.json().catch(() => null);
+        return busy?.detail || (language === 'sw'
+          ? "Tafadhali subiri kidogo kisha ujaribu tena."
+          : "Please wait a moment and try again.");
+      }
+
+      if (!response.ok || !response.body) {
         throw new Error(`Server Error: ${response.status}`);
       }
 
-      const data = await response.json();
-      return data.text || (language === 'sw' 
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      let streamed = "";
+      let finalText: string | null = null;
+
+      while (finalText === null) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        // SSE frames are separated by a blank line
+        let boundary;
+        while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+          const frame = buffer.slice(0, boundary);
+          buffer = buffer.slice(boundary + 2);
+
+          const event = frame.match(/^event: (.*)$/m)?.[1];
+          const data = frame.match(/^data: (.*)$/m)?.[1];
+          if (!event || !data) continue;
+          const payload = JSON.parse(data);
+
+          if (event === "token") {
+            streamed += payload.text;
+            onToken?.(payload.text);
+          } else if (event === "done") {
+            finalText = payload.text || streamed;
+          } else if (event === "error") {
+            // Keep any partial reply and append the safe fallback message
+            finalText = streamed ? `${streamed}\n\n${payload.text}` : payload.text;
+          }
+        }
+      }
+
+      return finalText || streamed || (language === 'sw' 
         ? "Ninasikiliza, lakini nina shida kujibu. Tafadhali piga 1195."
         : "I am listening, but having trouble replying. Please call 1195.");
 
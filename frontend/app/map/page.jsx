@@ -223,6 +223,19 @@ function EnhancedFilterBar({
 
 // ==================== MAIN COMPONENT ====================
 
+// Columnar /api/incidents payload -> one object per point
+function expandColumnar({ columns, dictionaries }) {
+  return columns.id.map((id, i) => ({
+    id,
+    lat: columns.lat[i],
+    lng: columns.lng[i],
+    type: dictionaries.type[columns.type[i]],
+    county: dictionaries.county[columns.county[i]],
+    area: dictionaries.area[columns.area[i]],
+    timeframe: dictionaries.timeframe[columns.timeframe[i]],
+  }));
+}
+
 export default function MapPage() {
   const [reports, setReports] = useState([]);
   const [filteredReports, setFilteredReports] = useState([]);
@@ -233,11 +246,26 @@ export default function MapPage() {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
 
+  const [bbox, setBbox] = useState(null);
+  const [cursor, setCursor] = useState(null);
+  const [reloadToken, setReloadToken] = useState(0);
+
   useEffect(() => {
+    // Type, time window, location and the visible map window are filtered server-side
+    const params = new URLSearchParams({ format: "columnar" });
+    if (filter !== "all") params.set("type", filter);
+    if (locationFilter !== "all") params.set("county", locationFilter);
+    if (bbox) params.set("bbox", bbox);
+    const windowHours = { "24h": 24, "7d": 24 * 7, "30d": 24 * 30, "90d": 24 * 90 }[timeFilter];
+    if (windowHours) {
+      params.set("since", new Date(Date.now() - windowHours * 3600 * 1000).toISOString());
+    }
+
     async function fetchReports() {
       try {
-        const res = await fetch(`${API_URL}/api/incidents`, {
-          cache: "no-store",
+        // "no-cache" revalidates with If-None-Match, so an unchanged map is a 304
+        const res = await fetch(`${API_URL}/api/incidents?${params.toString()}`, {
+          cache: "no-cache",
         });
 
         if (!res.ok) throw new Error(`Failed: ${res.status}`);
@@ -246,7 +274,9 @@ export default function MapPage() {
         console.log("API Response:", data);
         
         // Extract incidents from the response
-        const incidents = data.data?.incidents || [];
+        const incidents = data.data?.columns
+          ? expandColumnar(data.data)
+          : data.data?.incidents || [];
         console.log("Processed incidents:", incidents);
         
         const validIncidents = incidents.filter(incident => 
@@ -260,6 +290,7 @@ export default function MapPage() {
 
         setReports(validIncidents);
         setFilteredReports(validIncidents);
+        setCursor(data.data?.cursor ?? null);
 
       } catch (err) {
         console.error("Error fetching incidents:", err);
@@ -321,64 +352,65 @@ export default function MapPage() {
       }
     }
 
-    fetchReports();
-  }, []);
+    // Debounce so a map pan fires one request
+    const timer = setTimeout(fetchReports, 300);
+    return () => clearTimeout(timer);
+  }, [filter, timeFilter, locationFilter, bbox, reloadToken]);
 
-  // Apply all filters
+  // Live updates: apply visibility deltas after the snapshot instead of refetching it
   useEffect(() => {
-    let filtered = reports;
-
-    // Incident type filter
-    if (filter !== "all") {
-      filtered = filtered.filter(report => report.type === filter);
+    if (cursor == null) return;
+
+    // The server only streams points inside the same type, county, bbox and time window as the snapshot
+    const params = new URLSearchParams({ since: String(cursor) });
+    if (filter !== "all") params.set("type", filter);
+    if (locationFilter !== "all") params.set("county", locationFilter);
+    if (bbox) params.set("bbox", bbox);
+    const windowHours = { "24h": 24, "7d": 24 * 7, "30d": 24 * 30, "90d": 24 * 90 }[timeFilter];
+    if (windowHours) {
+      params.set("after", new Date(Date.now() - windowHours * 3600 * 1000).toISOString());
     }
+    const source = new EventSource(`${API_URL}/api/incidents/stream?${params.toString()}`);
+
+    source.addEventListener("visible", (e) => {
+      const point = JSON.parse(e.data);
+      setReports((current) =>
+        current.some((r) => r.id === point.id) ? current : [...current, point]
+      );
+    });
+
+    source.addEventListener("hidden", (e) => {
+      const { id } = JSON.parse(e.data);
+      setReports((current) => current.filter((r) => r.id !== id));
+    });
+
+    // Cursor fell out of the server's change log: reload the snapshot
+    source.addEventListener("reset", () => {
+      source.close();
+      setCursor(null);
+      setReloadToken((n) => n + 1);
+    });
+
+    return () => source.close();
+  }, [cursor, filter, locationFilter, bbox, timeFilter]);
+
+  // Free-text search stays client-side over the already-windowed results
+  useEffect(() => {
+    let filtered = reports;
 
-    // Search filter
     if (searchQuery) {
       const query = searchQuery.toLowerCase();
       filtered = filtered.filter(report => 
         report.type?.toLowerCase().includes(query) ||
         report.location?.toLowerCase().includes(query) ||
+        report.county?.toLowerCase().includes(query) ||
+        report.area?.toLowerCase().includes(query) ||
         report.description?.toLowerCase().includes(query)
       );
     }
 
-    // Time filter
-    if (timeFilter !== "all") {
-      const now = new Date();
-      let cutoffDate = new Date();
-      
-      switch (timeFilter) {
-        case "24h":
-          cutoffDate.setDate(now.getDate() - 1);
-          break;
-        case "7d":
-          cutoffDate.setDate(now.getDate() - 7);
-          break;
-        case "30d":
-          cutoffDate.setDate(now.getDate() - 30);
-          break;
-        case "90d":
-          cutoffDate.setDate(now.getDate() - 90);
-          break;
-      }
-      
-      filtered = filtered.filter(report => {
-        if (!report.timestamp) return false;
-        const reportDate = new Date(report.timestamp);
-        return reportDate >= cutoffDate;
-      });
-    }
-
-    // Location filter
-    if (locationFilter !== "all") {
-      filtered = filtered.filter(report => 
-        report.location?.toLowerCase().includes(locationFilter.toLowerCase())
-      );
-    }
-
     setFilteredReports(filtered);
-  }, [reports, filter, searchQuery, timeFilter, locationFilter]);
+  }, [reports, searchQuery]);
 
   const handleFilterChange = (type) => {
     setFilter(type);
@@ -497,7 +529,7 @@ export default function MapPage() {
           <div className="flex-1 flex flex-col">
             <div className="flex-1 p-6">
               <div className="bg-black/20 backdrop-blur-lg rounded-2xl border border-white/10 shadow-2xl h-full overflow-hidden">
-                <IncidentMap reports={filteredReports} />
+                <IncidentMap reports={filteredReports} onBoundsChange={setBbox} />
               </div>
             </div>
 
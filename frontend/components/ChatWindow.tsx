@@ -23,7 +23,7 @@ interface ChatWindowProps {
   activeChat: Chat;
   onUpdateChat: (chatId: number, newMessages: ChatMessage[]) => void;
   sidebarCollapsed: boolean;
-  onSendMessage: (message: string) => Promise<string>;
+  onSendMessage: (message: string, onToken?: (text: string) => void) => Promise<string>;
   language: 'en' | 'sw';
 }
 
@@ -36,6 +36,7 @@ export default function ChatWindow({
 }: ChatWindowProps) {
   const [inputMessage, setInputMessage] = useState("");
   const [isLoading, setIsLoading] = useState(false);
+  const [isStreaming, setIsStreaming] = useState(false);
   const messagesEndRef = useRef<HTMLDivElement>(null);
 
   const scrollToBottom = () => {
@@ -85,7 +86,17 @@ export default function ChatWindow({
     setIsLoading(true);
 
     try {
-      const botResponse = await onSendMessage(inputMessage.trim());
+      // Render the reply as it streams in
+      let streamedText = "";
+      const streamStartedAt = new Date();
+      const botResponse = await onSendMessage(inputMessage.trim(), (chunk) => {
+        streamedText += chunk;
+        setIsStreaming(true);
+        onUpdateChat(activeChat.id, [
+          ...updatedMessages,
+          { sender: "bot", text: streamedText, timestamp: streamStartedAt }
+        ]);
+      });
       
       const botMessage: ChatMessage = {
         sender: "bot",
@@ -108,6 +119,7 @@ export default function ChatWindow({
       onUpdateChat(activeChat.id, finalMessages);
     } finally {
       setIsLoading(false);
+      setIsStreaming(false);
     }
   };
 
@@ -204,7 +216,7 @@ export default function ChatWindow({
             ))}
 
             {/* Typing Indicator */}
-            {isLoading && (
+            {isLoading && !isStreaming && (
               <div className="flex gap-3 items-start">
                 <div className="flex-shrink-0 w-10 h-10 rounded-full bg-gradient-to-r from-purple-400 to-pink-400 flex items-center justify-center shadow-md">
                   <Bot size={18} className="text-white" />
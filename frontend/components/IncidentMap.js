@@ -12,7 +12,7 @@ const LeafletMap = dynamic(() => import("./LeafletMap"), {
   )
 });
 
-export default function IncidentMap({ reports }) {
+export default function IncidentMap({ reports, onBoundsChange }) {
   const [mapReports, setMapReports] = useState([]);
 
   useEffect(() => {
@@ -23,7 +23,7 @@ export default function IncidentMap({ reports }) {
   return (
     // This container controls the size of the map
     <div className="w-full h-full min-h-[500px] rounded-2xl overflow-hidden border border-white/10 shadow-inner bg-slate-900 relative z-0">
-      <LeafletMap reports={mapReports} />
+      <LeafletMap reports={mapReports} onBoundsChange={onBoundsChange} />
     </div>
   );
 }
\ No newline at end of file
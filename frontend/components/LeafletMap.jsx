@@ -45,9 +45,12 @@ const incidentIcons = {
   })
 };
 
-export default function LeafletMap({ reports = [] }) { 
+export default function LeafletMap({ reports = [], onBoundsChange }) { 
   const mapRef = useRef(null);
   const mapInstanceRef = useRef(null);
+  const hasFittedRef = useRef(false);
+  const onBoundsChangeRef = useRef(onBoundsChange);
+  onBoundsChangeRef.current = onBoundsChange;
 
   useEffect(() => {
     if (!mapRef.current) return;
@@ -64,6 +67,15 @@ export default function LeafletMap({ reports = [] }) {
 
     mapInstanceRef.current = map;
 
+    // Report the visible window ("west,south,east,north") so only it is fetched
+    const emitBounds = () => {
+      if (onBoundsChangeRef.current) {
+        onBoundsChangeRef.current(map.getBounds().toBBoxString());
+      }
+    };
+    map.on("moveend", emitBounds);
+    emitBounds();
+
     return () => {
       if (mapInstanceRef.current) {
         mapInstanceRef.current.remove();
@@ -74,7 +86,7 @@ export default function LeafletMap({ reports = [] }) {
 
   // Handle Updates to Reports Data
   useEffect(() => {
-    if (!mapInstanceRef.current || !reports.length) return;
+    if (!mapInstanceRef.current) return;
 
     const map = mapInstanceRef.current;
     
@@ -116,7 +128,9 @@ export default function LeafletMap({ reports = [] }) {
     markers.push(marker);
   }
 });
-    if (markers.length > 0) {
+    // Only fit once - later updates come from panning, and refitting would fight the user
+    if (markers.length > 0 && !hasFittedRef.current) {
+      hasFittedRef.current = true;
       const group = new L.featureGroup(markers);
       try {
         map.fitBounds(group.getBounds().pad(0.1));